@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+# python benchmarks/async_server_load.py
+#
+# Load test of server_async.py against a local mock LLM (an OpenAI compatible endpoint which answers
+# after a fixed latency). Conversations are sent concurrently, and the throughput should scale
+# with the concurrency because the server does not block while waiting for the LLM.
+# It requires starlette and uvicorn (pip install starlette uvicorn).
+import asyncio
+import json
+import multiprocessing
+import os
+import socket
+import sys
+import tempfile
+import time
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse
+from starlette.routing import Route
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from server_async import create_app  # noqa: E402
+
+LATENCY = 0.5
+"""Latency of the mock LLM in seconds"""
+
+
+async def chat_completions(request):
+    body = await request.json()
+    await asyncio.sleep(LATENCY)
+    content = f"echo: {body['messages'][-1]['content']}"
+    return JSONResponse(
+        {
+            "id": "mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body["model"],
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": 10, "completion_tokens": 10, "total_tokens": 20},
+        }
+    )
+
+
+def serve_mock_llm(port: int):
+    mock = Starlette(routes=[Route("/v1/chat/completions", chat_completions, methods=["POST"])])
+    uvicorn.run(mock, host="127.0.0.1", port=port, log_level="warning", backlog=2048)
+
+
+def start_mock_llm() -> int:
+    """Starts the mock LLM in another process (so that it does not compete with the server for the GIL), and returns its port"""
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    multiprocessing.Process(target=serve_mock_llm, args=(port,), daemon=True).start()
+    while True:
+        try:
+            socket.create_connection(("127.0.0.1", port)).close()
+            return port
+        except OSError:
+            time.sleep(0.05)
+
+
+async def run(client: httpx.AsyncClient, concurrency: int):
+    latencies = []
+
+    async def conversation(i: int):
+        start = time.perf_counter()
+        response = await client.post("/manifests/bench/mock/talk", json={"message": f"hello {i}"})
+        assert response.json()["messages"][-1]["content"] == f"echo: hello {i}"
+        latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*[conversation(i) for i in range(concurrency)])
+    elapsed = time.perf_counter() - start
+    latencies.sort()
+    return (concurrency / elapsed, latencies[len(latencies) // 2], latencies[int(len(latencies) * 0.95) - 1 if concurrency >= 20 else -1])
+
+
+async def main():
+    port = start_mock_llm()
+    os.environ["MOCK_LLM_API_KEY"] = "mock"
+    model = {
+        "engine_name": "openai-gpt",
+        "model_name": "gpt-3.5-turbo",
+        "api_key": "MOCK_LLM_API_KEY",
+        "api_base": f"http://127.0.0.1:{port}/v1",
+        "max_token": 4096,
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.makedirs("manifests/bench")
+        with open("manifests/bench/mock.json", "w") as f:
+            json.dump({"title": "mock", "prompt": "You are a helpful assistant.", "model": model}, f)
+
+        app = create_app(tmp, tmp + "/manifests", {}, {})
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://server", timeout=600) as client:
+            print(f"mock LLM latency: {LATENCY * 1000:.0f} ms")
+            print(f"{'concurrency':>11} {'req/s':>8} {'p50 (ms)':>9} {'p95 (ms)':>9}")
+            for concurrency in [1, 10, 100, 500]:
+                (throughput, p50, p95) = await run(client, concurrency)
+                print(f"{concurrency:>11} {throughput:>8.1f} {p50 * 1000:>9.0f} {p95 * 1000:>9.0f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
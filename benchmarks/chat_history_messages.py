@@ -0,0 +1,55 @@
+#!/usr/bin/env python3
+# python benchmarks/chat_history_messages.py
+#
+# Compares ChatHistory.messages() (cached views) with rebuilding the API-shaped
+# messages from the repository on every call, which is what each turn used to do.
+import os
+import sys
+import tempfile
+import timeit
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from slashgpt.chat_history import ChatHistory  # noqa: E402
+from slashgpt.history.storage.memory import ChatHistoryMemoryStorage  # noqa: E402
+
+
+def create_history(count: int):
+    storage = ChatHistoryMemoryStorage("bench", "bench", write_behind=True, flush_interval=3600)
+    history = ChatHistory(storage)
+    for i in range(count):
+        role = "user" if i % 2 == 0 else "assistant"
+        history.append_message({"role": role, "content": f"message {i}", "name": None, "preset": False})
+    return history
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        print(f"{'messages':>8} {'rebuild (us)':>13} {'cached (us)':>12} {'turn, rebuild (us)':>19} {'turn, cached (us)':>18}")
+        for count in [1000, 2000, 5000, 10000]:
+            history = create_history(count)
+            number = 200
+
+            def rebuild():
+                return list(map(history.message_dict, history.repository.messages()))
+
+            rebuild_time = timeit.timeit(rebuild, number=number) / number
+            cached_time = timeit.timeit(history.messages, number=number) / number
+
+            # A turn appends a question and an answer, and reads the messages three times
+            # (RAG, call_llm and md).
+            def turn(read):
+                history.append_message({"role": "user", "content": "question", "name": None, "preset": False})
+                history.append_message({"role": "assistant", "content": "answer", "name": None, "preset": False})
+                for _ in range(3):
+                    read()
+
+            turn_rebuild = timeit.timeit(lambda: turn(rebuild), number=number) / number
+            turn_cached = timeit.timeit(lambda: turn(history.messages), number=number) / number
+            print(f"{count:>8} {rebuild_time * 1e6:>13.1f} {cached_time * 1e6:>12.1f} {turn_rebuild * 1e6:>19.1f} {turn_cached * 1e6:>18.1f}")
+            history.repository.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,146 @@
+#!/usr/bin/env python3
+# python benchmarks/chat_pipeline.py [iterations] [--json results.json]
+#
+# Measures SlashGPT's own overhead in the chat pipeline with the mock LLM engine (no API calls):
+# the latency (p50/p95), throughput and memory allocations of each stage.
+# Save the results with --json, and compare them to catch regressions in the hot paths.
+import contextlib
+import io
+import json
+import os
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.append(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from slashgpt.chat_app import ChatApplication  # noqa: E402
+from slashgpt.chat_config_with_manifests import ChatConfigWithManifests  # noqa: E402
+from slashgpt.chat_session import ChatSession  # noqa: E402
+from slashgpt.config_registry import ConfigRegistry  # noqa: E402
+from slashgpt.history.storage.log import LogFlusher  # noqa: E402
+from slashgpt.llms.model import LlmModel  # noqa: E402
+
+MOCK = {"engine_name": "mock", "model_name": "mock", "max_token": 4096}
+
+MANIFESTS = {
+    "echo": {
+        "title": "Echo",
+        "prompt": ["You are a helpful assistant.", "Answer the question of the user."],
+        "model": {**MOCK, "replies": ["Hello! How can I help you today?"]},
+    },
+    "tool": {
+        "title": "Tool",
+        "prompt": "You greet people.",
+        "model": {**MOCK, "replies": [{"function_call": {"name": "greet", "arguments": {"name": "Bob"}}}, "Done."]},
+        "functions": [{"name": "greet", "description": "Greet", "parameters": {"type": "object", "properties": {"name": {"type": "string"}}}}],
+        "actions": {"greet": {"type": "message_template", "message": "Hello {name}"}},
+    },
+    "dispatcher": {
+        "title": "Dispatcher",
+        "prompt": "Categorize the question of the user.",
+        "model": {**MOCK, "replies": [{"function_call": {"name": "categorize", "arguments": {"category": "echo", "question": "Hi"}}}]},
+        "functions": [
+            {
+                "name": "categorize",
+                "description": "Categorize",
+                "parameters": {"type": "object", "properties": {"category": {"type": "string"}, "question": {"type": "string"}}},
+            }
+        ],
+        "actions": {"categorize": {"type": "emit", "emit_method": "switch_session", "emit_data": {"message": "{question}", "agent": "{category}"}}},
+    },
+}
+
+
+def measure(name: str, setup, stage, iterations: int):
+    """Runs setup() and stage(state) for each iteration, and returns the statistics of the stage"""
+    latencies = []
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(iterations):
+            state = setup()
+            start = time.perf_counter()
+            stage(state)
+            latencies.append(time.perf_counter() - start)
+
+        # Allocations are measured separately, because tracemalloc slows down the stage
+        peaks = []
+        tracemalloc.start()
+        for _ in range(min(iterations, 50)):
+            state = setup()
+            tracemalloc.reset_peak()
+            (current, _) = tracemalloc.get_traced_memory()
+            stage(state)
+            peaks.append(tracemalloc.get_traced_memory()[1] - current)
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "stage": name,
+        "p50_us": latencies[len(latencies) // 2] * 1e6,
+        "p95_us": latencies[int(len(latencies) * 0.95) - 1] * 1e6,
+        "ops_per_sec": len(latencies) / sum(latencies),
+        "peak_kib": statistics.median(peaks) / 1024,
+    }
+
+
+def main():
+    args = sys.argv[1:]
+    json_path = None
+    if "--json" in args:
+        json_path = os.path.abspath(args.pop(args.index("--json") + 1))
+        args.remove("--json")
+    iterations = int(args[0]) if args else 200
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        os.makedirs("manifests/bench")
+        for name, manifest in MANIFESTS.items():
+            with open(f"manifests/bench/{name}.json", "w") as f:
+                json.dump(manifest, f)
+        config = ChatConfigWithManifests(tmp, tmp + "/manifests/bench")
+
+        def new_session(agent: str):
+            session = ChatSession(config, manifest=config.manifests[agent], agent_name=agent)
+            session.append_user_question("Hi")
+            return session
+
+        def new_app(agent: str):
+            app = ChatApplication(config, model=LlmModel(MOCK, config.llm_engine_configs))
+            app.switch_session(agent)
+            app.session.append_user_question("Hi")
+            return app
+
+        import server
+
+        server.current_dir = tmp
+        server.configs = ConfigRegistry(tmp)
+        client = server.app.test_client()
+
+        def talk(_):
+            response = client.post("/manifests/bench/echo/talk", json={"message": "Hi"})
+            assert response.status_code == 200
+
+        results = [
+            measure("ChatSession()", lambda: None, lambda _: ChatSession(config, manifest=config.manifests["echo"], agent_name="echo"), iterations),
+            measure("call_loop (reply)", lambda: new_session("echo"), lambda session: session.call_loop(lambda *_: None), iterations),
+            measure("call_loop (function call)", lambda: new_session("tool"), lambda session: session.call_loop(lambda *_: None), iterations),
+            measure("ChatApplication.process_llm", lambda: new_app("echo"), lambda app: app.process_llm(), iterations),
+            measure("dispatcher emit", lambda: new_app("dispatcher"), lambda app: app.process_llm(), iterations),
+            measure("Flask talk", lambda: None, talk, iterations),
+        ]
+        # Write the logs before the folder is removed
+        LogFlusher.instance().flush_all()
+
+    print(f"{'stage':<28} {'p50 (us)':>10} {'p95 (us)':>10} {'ops/s':>9} {'peak (KiB)':>11}")
+    for result in results:
+        print(f"{result['stage']:<28} {result['p50_us']:>10.1f} {result['p95_us']:>10.1f} {result['ops_per_sec']:>9.0f} {result['peak_kib']:>11.1f}")
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
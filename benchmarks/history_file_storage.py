@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+# python benchmarks/history_file_storage.py
+#
+# Compares the bytes written and the latency of ChatHistoryFileStorage.append
+# between the snapshot mode (rewrite the whole session) and the journal mode.
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from slashgpt.history.storage.file import ChatHistoryFileStorage  # noqa: E402
+
+MESSAGE = "The quick brown fox jumps over the lazy dog. " * 8
+
+
+def run(turns: int, journal: bool):
+    storage = ChatHistoryFileStorage("bench", "bench", journal=journal)
+    snapshot = f"{storage.base_dir}/bench/{storage.session_id}.json"
+    bytes_written = 0
+    latencies = []
+    previous_journal_size = 0
+    for i in range(turns):
+        role = "user" if i % 2 == 0 else "assistant"
+        start = time.perf_counter()
+        storage.append({"role": role, "content": MESSAGE, "name": None, "preset": False})
+        latencies.append(time.perf_counter() - start)
+
+        if journal:
+            # Each append adds one record to the journal, and a compaction rewrites the snapshot
+            # (and truncates the journal). The record that triggered a compaction is not counted.
+            journal_size = os.path.getsize(snapshot + "l")
+            if journal_size > previous_journal_size:
+                bytes_written += journal_size - previous_journal_size
+            else:
+                bytes_written += os.path.getsize(snapshot)
+            previous_journal_size = journal_size
+        else:
+            bytes_written += os.path.getsize(snapshot)
+
+    latencies.sort()
+    return (bytes_written, sum(latencies) / turns, latencies[int(turns * 0.99) - 1 if turns >= 100 else -1])
+
+
+def main():
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        print(f"{'turns':>6} {'mode':>9} {'bytes written':>15} {'mean (us)':>10} {'p99 (us)':>10}")
+        for turns in [10, 100, 1000]:
+            for journal in [False, True]:
+                (bytes_written, mean, p99) = run(turns, journal)
+                mode = "journal" if journal else "snapshot"
+                print(f"{turns:>6} {mode:>9} {bytes_written:>15,} {mean * 1e6:>10.1f} {p99 * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
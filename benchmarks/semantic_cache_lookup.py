@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+# python benchmarks/semantic_cache_lookup.py [entries] [--dim 1536] [--queries 200]
+#
+# Measures the lookup latency (p50/p95) of SemanticCache with the given number of cached entries
+# (100k by default) in a namespace. Questions are random unit vectors (no embedding API calls),
+# and half of the queries are near-duplicates of cached questions (hits).
+import os
+import statistics
+import sys
+import time
+
+import numpy as np
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from slashgpt.llms.semantic_cache import SemanticCache  # noqa: E402
+
+
+def option(name: str, default: int) -> int:
+    if name in sys.argv:
+        return int(sys.argv[sys.argv.index(name) + 1])
+    return default
+
+
+def unit(vectors):
+    return vectors / np.linalg.norm(vectors, axis=-1, keepdims=True)
+
+
+def main():
+    args = [arg for (i, arg) in enumerate(sys.argv[1:], 1) if not arg.startswith("--") and not sys.argv[i - 1].startswith("--")]
+    entries = int(args[0]) if args else 100000
+    dim = option("--dim", 1536)
+    queries = option("--queries", 200)
+
+    rng = np.random.default_rng(0)
+    cache = SemanticCache(None, threshold=0.95, max_entries=entries)
+    vectors = unit(rng.standard_normal((entries, dim), dtype=np.float32))
+    start = time.perf_counter()
+    for i, vector in enumerate(vectors):
+        cache.store("faq", vector, f"question {i}", f"answer {i}")
+    fill = time.perf_counter() - start
+
+    hits = unit(vectors[rng.integers(0, entries, queries // 2)] + rng.standard_normal((queries // 2, dim), dtype=np.float32) * 0.005)
+    misses = unit(rng.standard_normal((queries - queries // 2, dim), dtype=np.float32))
+    latencies = []
+    results = 0
+    for vector in np.concatenate([hits, misses]):
+        start = time.perf_counter()
+        if cache.lookup("faq", vector):
+            results += 1
+        latencies.append(time.perf_counter() - start)
+
+    latencies.sort()
+    p50 = statistics.median(latencies)
+    p95 = latencies[int(len(latencies) * 0.95) - 1]
+    print(f"entries={entries:,} dim={dim} index={entries * dim * 4 / 2**20:,.0f}MiB fill={fill:.2f}s ({fill / entries * 1e6:.1f}us/entry)")
+    print(f"lookup p50={p50 * 1000:.2f}ms p95={p95 * 1000:.2f}ms hits={results}/{queries} stats={cache.stats}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# python benchmarks/session_creation.py [iterations] [--json results.json]
+#
+# Measures the latency of creating a ChatSession for every manifest in manifests/main (without API calls,
+# the models are replaced by the mock engine): "cold" compiles each manifest (reads functions and resource files,
+# parses the prompt) as the first session of the agent does, and "compiled" reuses the compiled manifests.
+import contextlib
+import io
+import json
+import os
+import sys
+import tempfile
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../src"))
+
+from chat_pipeline import MOCK, measure  # noqa: E402
+
+from slashgpt.chat_config_with_manifests import ChatConfigWithManifests  # noqa: E402
+from slashgpt.chat_session import ChatSession  # noqa: E402
+from slashgpt.history.storage.log import LogFlusher  # noqa: E402
+from slashgpt.manifest import CompiledManifest, Manifest  # noqa: E402
+
+base_path = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+
+
+def main():
+    args = sys.argv[1:]
+    json_path = None
+    if "--json" in args:
+        json_path = os.path.abspath(args.pop(args.index("--json") + 1))
+        args.remove("--json")
+    iterations = int(args[0]) if args else 100
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        config = ChatConfigWithManifests(base_path, base_path + "/manifests/main")
+        config.manifests = {name: {**manifest, "model": MOCK} for name, manifest in config.manifests.items()}
+
+        def new_sessions(_):
+            for name, manifest in config.manifests.items():
+                ChatSession(config, manifest=manifest, agent_name=name)
+
+        def prompts(_):
+            for name, manifest in config.manifests.items():
+                Manifest(manifest, base_path, name).prompt_data(config.manifests)
+
+        with contextlib.redirect_stdout(io.StringIO()):
+            new_sessions(None)  # shared caches and routers
+        results = [
+            measure("ChatSession() cold", lambda: CompiledManifest.invalidate(), new_sessions, iterations),
+            measure("ChatSession() compiled", lambda: None, new_sessions, iterations),
+            measure("prompt_data cold", lambda: CompiledManifest.invalidate(), prompts, iterations),
+            measure("prompt_data compiled", lambda: None, prompts, iterations),
+        ]
+        # Write the logs before the folder is removed
+        LogFlusher.instance().flush_all()
+
+    print(f"{len(config.manifests)} manifests in manifests/main (per set)")
+    print(f"{'stage':<28} {'p50 (us)':>10} {'p95 (us)':>10} {'sets/s':>9} {'peak (KiB)':>11}")
+    for result in results:
+        print(f"{result['stage']:<28} {result['p50_us']:>10.1f} {result['p95_us']:>10.1f} {result['ops_per_sec']:>9.0f} {result['peak_kib']:>11.1f}")
+    if json_path:
+        with open(json_path, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,17 @@
+# python build_snapshot.py [manifests folder names...] (all folders in manifests by default)
+#
+# Compiles each manifests folder and the files referred by its manifests (functions, modules and resources)
+# into manifests/{name}/manifests.snapshot, which ChatConfigWithManifests loads instead of parsing the manifests.
+# Run it before prebuild.py, so that the snapshots are copied with the manifests.
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
+
+from slashgpt.manifest_snapshot import SNAPSHOT_FILE, build_snapshot  # noqa: E402
+
+base_path = os.path.dirname(os.path.abspath(__file__))
+names = sys.argv[1:] or sorted(name for name in os.listdir(f"{base_path}/manifests") if os.path.isdir(f"{base_path}/manifests/{name}"))
+for name in names:
+    snapshot = build_snapshot(base_path, f"{base_path}/manifests/{name}")
+    print(f"manifests/{name}/{SNAPSHOT_FILE}: {len(snapshot['manifests'])} manifests, {len(snapshot['files'])} files")
@@ -4,12 +4,15 @@ import re
 import sys
 
 from dotenv import load_dotenv
-from flask import Flask, jsonify, render_template, request
+from flask import Flask, Response, jsonify, render_template, request
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
 
 from config.llm_config import llm_engine_configs, llm_models  # noqa: E402
-from slashgpt import ChatConfigWithManifests, ChatHistoryFileStorage, ChatSession, PythonRuntime, print_error  # noqa: E402
+from slashgpt import ChatHistoryFileStorage, ChatSession, ConfigRegistry, PythonRuntime, SessionPool, print_error  # noqa: E402
+from slashgpt.utils.metrics import MetricsExporter, MetricsRegistry  # noqa: E402
+from slashgpt.utils.sse import sse_data, sse_event  # noqa: E402
+from slashgpt.utils.trace import add_exporter  # noqa: E402
 
 load_dotenv()
 
@@ -25,12 +28,28 @@ with open(current_dir + "/manifests/manifests.json", "r") as f:
 
 runtime = PythonRuntime(current_dir + "/output/notebooks")
 
+# Configs (parsed manifests) are shared by requests, and updated by watchers when manifest files, function definitions or modules are modified
+configs = ConfigRegistry(current_dir, llm_models, llm_engine_configs, watch=True)
+
+# Live sessions, which are reused by the following turns of the conversations
+sessions = SessionPool()
+
+# Metrics of LLM calls, tokens, function calls, history writes and errors (recorded from the traces), and sessions, exposed by /metrics
+metrics = MetricsRegistry()
+metrics.pooled_sessions.set_function(lambda: len(sessions))
+add_exporter(MetricsExporter(metrics))
+
 
 @app.route("/")
 def index():
     return render_template("index.html")
 
 
+@app.route("/metrics")
+def metrics_text():
+    return Response(metrics.render(), content_type=MetricsRegistry.CONTENT_TYPE)
+
+
 @app.route("/manifests")
 def manifests():
     return jsonify({"modes": manifests_manager})
@@ -64,7 +83,7 @@ def modules():
 
 @app.route("/manifests/<manifests>")
 def manifests_list(manifests):
-    config = ChatConfigWithManifests(current_dir, current_dir + "/manifests/" + manifests, llm_models, llm_engine_configs)
+    config = configs.get(current_dir + "/manifests/" + manifests)
 
     return jsonify({"manifests": config.manifests})
 
@@ -72,7 +91,7 @@ def manifests_list(manifests):
 @app.route("/llms/<manifests>")
 def llm_list(manifests):
     print(manifests)
-    config = ChatConfigWithManifests(current_dir, current_dir + "/manifests/" + manifests, llm_models, llm_engine_configs)
+    config = configs.get(current_dir + "/manifests/" + manifests)
     return jsonify({"llms": list(config.llm_models.keys())})
 
 
@@ -81,18 +100,34 @@ def init_session(config, agent_name, manifest, llm):
     session_id = engine.session_id
     session = ChatSession(config, manifest=manifest, agent_name=agent_name, history_engine=engine)
     if llm:
-        session.set_llm_model(llm)
+        session.set_llm_model(config.get_llm_model_from_key(llm))
+    metrics.active_sessions.inc()
     return (session_id, session, engine)
 
 
 def restore_session(config, agent_name, manifest, session_id, llm):
+    # A live session is reused if it was created with the same config, manifest definition (not reloaded since), agent and LLM
+    session = sessions.checkout(session_id, SessionPool.tag(config, agent_name, manifest, llm))
+    if session:
+        metrics.active_sessions.inc()
+        return (session, session.history.repository)
     engine = ChatHistoryFileStorage("sample", agent_name, session_id=session_id)
     session = ChatSession(config, manifest=manifest, agent_name=agent_name, history_engine=engine, intro=False, restore=True)
     if llm:
-        session.set_llm_model(llm)
+        session.set_llm_model(config.get_llm_model_from_key(llm))
+    metrics.active_sessions.inc()
     return (session, engine)
 
 
+def release_session(config, agent_name, session_id, llm, session):
+    """Persist the summary of old messages (if enabled), and return the session to the pool"""
+    try:
+        session.update_summary(wait=True)
+        sessions.checkin(session_id, session, SessionPool.tag(config, agent_name, session.manifest.manifest(), llm))
+    finally:
+        metrics.active_sessions.dec()
+
+
 def process_llm(session):
     try:
         (res, function_call, _) = session.call_llm()
@@ -118,33 +153,64 @@ def process_llm(session):
 @app.route("/manifests/<manifests>/<agent>/talk", methods=["POST"])
 @app.route("/manifests/<manifests>/<agent>/talk/<session_id>", methods=["POST"])
 def talk(manifests, agent, session_id=None):
-    config = ChatConfigWithManifests(current_dir, current_dir + "/manifests/" + manifests, llm_models, llm_engine_configs)
-    config.verbose = True
+    config = configs.get(current_dir + "/manifests/" + manifests)
     m = config.manifests[agent]
 
     message = request.json["message"]
     llm = request.json.get("llm")
     print(llm)
     # print(m, message)
-    model = None
-    if llm:
-        print(llm_models)
-        model = config.get_llm_model_from_key(llm)
     if session_id is None:
-        (session_id, session, engine) = init_session(config, agent, m, model)
+        (session_id, session, engine) = init_session(config, agent, m, llm)
         if message:
             # print(session)
-            session.append_user_question(message)
-            process_llm(session)
+            with session.history.transaction():
+                session.append_user_question(message)
+                process_llm(session)
             # talk_to(message)
         print(message)
     else:
-        (session, engine) = restore_session(config, agent, m, session_id, model)
+        (session, engine) = restore_session(config, agent, m, session_id, llm)
         if message:
-            session.append_user_question(message)
-            process_llm(session)
+            with session.history.transaction():
+                session.append_user_question(message)
+                process_llm(session)
+
+    response = jsonify({"session_id": session_id, "messages": engine.messages()})
+    # Persist the summary of old messages (if enabled) and pool the session after the response is sent
+    response.call_on_close(lambda: release_session(config, agent, session_id, llm, session))
+    return response
+
+
+@app.route("/manifests/<manifests>/<agent>/stream", methods=["POST"])
+@app.route("/manifests/<manifests>/<agent>/stream/<session_id>", methods=["POST"])
+def talk_stream(manifests, agent, session_id=None):
+    """Streaming variant of talk. It sends Server-Sent Events (bot_delta, bot, function_call, function, emit and error)
+    while processing the message, and the done event with the session id and the messages at the end."""
+    config = configs.get(current_dir + "/manifests/" + manifests)
+    m = config.manifests[agent]
+
+    message = request.json["message"]
+    llm = request.json.get("llm")
+    if session_id is None:
+        (session_id, session, engine) = init_session(config, agent, m, llm)
+    else:
+        (session, engine) = restore_session(config, agent, m, session_id, llm)
 
-    return jsonify({"session_id": session_id, "messages": engine.messages()})
+    def generate():
+        if message:
+            if session.manifest.get("notebook"):
+                runtime.create_notebook(session.llm_model.name())
+            session.append_user_question(message)
+            for callback_type, data in session.call_loop_events(runtime):
+                yield sse_event(callback_type, sse_data(callback_type, data))
+        yield sse_event("done", {"session_id": session_id, "messages": engine.messages()})
+
+    response = Response(generate(), mimetype="text/event-stream", headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+    # The generator is closed before the callback (if the client disconnected, it waits for the call loop to stop),
+    # so the session is not used by the call loop when it is returned to the pool.
+    response.call_on_close(lambda: release_session(config, agent, session_id, llm, session))
+    return response
 
 
 if __name__ == "__main__":
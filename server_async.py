@@ -0,0 +1,160 @@
+import asyncio
+import json
+import os
+import sys
+
+from dotenv import load_dotenv
+from starlette.applications import Starlette
+from starlette.background import BackgroundTask
+from starlette.responses import JSONResponse, StreamingResponse
+from starlette.routing import Route
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "src"))
+
+from config.llm_config import llm_engine_configs, llm_models  # noqa: E402
+from slashgpt import ChatHistoryFileStorage, ChatSession, ConfigRegistry, PythonRuntime, SessionPool, print_error  # noqa: E402
+from slashgpt.utils.sse import sse_data, sse_event  # noqa: E402
+
+# ASGI version of server.py. The LLM and REST function calls are awaited, so that a single process serves
+# hundreds of concurrent conversations.
+#   python server_async.py
+#   uvicorn server_async:app --port 5001
+
+load_dotenv()
+
+current_dir = os.path.dirname(__file__)
+
+
+def create_app(
+    base_path: str = current_dir,
+    manifests_path: str = current_dir + "/manifests",
+    models: dict = llm_models,
+    engine_configs: dict = llm_engine_configs,
+):
+    """Returns the Starlette application
+
+    Args:
+
+        base_path (str): path to the "base" folder.
+        manifests_path (str): path to the folder of manifest folders (and manifests.json)
+        models (dict, optional): collection of custom LLM model definitions
+        engine_configs (dict, optional): collection of custom LLM engine definitions
+    """
+    manifests_manager = {}
+    if os.path.exists(manifests_path + "/manifests.json"):
+        with open(manifests_path + "/manifests.json", "r") as f:
+            manifests_manager = json.load(f)
+
+    runtime = PythonRuntime(base_path + "/output/notebooks")
+    configs = ConfigRegistry(base_path, models, engine_configs, watch=True)
+    sessions = SessionPool()
+
+    def get_session(config, agent: str, session_id, llm):
+        if session_id is None:
+            engine = ChatHistoryFileStorage("sample", agent)
+            session = ChatSession(config, manifest=config.manifests[agent], agent_name=agent, history_engine=engine)
+        else:
+            session = sessions.checkout(session_id, SessionPool.tag(config, agent, config.manifests[agent], llm))
+            if session:
+                return (session_id, session, session.history.repository)
+            engine = ChatHistoryFileStorage("sample", agent, session_id=session_id)
+            session = ChatSession(config, manifest=config.manifests[agent], agent_name=agent, history_engine=engine, intro=False, restore=True)
+        if llm:
+            session.set_llm_model(config.get_llm_model_from_key(llm))
+        return (engine.session_id, session, engine)
+
+    def release_session(config, agent: str, session_id: str, llm, session: ChatSession):
+        session.update_summary(wait=True)
+        sessions.checkin(session_id, session, SessionPool.tag(config, agent, session.manifest.manifest(), llm))
+
+    async def manifests(request):
+        return JSONResponse({"modes": manifests_manager})
+
+    async def manifests_list(request):
+        config = configs.get(manifests_path + "/" + request.path_params["manifests"])
+        return JSONResponse({"manifests": config.manifests})
+
+    async def llm_list(request):
+        config = configs.get(manifests_path + "/" + request.path_params["manifests"])
+        return JSONResponse({"llms": list(config.llm_models.keys())})
+
+    async def talk(request):
+        config = configs.get(manifests_path + "/" + request.path_params["manifests"])
+        body = await request.json()
+        message = body["message"]
+        (agent, llm) = (request.path_params["agent"], body.get("llm"))
+        (session_id, session, engine) = get_session(config, agent, request.path_params.get("session_id"), llm)
+        if message:
+            if session.manifest.get("notebook"):
+                runtime.create_notebook(session.llm_model.name())
+            try:
+                with session.history.transaction():
+                    session.append_user_question(message)
+                    await session.call_loop_async(lambda callback_type, data: None, runtime)
+            except Exception as e:
+                print_error(f"Exception: Restarting the chat :{e}")
+
+        # Persist the summary of old messages (if enabled) and pool the session after the response is sent
+        background = BackgroundTask(release_session, config, agent, session_id, llm, session)
+        return JSONResponse({"session_id": session_id, "messages": engine.messages()}, background=background)
+
+    async def talk_stream(request):
+        """Streaming variant of talk (see server.py)"""
+        config = configs.get(manifests_path + "/" + request.path_params["manifests"])
+        body = await request.json()
+        message = body["message"]
+        (agent, llm) = (request.path_params["agent"], body.get("llm"))
+        (session_id, session, engine) = get_session(config, agent, request.path_params.get("session_id"), llm)
+
+        async def generate():
+            if message:
+                if session.manifest.get("notebook"):
+                    runtime.create_notebook(session.llm_model.name())
+                events: asyncio.Queue = asyncio.Queue()
+                done = object()
+
+                async def run():
+                    try:
+                        with session.history.transaction():
+                            session.append_user_question(message)
+                            await session.call_loop_async(lambda callback_type, data: events.put_nowait((callback_type, data)), runtime)
+                    except Exception as e:
+                        events.put_nowait(("error", e))
+                    finally:
+                        events.put_nowait(done)
+
+                task = asyncio.create_task(run())
+                while (event := await events.get()) is not done:
+                    (callback_type, data) = event
+                    yield sse_event(callback_type, sse_data(callback_type, data))
+                await task
+            yield sse_event("done", {"session_id": session_id, "messages": engine.messages()})
+
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        return StreamingResponse(
+            generate(),
+            media_type="text/event-stream",
+            headers=headers,
+            background=BackgroundTask(release_session, config, agent, session_id, llm, session),
+        )
+
+    return Starlette(
+        routes=[
+            Route("/manifests", manifests),
+            Route("/manifests/{manifests}", manifests_list),
+            Route("/llms/{manifests}", llm_list),
+            Route("/manifests/{manifests}/{agent}/talk", talk, methods=["POST"]),
+            Route("/manifests/{manifests}/{agent}/talk/{session_id}", talk, methods=["POST"]),
+            Route("/manifests/{manifests}/{agent}/stream", talk_stream, methods=["POST"]),
+            Route("/manifests/{manifests}/{agent}/stream/{session_id}", talk_stream, methods=["POST"]),
+        ]
+    )
+
+
+app = create_app()
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run(app, port=5001)
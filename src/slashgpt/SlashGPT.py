@@ -17,8 +17,10 @@ except ImportError:
 from slashgpt.chat_app import ChatApplication
 from slashgpt.chat_config_with_manifests import ChatConfigWithManifests
 from slashgpt.function.jupyter_runtime import PythonRuntime
+from slashgpt.manifest_watcher import ManifestWatcher
 from slashgpt.utils.help import LONG_HELP, ONELINE_HELP
-from slashgpt.utils.print import print_bot, print_debug, print_error, print_function, print_info, print_warning
+from slashgpt.utils.print import print_bot, print_bot_delta, print_debug, print_error, print_function, print_info, print_warning
+from slashgpt.utils.trace import WaterfallExporter, add_exporter, remove_exporter, span
 from slashgpt.utils.utils import InputStyle
 
 if platform.system() == "Darwin":
@@ -26,6 +28,8 @@ if platform.system() == "Darwin":
     import readline  # noqa: F401
 
 
+IMPORT_LIST_LIMIT = 20
+
 """
 utility functions for Main class
 """
@@ -59,15 +63,13 @@ class ChatSlashConfig(ChatConfigWithManifests):
             llm_models (dict, optional): collection of custom LLM model definitions
             llm_engine_configs (dict, optional): collection of custom LLM engine definitions
         """
-        super().__init__(base_path, path_manifests, llm_models, llm_engine_configs)
+        super().__init__(base_path, path_manifests, llm_models, llm_engine_configs, lazy=True)
         self.audio: Optional[str] = None
         """Flag indicating if the audio mode is on or not"""
 
-    def __get_manifests_keys(self):
-        return sorted(self.manifests.keys())
-
     def help_list(self):
-        return (f"/{(key+'         ')[:12]} {self.manifests.get(key).get('title')}" for key in self.__get_manifests_keys())
+        # The titles are read from the index file of the folder, so only new or modified manifests are parsed
+        return (f"/{(entry['name']+'         ')[:12]} {entry['title']}" for entry in sorted(self.index.summary(), key=lambda entry: entry["name"]))
 
 
 """
@@ -79,8 +81,22 @@ class SlashGPT:
     def __init__(self, config: ChatSlashConfig, manifests_manager: dict, agent_name: str):
         self.manifests_manager = manifests_manager
         self.exit = False
+        self.streaming = False
+        """True while the bot message is being streamed"""
         self.app = ChatApplication(config, self._callback, runtime=PythonRuntime(config.base_path + "/output/notebooks"))
         self.app.switch_session(agent_name)
+        self.watcher: Optional[ManifestWatcher] = None
+        """Watcher of the manifest files (while "/watch" is on)"""
+        # Print the timing waterfall of each turn in the verbose mode (registered only while it is on, so that spans are not recorded otherwise)
+        self.__waterfall = WaterfallExporter(print_debug, root="turn")
+        self.set_verbose(config.verbose)
+
+    def set_verbose(self, verbose: bool):
+        """Turn the verbose mode on or off"""
+        self.app.config.verbose = verbose
+        remove_exporter(self.__waterfall)
+        if verbose:
+            add_exporter(self.__waterfall)
 
     def parse_question(self, question: str):
         key = question[1:].strip()
@@ -150,7 +166,7 @@ class SlashGPT:
             self.app.runtime.stop()
             self.exit = True
         elif key == "verbose" or key == "v":
-            self.app.config.verbose = not self.app.config.verbose
+            self.set_verbose(not self.app.config.verbose)
             print_debug(f"Verbose Mode: {self.app.config.verbose}")
         elif commands[0] == "audio":
             if len(commands) == 1:
@@ -209,6 +225,13 @@ class SlashGPT:
             self.import_data(commands)
         elif commands[0] == "reload":
             self.app.config.reload()
+        elif commands[0] == "watch":
+            if self.watcher:
+                self.watcher.stop()
+                self.watcher = None
+            else:
+                self.watcher = ManifestWatcher(self.app.config).start()
+            print_debug(f"Watch Mode: {self.watcher is not None}")
         elif self.app.config.has_manifest(commands[0]):
             messages = self.app.session.history.nonpreset_messages()  # for "-chain" option
             self.app.switch_session(commands[0])
@@ -229,17 +252,17 @@ class SlashGPT:
         if not os.path.exists(file_path):
             print_warning(f"No test script named {file_name}")
             return
-        self.app.config.verbose = True
+        self.set_verbose(True)
         with open(file_path, "r") as f:
             scripts = json.load(f)
             self.switch_manifests(scripts.get("manifests") or "main")
             for message in scripts.get("messages"):
                 self.test(**message)
-        self.app.config.verbose = False
+        self.set_verbose(False)
 
     def import_data(self, commands: List[str]):
         if len(commands) == 1:
-            files = self.app.session.history.session_list()
+            files = self.app.session.history.session_list(limit=IMPORT_LIST_LIMIT, order_by="updated_at", descending=True)
             for file in files:
                 print(str(file["id"]) + ": " + file["name"])
             return
@@ -247,16 +270,18 @@ class SlashGPT:
             log = self.app.session.history.get_session_data(commands[1])
             if log:
                 if len(commands) == 2:
-                    self.app.session.history.restore(log)
+                    self.app.session.history.restore(log["messages"])
+                    if log.get("summary"):
+                        self.app.session.history.set_summary(log["summary"])
                     print("imported")
                     return
                 if len(commands) == 3 and commands[2] == "show":
                     print(json.dumps(log, indent=2, ensure_ascii=False))
                     return
 
-        print("/import: list all histories")
-        print("/import {num}: import history")
-        print("/import {num} show: show history")
+        print(f"/import: list recent histories (up to {IMPORT_LIST_LIMIT})")
+        print("/import {id}: import history")
+        print("/import {id} show: show history")
 
     def switch_manifests(self, key: str):
         m = self.manifests_manager[key]
@@ -275,8 +300,17 @@ class SlashGPT:
                 self.talk(m)
 
     def _callback(self, callback_type, data):
+        if callback_type == "bot_delta":
+            print_bot_delta(self.app.session.botname(), data, not self.streaming)
+            self.streaming = True
+
         if callback_type == "bot":
-            print_bot(self.app.session.botname(), data)
+            if self.streaming:
+                # The message is already printed
+                print()
+                self.streaming = False
+            else:
+                print_bot(self.app.session.botname(), data)
 
             if self.app.config.audio:
                 play_text(data, self.app.config.audio)
@@ -323,5 +357,7 @@ class SlashGPT:
                     self.query_llm(question)
 
     def query_llm(self, question: str):
-        self.app.session.append_user_question(question)
-        self.app.process_llm()
+        with span("turn"):
+            with self.app.session.history.transaction():
+                self.app.session.append_user_question(question)
+                self.app.process_llm()
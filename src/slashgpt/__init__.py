@@ -8,12 +8,15 @@ from .chat_config_with_manifests import ChatConfigWithManifests
 from .chat_history import ChatHistory
 from .chat_session import ChatSession
 from .cli import cli
+from .config_registry import ConfigRegistry
+from .context_window import ContextWindow
 from .dbs.db_base import VectorDBBase
 from .dbs.db_chroma import DBChroma
 from .dbs.db_pgvector import DBPgVector
 from .dbs.db_pinecone import DBPinecone
 from .dbs.vector_engine import VectorEngine
 from .dbs.vector_engine_openai import VectorEngineOpenAI
+from .embedding_router import EmbeddingRouter
 from .function.function_action import FunctionAction
 from .function.function_call import FunctionCall
 from .function.jupyter_runtime import PythonRuntime
@@ -22,18 +25,26 @@ from .history.storage.file import ChatHistoryFileStorage
 
 # from .history.storage.log import *
 from .history.storage.memory import ChatHistoryMemoryStorage
+from .history.storage.sqlite import ChatHistorySQLiteStorage
+from .history.summarizer import HistorySummarizer
 
 # from .llms.default_config import *
 from .llms.engine.base import LLMEngineBase
 from .llms.engine.hosted import LLMEngineHosted
+from .llms.engine.mock import LLMEngineMock
 from .llms.engine.openai_gpt import LLMEngineOpenAIGPT
 from .llms.engine.openai_legacy import LLMEngineOpenAILegacy
 from .llms.engine.palm import LLMEnginePaLM
 from .llms.engine.replicate import LLMEngineReplicate
 from .llms.model import LlmModel
+from .llms.response_cache import ResponseCache
+from .llms.semantic_cache import SemanticCache
 from .manifest import Manifest
+from .manifest_index import ManifestIndex
+from .manifest_watcher import ManifestWatcher
+from .session_pool import SessionPool
 from .slashbot import run_bot
-from .utils.print import print_bot, print_debug, print_error, print_function, print_info, print_warning
+from .utils.print import print_bot, print_bot_delta, print_debug, print_error, print_function, print_info, print_warning
 
 # from .function.network import *
 
@@ -44,6 +55,10 @@ __all__ = [
     "ChatConfigWithManifests",
     "ChatHistory",
     "ChatSession",
+    "ConfigRegistry",
+    "ContextWindow",
+    "EmbeddingRouter",
+    "SessionPool",
     "cli",
     "run_bot",
     # dbs
@@ -63,20 +78,28 @@ __all__ = [
     "ChatHistoryAbstractStorage",
     "ChatHistoryFileStorage",
     "ChatHistoryMemoryStorage",
+    "ChatHistorySQLiteStorage",
+    "HistorySummarizer",
     # llm
     "LLMEngineBase",
     "LLMEngineHosted",
+    "LLMEngineMock",
     "LLMEngineOpenAIGPT",
     "LLMEngineOpenAILegacy",
     "LLMEnginePaLM",
     "LLMEngineReplicate",
     "LlmModel",
+    "ResponseCache",
+    "SemanticCache",
     "Manifest",
+    "ManifestIndex",
+    "ManifestWatcher",
     # utils
     "print_debug",
     "print_error",
     "print_info",
     "print_warning",
     "print_bot",
+    "print_bot_delta",
     "print_function",
 ]
@@ -1,12 +1,8 @@
-import json
-import os
-import re
 from typing import Optional
 
-import yaml
-
 from slashgpt.chat_config import ChatConfig
-from slashgpt.utils.print import print_error
+from slashgpt.manifest_index import ManifestIndex
+from slashgpt.manifest_snapshot import apply_snapshot, load_snapshot
 
 
 class ChatConfigWithManifests(ChatConfig):
@@ -15,7 +11,15 @@ class ChatConfigWithManifests(ChatConfig):
     a specified folder.
     """
 
-    def __init__(self, base_path: str, path_manifests: str, llm_models: Optional[dict] = None, llm_engine_configs: Optional[dict] = None):
+    def __init__(
+        self,
+        base_path: str,
+        path_manifests: str,
+        llm_models: Optional[dict] = None,
+        llm_engine_configs: Optional[dict] = None,
+        lazy: bool = False,
+        snapshot: bool = True,
+    ):
         """
         Args:
 
@@ -23,31 +27,33 @@ class ChatConfigWithManifests(ChatConfig):
             path_manifests (str): path to the manifests folder (json or yaml)
             llm_models (dict, optional): collection of custom LLM model definitions
             llm_engine_configs (dict, optional): collection of custom LLM engine definitions
+            lazy (bool, optional): True if manifests should be parsed on their first access
+                (manifests is a ManifestIndex instead of a dict)
+            snapshot (bool, optional): True if the snapshot of the folder (built by build_snapshot.py) should be used
+                for manifests whose files are not modified
         """
         super().__init__(base_path, llm_models, llm_engine_configs)
-        self.manifests: dict = self.__load_manifests(path_manifests)
-        """Set of manifests loaded from the specified folder"""
+        self.lazy = lazy
+        """True if manifests are parsed on their first access"""
+        self.snapshot = snapshot
+        """True if the snapshot of the folder is used"""
+        self.index: ManifestIndex = self.__new_index(path_manifests)
+        """Index of the manifest files in the folder (ManifestIndex)"""
+        self.manifests: dict = self.__load_manifests()
+        """Set of manifests loaded from the specified folder (dict, or ManifestIndex in the lazy mode)"""
         self.path_manifests: str = path_manifests
         """Location of the folder where manifests were loaded"""
 
-    @classmethod
-    def __load_manifests(cls, path: str):
-        manifests = {}
-        files = os.listdir(path)
-        for file in files:
-            if re.search(r"\.json$", file):
-                with open(f"{path}/{file}", "r", encoding="utf-8") as f:  # encoding add for Win
-                    try:
-                        manifests[file.split(".")[0]] = json.load(f)
-                    except json.JSONDecodeError:
-                        print_error(file + " is broken")
-            elif re.search(r"\.yml$", file):
-                with open(f"{path}/{file}", "r", encoding="utf-8") as f:  # encoding add for Win
-                    try:
-                        manifests[file.split(".")[0]] = yaml.safe_load(f)
-                    except Exception:
-                        print_error(file + " is broken")
-        return manifests
+    def __new_index(self, path: str) -> ManifestIndex:
+        index = ManifestIndex(path)
+        if self.snapshot:
+            snapshot = load_snapshot(path)
+            if snapshot:
+                apply_snapshot(index, snapshot, self.base_path)
+        return index
+
+    def __load_manifests(self):
+        return self.index if self.lazy else self.index.load_all()
 
     def switch_manifests(self, path: str):
         """Switch the set of manifests
@@ -57,11 +63,13 @@ class ChatConfigWithManifests(ChatConfig):
             path (str): path to the manifests folder (json or yaml)
         """
         self.path_manifests = path
-        self.reload()
+        self.index = self.__new_index(path)
+        self.manifests = self.__load_manifests()
 
     def reload(self):
-        """Reload manifest files"""
-        self.manifests = self.__load_manifests(self.path_manifests)
+        """Reload manifest files (only added or modified files are parsed again)"""
+        self.index = ManifestIndex(self.path_manifests, self.index)
+        self.manifests = self.__load_manifests()
 
     def has_manifest(self, key: str):
         """Check if a manifest file with a specified name exits
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
-from typing import TYPE_CHECKING, List
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, Callable, List, Optional
 
 if TYPE_CHECKING:
     from slashgpt.history.storage.abstract import ChatHistoryAbstractStorage
@@ -9,9 +10,46 @@ if TYPE_CHECKING:
 class ChatHistory:
     def __init__(self, repository: ChatHistoryAbstractStorage):
         self.repository: ChatHistoryAbstractStorage = repository
+        self.__views: Optional[List[dict]] = None
+        """API-shaped messages (see message_dict), maintained incrementally. None if invalidated."""
+        self.__token_counter: Optional[Callable[[dict], int]] = None
+        self.__tokens: Optional[List[int]] = None
+        """Number of tokens of each message in __views. None if invalidated."""
+
+    def invalidate(self):
+        """Discard cached messages. Call it if the repository is modified directly."""
+        self.__views = None
+        self.__tokens = None
+
+    def __cached_views(self):
+        # The length check catches appends/pops made directly to the repository
+        if self.__views is None or len(self.__views) != self.repository.len():
+            self.__views = list(map(self.message_dict, self.repository.messages()))
+            self.__tokens = None
+        return self.__views
+
+    def set_token_counter(self, counter: Optional[Callable[[dict], int]]):
+        """Set the function which counts the tokens of an API-shaped message (e.g, LlmModel.num_message_tokens).
+        Once counted, the token count of each new message is computed when it is appended."""
+        self.__token_counter = counter
+        self.__tokens = None
+
+    def message_tokens(self):
+        """Returns the number of tokens of each message (list of int, parallel to messages()).
+        The list is shared with the cache, and must not be modified."""
+        views = self.__cached_views()
+        if self.__tokens is None:
+            assert self.__token_counter, "ChatHistory: token counter is not set"
+            self.__tokens = list(map(self.__token_counter, views))
+        return self.__tokens
 
     def append_message(self, data: dict):
         self.repository.append(data)
+        if self.__views is not None and len(self.__views) == self.repository.len() - 1:
+            view = self.message_dict(data)
+            self.__views.append(view)
+            if self.__tokens is not None and self.__token_counter:
+                self.__tokens.append(self.__token_counter(view))
 
     def get_message(self, index: int):
         return self.message_dict(self.repository.get(index))
@@ -21,6 +59,10 @@ class ChatHistory:
 
     def set_message(self, index: int, data: dict):
         self.repository.set(index, data)
+        if self.__views is not None and len(self.__views) == self.repository.len():
+            self.__views[index] = self.message_dict(self.repository.get(index))
+            if self.__tokens is not None and self.__token_counter:
+                self.__tokens[index] = self.__token_counter(self.__views[index])
 
     def len_messages(self):
         return self.repository.len()
@@ -29,7 +71,12 @@ class ChatHistory:
         return self.message_dict(self.repository.last())
 
     def pop_message(self):
-        return self.repository.pop()
+        message = self.repository.pop()
+        if self.__views is not None and len(self.__views) == self.repository.len() + 1:
+            self.__views.pop()
+            if self.__tokens is not None:
+                self.__tokens.pop()
+        return message
 
     def message_dict(self, x: dict):
         if x.get("name"):
@@ -37,7 +84,9 @@ class ChatHistory:
         return {"role": x.get("role"), "content": x.get("content")}
 
     def messages(self):
-        return list(map(self.message_dict, self.repository.messages()))
+        """Returns API-shaped messages. The list is a copy, but the dicts are shared
+        with the cache, and must not be modified."""
+        return list(self.__cached_views())
 
     def preset_messages(self):
         return list(map(self.message_dict, self.repository.preset_messages()))
@@ -46,14 +95,30 @@ class ChatHistory:
         return list(map(self.message_dict, self.repository.nonpreset_messages()))
 
     def restore(self, data: List[dict]):
+        self.invalidate()
         return self.repository.restore(data)
 
-    def session_list(self):
-        return self.repository.session_list()
+    def summary(self) -> Optional[dict]:
+        """Returns the summary of old messages ({"content": str, "index": int}), if any"""
+        return self.repository.summary()
+
+    def set_summary(self, summary: Optional[dict]):
+        """Set the summary of the messages before summary["index"] (except the system prompt)"""
+        self.repository.set_summary(summary)
+
+    def session_list(self, offset: int = 0, limit: Optional[int] = None, order_by: str = "created_at", descending: bool = False):
+        """Returns the list of sessions ({id, name, ...}) sorted by order_by (created_at, updated_at, message_count or title)"""
+        return self.repository.session_list(offset, limit, order_by, descending)
 
     def get_session_data(self, id: str):
         return self.repository.get_session_data(id)
 
+    def transaction(self):
+        """Returns a context manager, which writes the changes in the block at once
+        if the repository supports transactions (a no-op otherwise)"""
+        transaction = getattr(self.repository, "transaction", None)
+        return transaction() if transaction else nullcontext()
+
     def md(self, names: dict = {}):
         def to_md(data):
             name = names.get(data["role"]) or data["role"]
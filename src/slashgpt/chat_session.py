@@ -1,17 +1,30 @@
+import asyncio
+import queue
 import random
 import re
+import threading
 import uuid
-from typing import Callable, List, Optional
+from typing import Any, Callable, Iterator, List, Optional, Tuple
 
 from slashgpt.chat_config import ChatConfig
 from slashgpt.chat_history import ChatHistory
+from slashgpt.context_window import ContextWindow
 from slashgpt.dbs.db_base import VectorDBBase
+from slashgpt.embedding_router import EmbeddingRouter
 from slashgpt.function.jupyter_runtime import PythonRuntime
 from slashgpt.history.storage.abstract import ChatHistoryAbstractStorage
 from slashgpt.history.storage.memory import ChatHistoryMemoryStorage
+from slashgpt.history.summarizer import HistorySummarizer, apply_summary
 from slashgpt.llms.model import LlmModel
+from slashgpt.llms.response_cache import ResponseCache
+from slashgpt.llms.semantic_cache import SemanticCache
 from slashgpt.manifest import Manifest
 from slashgpt.utils.print import print_debug, print_error, print_info
+from slashgpt.utils.trace import span, traced
+
+
+class CallLoopStopped(Exception):
+    """Raised in the call loop of call_loop_events when its consumer stopped iterating"""
 
 
 class ChatSession:
@@ -28,6 +41,11 @@ class ChatSession:
         intro: bool = True,
         restore: bool = False,
         memory: Optional[dict] = None,
+        context_window: Optional[ContextWindow] = None,
+        summarizer: Optional[HistorySummarizer] = None,
+        response_cache: Optional[ResponseCache] = None,
+        semantic_cache: Optional[SemanticCache] = None,
+        router: Optional[EmbeddingRouter] = None,
     ):
         """
         Args:
@@ -40,6 +58,16 @@ class ChatSession:
             intro (bool, optional): True if the introduction message should be appended.
             restore (bool, optional): True if we are restoring an existing session.
             memory (dict, optional): The initial value of short term memory
+            context_window (ContextWindow, optional): Limits the messages sent to the LLM
+                (the default is specified by the "context_window" property of the manifest)
+            summarizer (HistorySummarizer, optional): Compacts old messages into a summary
+                (the default is specified by the "summary" property of the manifest)
+            response_cache (ResponseCache, optional): Cache of LLM responses
+                (the default is specified by the "cache" property of the manifest)
+            semantic_cache (SemanticCache, optional): Cache of answers to similar questions
+                (the default is specified by the "semantic_cache" property of the manifest)
+            router (EmbeddingRouter, optional): Local router of the dispatcher, which calls the categorize function
+                without calling the LLM (the default is specified by the "router" property of the manifest)
         """
         self.config: ChatConfig = config
         """Configuration Object (ChatConfig), which specifies accessible LLM models"""
@@ -49,10 +77,19 @@ class ChatSession:
         """Manifest which specifies the behavior of the AI agent (Manifest)"""
         self.user_id: str = user_id if user_id else str(uuid.uuid4())
         """Specified user id or randomly generated uuid (str)"""
-        self.history: ChatHistory = ChatHistory(history_engine or ChatHistoryMemoryStorage(self.user_id, agent_name))
+        self.history: ChatHistory = ChatHistory(history_engine or ChatHistoryMemoryStorage(self.user_id, agent_name, write_behind=True))
         """Chat history (ChatHistory)"""
         self.memory: Optional[dict] = memory
         """Short term memory (dict, optional)"""
+        self.context_window: Optional[ContextWindow] = context_window or ContextWindow.from_manifest(self.manifest)
+        """Context window manager (ContextWindow, optional). All messages are sent if None."""
+        self.response_cache: Optional[ResponseCache] = response_cache or ResponseCache.from_manifest(self.manifest)
+        """Cache of LLM responses (ResponseCache, optional). The LLM is always called if None."""
+        self.semantic_cache: Optional[SemanticCache] = semantic_cache or SemanticCache.from_manifest(self.manifest, config.verbose)
+        """Cache of answers to similar questions (SemanticCache, optional)"""
+        manifests = config.manifests if hasattr(config, "manifests") else {}
+        self.router: Optional[EmbeddingRouter] = router or EmbeddingRouter.from_manifest(self.manifest, manifests, config.verbose)
+        """Local router of the dispatcher (EmbeddingRouter, optional)"""
 
         # Load the model name and make it sure that we have required keys
         if self.manifest.model():
@@ -64,6 +101,9 @@ class ChatSession:
                 llm_model = self.config.get_default_llm_model()
         self.set_llm_model(llm_model)
 
+        self.summarizer: Optional[HistorySummarizer] = summarizer or HistorySummarizer.from_manifest(self.manifest, config, self.llm_model)
+        """Rolling summarizer of old messages (HistorySummarizer, optional)"""
+
         # Load the prompt, fill variables and append it as the system message
         if self.config.verbose and memory is not None:
             print_debug(f"memory = {memory}")
@@ -92,6 +132,8 @@ class ChatSession:
             self.llm_model = llm_model
         else:
             print_error("You need to set " + llm_model.get("api_key") + " to use this model. ")
+        if self.context_window:
+            self.history.set_token_counter(self.llm_model.num_message_tokens)
         if self.config.verbose:
             print_debug(f"Model = {self.llm_model.name()}")
 
@@ -111,13 +153,16 @@ class ChatSession:
         """
         self.history.append_message({"role": role, "content": message, "name": name, "preset": preset})
 
+    @traced("append_user_question")
     def append_user_question(self, message: str):
         """Append a question from the user to the history
         and update the prompt if necessary (e.g, RAG)"""
-        message = self.manifest.format_question(message)
+        with span("format_question"):
+            message = self.manifest.format_question(message)
         self.append_message("user", message, False)
         if self.vector_db:
-            articles = self.vector_db.fetch_related_articles(self.history.messages(), self.llm_model)
+            with span("rag"):
+                articles = self.vector_db.fetch_related_articles(self.history.messages(), self.llm_model)
             assert self.history.get_message_prop(0, "role") == "system", "Missing system message"
             self.history.set_message(
                 0,
@@ -155,39 +200,121 @@ class ChatSession:
         """Title of the AI agent specified in the manifest"""
         return self.manifest.title()
 
-    def call_llm(self):
+    def call_llm(self, callback: Optional[Callable[[str], None]] = None):
         """
         Let the LLM generate a responce based on the messasges in this session.
         The application typically calls call_loop method instead.
 
+        Args:
+
+            callback (function, optional): called with each delta of the response
+                if the manifest enables streaming
+
         Returns:
 
             role (str): "assistent"
             res (str): message
             function_call (dict): json representing the function call (optional)
         """
-        messages = self.history.messages()
-        (role, res, function_call, token_usage) = self.llm_model.generate_response(messages, self.manifest, self.config.verbose)
-
+        with span("call_llm", model=self.llm_model.name()) as current:
+            with span("prompt"):
+                messages = self.__prompt_messages()
+            response = self.router.route(messages, self.manifest, self.config.verbose) if self.router else None
+            if response is None:
+                with span("llm", messages=len(messages), **self.__llm_attributes()):
+                    response = self.__generate_response(messages, callback)
+            (role, res, function_call, token_usage) = response
+            if current:
+                current.set_attribute("token_usage", token_usage)
+            return self.__process_response(role, res, function_call, token_usage)
+
+    async def call_llm_async(self):
+        """
+        Async version of call_llm, which does not block the event loop while the LLM generates the response
+        (streaming is not supported).
+        """
+        with span("call_llm", model=self.llm_model.name()) as current:
+            with span("prompt"):
+                messages = self.__prompt_messages()
+            response = await asyncio.to_thread(self.router.route, messages, self.manifest, self.config.verbose) if self.router else None
+            if response is None:
+                with span("llm", messages=len(messages), **self.__llm_attributes()):
+                    response = await self.__generate_response_async(messages)
+            (role, res, function_call, token_usage) = response
+            if current:
+                current.set_attribute("token_usage", token_usage)
+            return self.__process_response(role, res, function_call, token_usage)
+
+    def __generate_response(self, messages: List[dict], callback: Optional[Callable[[str], None]]):
+        """Returns the response from the caches (semantic, then exact-match) or the LLM"""
+
+        def generate():
+            if self.response_cache:
+                return self.response_cache.generate_response(self.llm_model, messages, self.manifest, self.config.verbose, callback)
+            return self.llm_model.generate_response(messages, self.manifest, self.config.verbose, callback)
+
+        if self.semantic_cache:
+            return self.semantic_cache.generate_response(self.agent_name, messages, self.manifest, self.config.verbose, callback, generate)
+        return generate()
+
+    async def __generate_response_async(self, messages: List[dict]):
+        async def generate():
+            if self.response_cache:
+                return await self.response_cache.generate_response_async(self.llm_model, messages, self.manifest, self.config.verbose)
+            return await self.llm_model.generate_response_async(messages, self.manifest, self.config.verbose)
+
+        if self.semantic_cache:
+            return await self.semantic_cache.generate_response_async(self.agent_name, messages, self.manifest, self.config.verbose, generate)
+        return await generate()
+
+    def __process_response(self, role: str, res: Optional[str], function_call, token_usage):
         if self.config.verbose and function_call is not None:
             print_info(function_call)
 
         if role and res:
             self.append_message(role, res, False)
 
+        if self.summarizer:
+            self.summarizer.schedule(self.history)
+
         return (res, function_call, token_usage)
 
-    def call_loop(self, callback: Callable[[str, tuple[str, dict]], None], runtime: PythonRuntime = None):
+    def __llm_attributes(self):
+        """Attributes of the llm span, which are the labels of the metrics (slashgpt.utils.metrics)"""
+        return {"agent": self.agent_name, "model": self.llm_model.name(), "engine": self.llm_model.engine_name()}
+
+    def __prompt_messages(self):
+        summary = None
+        if self.summarizer:
+            self.update_summary()
+            summary = self.history.summary()
+        if self.context_window:
+            return self.context_window.messages(self.history, self.llm_model, self.manifest, self.config.verbose, summary)
+        return apply_summary(self.history.messages(), summary)
+
+    def update_summary(self, wait: bool = False):
+        """Apply the summary generated in the background to the history (and its storage).
+        The summary is applied before each call automatically. Call it with wait=True to persist
+        the pending summary before the session is discarded (e.g, at the end of a request)."""
+        if self.summarizer:
+            self.summarizer.apply(self.history, wait)
+
+    @traced("call_loop")
+    def call_loop(self, callback: Callable[[str, Any], None], runtime: PythonRuntime = None):
         """
         Calls the LLM and process the response (functions calls).
         It may call itself recursively if ncessary.
+        If the manifest enables streaming, "bot_delta" events are sent while
+        the response arrives, followed by the "bot" event with the whole response.
+        A "function_call" event (FunctionCall) is sent before the function is processed.
         """
-        (res, function_call, _) = self.call_llm()
+        (res, function_call, _) = self.call_llm(lambda delta: callback("bot_delta", delta))
 
         if res:
             callback("bot", res)
 
         if function_call:
+            callback("function_call", function_call)
             # Check if this function needs to be processed by the application (emit style)
             (action_data, action_method) = function_call.get_emit_data(self.config.verbose)
             if action_method:
@@ -209,3 +336,75 @@ class ChatSession:
 
                 if should_call_llm:
                     self.call_loop(callback, runtime)
+
+    async def call_loop_async(self, callback: Callable[[str, Any], None], runtime: PythonRuntime = None):
+        """
+        Async version of call_loop. The LLM and REST function calls are awaited,
+        and Python functions run in a worker thread.
+        """
+        with span("call_loop"):
+            await self.__call_loop_async(callback, runtime)
+
+    async def __call_loop_async(self, callback: Callable[[str, Any], None], runtime: PythonRuntime = None):
+        while True:
+            (res, function_call, _) = await self.call_llm_async()
+
+            if res:
+                callback("bot", res)
+
+            if not function_call:
+                return
+            callback("function_call", function_call)
+            (action_data, action_method) = function_call.get_emit_data(self.config.verbose)
+            if action_method:
+                callback("emit", (action_method, action_data))
+                return
+            (function_message, function_name, should_call_llm) = await function_call.process_function_call_async(
+                self.history,
+                runtime,
+                self.config.verbose,
+            )
+            if function_message:
+                callback("function", (function_name, function_message))
+            if not should_call_llm:
+                return
+
+    def call_loop_events(self, runtime: PythonRuntime = None) -> Iterator[Tuple[str, Any]]:
+        """
+        Runs call_loop in a background thread, and yields (event, data) as they are sent,
+        which enables streaming the response to a client (e.g, Server-Sent Events).
+        An exception raised in the loop is sent as the "error" event.
+        If the generator is closed before the end (e.g, the client disconnected), the loop is stopped at its next event,
+        and the generator returns after the thread finishes, so that the session can be reused safely.
+        """
+        events: queue.Queue = queue.Queue()
+        done = object()
+        stopped = threading.Event()
+
+        def callback(callback_type: str, data):
+            if stopped.is_set():
+                raise CallLoopStopped()
+            events.put((callback_type, data))
+
+        def run():
+            try:
+                with self.history.transaction():
+                    self.call_loop(callback, runtime)
+            except CallLoopStopped:
+                pass
+            except Exception as e:
+                events.put(("error", e))
+            finally:
+                events.put(done)
+
+        thread = threading.Thread(target=run, name="slashgpt-call-loop", daemon=True)
+        thread.start()
+        try:
+            while True:
+                event = events.get()
+                if event is done:
+                    return
+                yield event
+        finally:
+            stopped.set()
+            thread.join()
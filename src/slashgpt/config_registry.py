@@ -0,0 +1,95 @@
+import os
+import threading
+import time
+from typing import Dict, Optional
+
+from slashgpt.chat_config_with_manifests import ChatConfigWithManifests
+from slashgpt.manifest_watcher import ManifestWatcher
+
+
+class ConfigRegistry:
+    """
+    Process-wide cache of ChatConfigWithManifests keyed by the manifests folder (e.g, for servers).
+    A cached config is reloaded when a manifest file in the folder is added, removed or modified.
+    In the watch mode, each config is updated in place by a ManifestWatcher instead.
+    """
+
+    def __init__(
+        self,
+        base_path: str,
+        llm_models: Optional[dict] = None,
+        llm_engine_configs: Optional[dict] = None,
+        check_interval: float = 1.0,
+        watch: bool = False,
+    ):
+        """
+        Args:
+
+            base_path (str): path to the "base" folder.
+            llm_models (dict, optional): collection of custom LLM model definitions
+            llm_engine_configs (dict, optional): collection of custom LLM engine definitions
+            check_interval (float, optional): Minimum interval in seconds between checks of the manifest files
+                (0 to check them on every call), or between polls of the watchers
+            watch (bool, optional): True if configs should be updated in place by watchers (only added or modified
+                manifests are parsed again, and modified function definitions and modules are applied to live sessions)
+        """
+        self.base_path = base_path
+        self.llm_models = llm_models
+        self.llm_engine_configs = llm_engine_configs
+        self.check_interval = check_interval
+        self.watch = watch
+        self.__entries: dict = {}  # path_manifests -> (config, signature, checked_at)
+        self.__watchers: Dict[str, ManifestWatcher] = {}  # path_manifests -> watcher (watch mode)
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def signature(cls, path_manifests: str):
+        """Returns the signature of the manifest files in the folder (names, mtimes and sizes)"""
+        signature = []
+        with os.scandir(path_manifests) as entries:
+            for entry in entries:
+                if entry.name.endswith(".json") or entry.name.endswith(".yml"):
+                    stat = entry.stat()
+                    signature.append((entry.name, stat.st_mtime_ns, stat.st_size))
+        return tuple(sorted(signature))
+
+    def get(self, path_manifests: str) -> ChatConfigWithManifests:
+        """Returns the config of the manifests folder, which is loaded only if it is new or modified"""
+        if self.watch:
+            return self.__watched(path_manifests)
+        now = time.monotonic()
+        entry = self.__entries.get(path_manifests)
+        if entry and now - entry[2] < self.check_interval:
+            return entry[0]
+        signature = self.signature(path_manifests)
+        with self.__lock:
+            entry = self.__entries.get(path_manifests)
+            if entry and entry[1] == signature:
+                config = entry[0]
+            else:
+                config = ChatConfigWithManifests(self.base_path, path_manifests, self.llm_models, self.llm_engine_configs)
+            self.__entries[path_manifests] = (config, signature, now)
+            return config
+
+    def __watched(self, path_manifests: str) -> ChatConfigWithManifests:
+        watcher = self.__watchers.get(path_manifests)
+        if watcher is None:
+            with self.__lock:
+                watcher = self.__watchers.get(path_manifests)
+                if watcher is None:
+                    config = ChatConfigWithManifests(self.base_path, path_manifests, self.llm_models, self.llm_engine_configs)
+                    watcher = self.__watchers[path_manifests] = ManifestWatcher(config, self.check_interval or 1.0).start()
+        return watcher.config
+
+    def invalidate(self, path_manifests: Optional[str] = None):
+        """Discard the cached config of the folder (all configs if not specified)"""
+        with self.__lock:
+            if path_manifests is None:
+                self.__entries.clear()
+                watchers = list(self.__watchers.values())
+                self.__watchers.clear()
+            else:
+                self.__entries.pop(path_manifests, None)
+                watchers = [watcher for watcher in [self.__watchers.pop(path_manifests, None)] if watcher]
+        for watcher in watchers:
+            watcher.stop()
@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+from abc import ABCMeta, abstractmethod
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional, Union
+
+from slashgpt.history.summarizer import summary_message, summary_range
+from slashgpt.utils.print import print_debug, print_warning
+
+if TYPE_CHECKING:
+    from slashgpt.chat_history import ChatHistory
+    from slashgpt.llms.model import LlmModel
+    from slashgpt.manifest import Manifest
+
+
+class ContextPolicy(metaclass=ABCMeta):
+    """It decides which messages are sent to the LLM when the history does not fit the budget."""
+
+    @abstractmethod
+    def select(self, messages: List[dict], tokens: List[int], presets: List[bool], budget: int) -> List[int]:
+        """Returns the indices of messages to be sent (in ascending order)
+
+        Args:
+
+            messages (list of dict): API-shaped messages
+            tokens (list of int): number of tokens of each message
+            presets (list of bool): True if the message is preset by the manifest
+            budget (int): maximum number of tokens
+        """
+        pass
+
+    def _pinned(self, messages: List[dict]):
+        """The system prompt (and the summary following it) is always sent"""
+        pinned: List[int] = []
+        while len(pinned) < len(messages) - 1 and messages[len(pinned)].get("role") == "system":
+            pinned.append(len(pinned))
+        return pinned
+
+    def _sliding(self, indices: List[int], pinned: List[int], tokens: List[int], budget: int):
+        """Keeps the pinned messages and the newest messages of the others, which fit the budget.
+        The last message (typically the question) is always kept."""
+        used = sum(tokens[i] for i in pinned)
+        kept: List[int] = []
+        pinned_set = set(pinned)
+        for i in reversed(indices):
+            if i in pinned_set:
+                continue
+            if kept and used + tokens[i] > budget:
+                break
+            used += tokens[i]
+            kept.append(i)
+        return sorted(pinned + kept)
+
+
+class SlidingWindowPolicy(ContextPolicy):
+    """The system prompt and the newest messages"""
+
+    def select(self, messages: List[dict], tokens: List[int], presets: List[bool], budget: int) -> List[int]:
+        pinned = self._pinned(messages)
+        return self._sliding(list(range(len(messages))), pinned, tokens, budget)
+
+
+class KeepPresetsPolicy(ContextPolicy):
+    """The system prompt, preset messages (e.g, intro and examples) and the newest messages"""
+
+    def select(self, messages: List[dict], tokens: List[int], presets: List[bool], budget: int) -> List[int]:
+        pinned = sorted(set(self._pinned(messages) + [i for i in range(len(messages) - 1) if presets[i]]))
+        return self._sliding(list(range(len(messages))), pinned, tokens, budget)
+
+
+class DropFunctionResultsPolicy(ContextPolicy):
+    """Drops function results from the oldest first, then falls back to the sliding window"""
+
+    def select(self, messages: List[dict], tokens: List[int], presets: List[bool], budget: int) -> List[int]:
+        indices = list(range(len(messages)))
+        used = sum(tokens)
+        if used > budget:
+            dropped = set()
+            for i in indices[:-1]:
+                if used <= budget:
+                    break
+                if messages[i].get("role") == "function":
+                    dropped.add(i)
+                    used -= tokens[i]
+            indices = [i for i in indices if i not in dropped]
+        if used <= budget:
+            return indices
+        pinned = self._pinned(messages)
+        return self._sliding(indices, pinned, tokens, budget)
+
+
+context_policies: Dict[str, Callable[[], ContextPolicy]] = {
+    "sliding_window": SlidingWindowPolicy,
+    "keep_presets": KeepPresetsPolicy,
+    "drop_function_results": DropFunctionResultsPolicy,
+}
+"""Available policies (the value of "policy" in the "context_window" property of manifests)"""
+
+
+class ContextWindow:
+    """It selects the messages to be sent to the LLM within the token budget,
+    using the token count of each message maintained by ChatHistory."""
+
+    def __init__(self, policy: Union[str, ContextPolicy] = "sliding_window", max_tokens: Optional[int] = None, reserve: int = 500):
+        """
+        Args:
+
+            policy (str or ContextPolicy, optional): Name of the policy (see context_policies) or a policy object
+            max_tokens (int, optional): Maximum number of prompt tokens (the default is the limit of the model)
+            reserve (int, optional): Number of tokens reserved for the response
+        """
+        if isinstance(policy, str):
+            factory = context_policies.get(policy)
+            if factory is None:
+                print_warning(f"Unknown context window policy: {policy}")
+                factory = SlidingWindowPolicy
+            policy = factory()
+        self.policy: ContextPolicy = policy
+        self.max_tokens = max_tokens
+        self.reserve = reserve
+
+    @classmethod
+    def from_manifest(cls, manifest: Manifest) -> Optional[ContextWindow]:
+        """Returns the context window specified by the "context_window" property of the manifest (optional)"""
+        value = manifest.context_window()
+        if not value:
+            return None
+        if isinstance(value, str):
+            return cls(value)
+        if isinstance(value, dict):
+            return cls(value.get("policy", "sliding_window"), value.get("max_tokens"), value.get("reserve", 500))
+        return cls()
+
+    def budget(self, llm_model: LlmModel, manifest: Manifest):
+        """Returns the number of tokens available for messages"""
+        budget = llm_model.max_token() - self.reserve
+        if self.max_tokens:
+            budget = min(budget, self.max_tokens)
+        functions = manifest.functions()
+        if functions:
+            budget -= llm_model.num_tokens(json.dumps(functions))
+        return budget
+
+    def messages(self, history: ChatHistory, llm_model: LlmModel, manifest: Manifest, verbose: bool = False, summary: Optional[dict] = None):
+        """Returns the messages to be sent to the LLM (list of dict)
+
+        Args:
+
+            history (ChatHistory): The chat history
+            llm_model (LlmModel): The LLM model to be called
+            manifest (Manifest): The manifest of the session
+            verbose (bool, optional): True if it's in verbose mode.
+            summary (dict, optional): The summary which replaces old messages (see HistorySummarizer)
+        """
+        messages = history.messages()
+        tokens = history.message_tokens()
+        presets = None
+        if summary:
+            (head, start) = summary_range(messages, summary)
+            message = summary_message(summary)
+            messages = messages[:head] + [message] + messages[start:]
+            tokens = tokens[:head] + [llm_model.num_message_tokens(message)] + tokens[start:]
+            presets = [True] * (head + 1) + [bool(m.get("preset")) for m in history.repository.messages()[start:]]
+        budget = self.budget(llm_model, manifest)
+        if sum(tokens) <= budget:
+            return messages
+        if presets is None:
+            presets = [bool(message.get("preset")) for message in history.repository.messages()]
+        indices = self.policy.select(messages, tokens, presets, budget)
+        used = sum(tokens[i] for i in indices)
+        if used > budget:
+            # The pinned messages and the last message are sent even if they exceed the budget
+            print_warning(f"context window: {used} tokens exceed the budget ({budget})")
+        elif verbose:
+            print_debug(f"context window: {len(indices)}/{len(messages)} messages, {used} tokens (budget={budget})")
+        return [messages[i] for i in indices]
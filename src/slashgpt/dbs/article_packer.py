@@ -0,0 +1,49 @@
+from typing import List, Tuple
+
+from slashgpt.llms.model import LlmModel
+
+ARTICLE_SEPARATOR = '\n"""'
+
+
+class ArticlePacker:
+    """It packs articles (search results) into the token budget of the prompt.
+    The context (query and messages) and each article are tokenized only once."""
+
+    def __init__(self, policy: str = "greedy", reserve: int = 500):
+        """
+        Args:
+
+            policy (str, optional): "greedy" (packs articles in the order of relevance and stops at the first one which
+                does not fit) or "first_fit" (skips articles which do not fit, and tries the following ones)
+            reserve (int, optional): Number of tokens reserved for the response
+        """
+        if policy not in ("greedy", "first_fit"):
+            raise ValueError(f"ArticlePacker: invalid policy {policy}")
+        self.policy = policy
+        self.reserve = reserve
+        self.stats: dict = {}
+        """Statistics of the last pack (considered, packed, tokens and budget)"""
+
+    def pack(self, articles: List[str], context: str, llm_model: LlmModel) -> Tuple[str, dict]:
+        """Returns (packed articles, statistics)
+
+        Args:
+
+            articles (list of str): Articles sorted by relevance
+            context (str): The rest of the prompt (e.g, the query and messages)
+            llm_model (LlmModel): The LLM model which counts tokens
+        """
+        budget = llm_model.max_token() - self.reserve
+        sections = [article + ARTICLE_SEPARATOR for article in articles]
+        used = llm_model.num_tokens(context)
+        packed: List[str] = []
+        considered = 0
+        for section, tokens in zip(sections, llm_model.num_tokens_many(sections)):
+            considered += 1
+            if used + tokens <= budget:
+                used += tokens
+                packed.append(section)
+            elif self.policy == "greedy":
+                break
+        self.stats = {"considered": considered, "packed": len(packed), "tokens": used, "budget": budget}
+        return ("".join(packed), self.stats)
@@ -3,6 +3,7 @@ from typing import List
 
 from slashgpt.dbs.vector_engine import VectorEngine
 from slashgpt.llms.model import LlmModel
+from slashgpt.utils.trace import span
 
 
 class VectorDBBase(metaclass=ABCMeta):
@@ -20,9 +21,12 @@ class VectorDBBase(metaclass=ABCMeta):
     def fetch_related_articles(self, messages: List[dict], llm_model: LlmModel) -> str:
         """Return related articles with the question using the embedding vector search."""
         query = self.messages_to_query(messages)
-        query_embedding = self.query_to_vector(query)
-        results = self.fetch_data(query_embedding)
-        return self.results_to_articles(results, query, messages, llm_model)
+        with span("embedding"):
+            query_embedding = self.query_to_vector(query)
+        with span("vector_query"):
+            results = self.fetch_data(query_embedding)
+        with span("article_packing", results=len(results)):
+            return self.results_to_articles(results, query, messages, llm_model)
 
     def messages_to_query(self, messages: List[dict]) -> str:
         query = ""
@@ -3,6 +3,7 @@ from typing import List
 
 import openai
 
+from slashgpt.dbs.article_packer import ArticlePacker
 from slashgpt.dbs.vector_engine import VectorEngine
 from slashgpt.llms.model import LlmModel
 from slashgpt.utils.print import print_debug
@@ -12,6 +13,8 @@ class VectorEngineOpenAI(VectorEngine):
     def __init__(self, verbose: bool):
         self.__EMBEDDING_MODEL = os.getenv("PINECONE_EMBEDDING_MODEL", "text-embedding-ada-002")
         self.__verbose = verbose
+        self.packer = ArticlePacker()
+        """Packs the search results into the prompt (ArticlePacker). stats holds the statistics of the last query."""
 
     def query_to_vector(self, query: str) -> List[float]:
         query_embedding_response = openai.embeddings.create(
@@ -21,18 +24,9 @@ class VectorEngineOpenAI(VectorEngine):
         return query_embedding_response.data[0].embedding
 
     def results_to_articles(self, results: List[str], query: str, messages: List[dict], llm_model: LlmModel) -> str:
-        articles = ""
-        count = 0
-        message = self.__join_messages(messages)
-        for article in results:
-            article_with_section = f'{article}\n"""'
-            if llm_model.is_within_budget(articles + article_with_section + query + message, self.__verbose):
-                count += 1
-                articles += article_with_section
-            else:
-                break
+        (articles, stats) = self.packer.pack(results, query + self.__join_messages(messages), llm_model)
         if self.__verbose:
-            print_debug(f"Articles:{count}")
+            print_debug(f"Articles:{stats['packed']}/{stats['considered']} tokens:{stats['tokens']}/{stats['budget']}")
         return articles
 
     def __join_messages(self, messages: List[dict]) -> str:
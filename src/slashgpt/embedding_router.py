@@ -0,0 +1,176 @@
+from __future__ import annotations
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Dict, List, Optional, Tuple
+
+from slashgpt.dbs.vector_engine import VectorEngine
+from slashgpt.function.function_call import FunctionCall
+from slashgpt.llms import semantic_cache
+from slashgpt.llms.semantic_cache import normalize
+from slashgpt.utils.print import print_debug, print_warning
+from slashgpt.utils.trace import span
+
+if TYPE_CHECKING:
+    from slashgpt.manifest import Manifest
+
+_routers: Dict[tuple, "EmbeddingRouter"] = {}  # (settings, agents) -> router shared by sessions
+_lock = threading.Lock()
+
+
+def _dot(a, b) -> float:
+    if semantic_cache.isLoadedNumpy:
+        return float(a @ b)
+    return sum(x * y for x, y in zip(a, b))
+
+
+class EmbeddingRouter:
+    """
+    Local router of dispatcher agents (manifests with "agents" and the categorize function), which classifies
+    the question from the user by the nearest centroid of the embeddings of each agent's description and samples,
+    and calls the categorize function without calling the LLM. The LLM is called if the classification is not confident.
+    It is enabled by the "router" property of the manifest (true or a dict):
+
+        engine_type (str, optional): Vector engine, which embeds questions and agents ("openai" by default)
+        threshold (float, optional): Minimum cosine similarity to the centroid of the agent (0.8 by default)
+        margin (float, optional): Minimum difference of the similarities of the best and the second best agents (0.03 by default)
+        function (str, optional): Name of the function, which has "question" and "category" parameters ("categorize" by default)
+
+    Centroids are computed in the background when the router is created (the texts are embedded concurrently),
+    and shared by sessions with the same settings and agents. If the vector engine fails, the LLM is called.
+    """
+
+    MAX_WORKERS = 8
+    """Maximum number of concurrent embedding requests while computing centroids"""
+
+    def __init__(
+        self, vector_engine: VectorEngine, agents: Dict[str, List[str]], threshold: float = 0.8, margin: float = 0.03, function: str = "categorize"
+    ):
+        """
+        Args:
+
+            vector_engine (VectorEngine): It embeds questions and agents (query_to_vector)
+            agents (dict): Texts (e.g, the description and samples) of each agent
+            threshold (float, optional): Minimum cosine similarity to the centroid of the agent
+            margin (float, optional): Minimum difference of the similarities of the best and the second best agents
+            function (str, optional): Name of the function to call
+        """
+        self.vector_engine = vector_engine
+        self.agents = agents
+        self.threshold = threshold
+        self.margin = margin
+        self.function = function
+        self.stats = {"routed": 0, "fallbacks": 0}
+        """Statistics (routed questions and fallbacks to the LLM)"""
+        self.__centroids: Optional[List[Tuple[str, object]]] = None
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def from_manifest(cls, manifest: Manifest, manifests: dict, verbose: bool = False) -> Optional[EmbeddingRouter]:
+        """Returns the (shared) router specified by the "router" property of the dispatcher manifest (optional)
+
+        Args:
+
+            manifest (Manifest): The manifest of the dispatcher (with "agents")
+            manifests (dict): Manifests of the agents (ChatConfigWithManifests.manifests)
+            verbose (bool, optional): True if it's in verbose mode.
+        """
+        value = manifest.router()
+        if not value or not manifest.get("agents"):
+            return None
+        if not isinstance(value, dict):
+            value = {}
+        agents = {agent: cls.agent_texts(manifests[agent]) for agent in manifest.get("agents") if manifests.get(agent) is not None}
+        settings = (
+            value.get("engine_type") or "openai",
+            value.get("threshold") or 0.8,
+            value.get("margin") or 0.03,
+            value.get("function") or "categorize",
+        )
+        key = (settings, json.dumps(agents, sort_keys=True, ensure_ascii=False))
+        with _lock:
+            router = _routers.get(key)
+            if router is None:
+                engine = semantic_cache.vector_engines.get(settings[0])
+                if engine is None:
+                    print_warning(f"router: unknown engine_type {settings[0]}")
+                    return None
+                router = _routers[key] = cls(engine(verbose), agents, *settings[1:])
+                router.prepare()
+        return router
+
+    @classmethod
+    def agent_texts(cls, manifest: dict) -> List[str]:
+        """Returns the texts which represent the agent (the description or the title, and sample questions)"""
+        texts = [manifest.get("description") or manifest.get("title") or ""]
+        texts += [value for key, value in manifest.items() if key.startswith("sample") and isinstance(value, str)]
+        return [text for text in texts if text.strip()]
+
+    def prepare(self):
+        """Computes the centroids in a background thread (otherwise they are computed on the first question)"""
+        threading.Thread(target=self.__prepare, name="slashgpt-router", daemon=True).start()
+
+    def __prepare(self):
+        try:
+            self.centroids()
+        except Exception as e:
+            print_warning(f"router: failed to compute centroids: {e}")
+
+    def centroids(self) -> List[Tuple[str, object]]:
+        """Returns the normalized centroid of the embeddings of each agent (computed on the first call)"""
+        with self.__lock:
+            if self.__centroids is None:
+                centroids = []
+                with span("router.centroids", agents=len(self.agents)):
+                    texts = [text for texts in self.agents.values() for text in texts]
+                    with ThreadPoolExecutor(max_workers=max(1, min(self.MAX_WORKERS, len(texts))), thread_name_prefix="slashgpt-router") as executor:
+                        embedded = dict(zip(texts, executor.map(self.vector_engine.query_to_vector, texts)))
+                    for agent, texts in self.agents.items():
+                        vectors = [normalize(embedded[text]) for text in texts]
+                        if vectors:
+                            centroids.append((agent, normalize([sum(values) for values in zip(*vectors)])))
+                        else:
+                            print_warning(f"router: no description or samples of {agent}")
+                self.__centroids = centroids
+            return self.__centroids
+
+    def classify(self, question: str) -> Tuple[Optional[str], float]:
+        """Returns the agent and the similarity if the classification is confident, or (None, similarity of the best agent)"""
+        centroids = self.centroids()
+        with span("embedding"):
+            vector = normalize(self.vector_engine.query_to_vector(question))
+        scores = sorted(((_dot(centroid, vector), agent) for agent, centroid in centroids), reverse=True)
+        if not scores:
+            return (None, 0.0)
+        (best, agent) = scores[0]
+        second = scores[1][0] if len(scores) > 1 else -1.0
+        if best >= self.threshold and best - second >= self.margin:
+            return (agent, best)
+        return (None, best)
+
+    def route(self, messages: List[dict], manifest: Manifest, verbose: bool = False):
+        """Returns the response (role, res, function_call, token_usage) with the call of the function,
+        or None if the last message is not a question or the classification is not confident."""
+        last = messages[-1] if messages else {}
+        question = last.get("content")
+        if last.get("role") != "user" or not question:
+            return None
+        with span("route") as current:
+            try:
+                (agent, similarity) = self.classify(question)
+            except Exception as e:
+                # e.g, a network error or a missing key of the vector engine
+                print_warning(f"router: {e}")
+                (agent, similarity) = (None, 0.0)
+            if current:
+                current.set_attribute("agent", agent)
+                current.set_attribute("similarity", round(similarity, 4))
+        with self.__lock:
+            self.stats["routed" if agent else "fallbacks"] += 1
+        if verbose:
+            print_debug(f"router: {agent or 'fallback to the LLM'} (similarity={similarity:.3f})")
+        if agent is None:
+            return None
+        arguments = json.dumps({"question": question, "category": agent}, ensure_ascii=False)
+        return (None, None, FunctionCall({"name": self.function, "arguments": arguments}, manifest), 0)
@@ -1,9 +1,11 @@
+import asyncio
 import json
 import os
 import re
+from typing import Optional
 from urllib.parse import quote_plus, urlparse
 
-from slashgpt.function.network import graphQLRequest, http_request, isLoadedGQL
+from slashgpt.function.network import graphQLRequest, http_request, http_request_async, isLoadedGQL
 from slashgpt.utils.print import print_debug, print_error, print_function
 from slashgpt.utils.utils import CallType
 
@@ -99,9 +101,32 @@ class FunctionAction:
 
         return "Success"
 
+    async def call_api_async(self, name: str, arguments: dict, base_dir: str, verbose: bool):
+        """Async version of call_api. REST calls use the async HTTP client,
+        and GraphQL calls run in a worker thread."""
+        type = self.__call_type()
+        if type == CallType.REST:
+            appkey_value = self.__get_appkey_value() or ""
+
+            return await http_request_async(
+                self.__get("url"),
+                self.__get("method"),
+                self.__function_action_data.get("headers", {}),
+                appkey_value,
+                arguments,
+                verbose,
+            )
+        if type == CallType.GRAPHQL:
+            return await asyncio.to_thread(self.call_api, name, arguments, base_dir, verbose)
+        return self.call_api(name, arguments, base_dir, verbose)
+
     def __call_type(self):
         return CallType.withKey(self.__get("type"))
 
+    def call_type(self) -> Optional[CallType]:
+        """Returns the type of the action (CallType), or None if it is not specified"""
+        return self.__call_type() if self.__get("type") else None
+
     def __read_dataURL_template(
         self, base_dir: str, template_file_name: str, mime_type: str, message_template: str, arguments: dict, verbose: bool
     ) -> str:
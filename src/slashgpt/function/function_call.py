@@ -1,5 +1,6 @@
 from __future__ import annotations
 
+import asyncio
 import json
 from typing import TYPE_CHECKING, Optional, Union
 
@@ -7,6 +8,7 @@ from slashgpt.chat_history import ChatHistory
 from slashgpt.function.function_action import FunctionAction
 from slashgpt.function.jupyter_runtime import PythonRuntime
 from slashgpt.utils.print import print_error, print_warning
+from slashgpt.utils.trace import span
 
 if TYPE_CHECKING:
     from slashgpt.manifest import Manifest
@@ -33,9 +35,20 @@ class FunctionCall:
         """returns a dictionary with name and arguments"""
         return self.__function_call_data
 
+    def to_dict(self):
+        """returns a JSON serializable dictionary with name and (parsed) arguments"""
+        return {"name": self.__name(), "arguments": self.__arguments(False)}
+
     def __name(self):
         return self.__get("name")
 
+    def __call_type(self):
+        """Returns the type of the call (e.g, "rest" or "python" for the function in the module), which is the label of the metrics"""
+        if self.function_action:
+            call_type = self.function_action.call_type()
+            return call_type.name.lower() if call_type else "unknown"
+        return "python"
+
     def get_emit_data(self, verbose: bool = False):
         """Get data to emit if it exists"""
         if self.function_action and self.function_action.has_emit():
@@ -82,33 +95,57 @@ class FunctionCall:
 
         arguments = self.__function_arguments(history.last_message(), verbose)
 
-        # Check if the action is specified in the manifest
-        if self.function_action:
-            # Yes, process it accordingly.
-            function_message = self.function_action.call_api(function_name, arguments, self.__manifest.base_dir, verbose)
-        else:
-            # No. Get the specified python function and execute it.
-            function = self.get_function(runtime, function_name)
-            if function:
-                # NOTE: This is a pure debug purpose code
-                if arguments.get("code"):
-                    if isinstance(arguments["code"], list):
-                        print("\n".join(arguments["code"]))
-                    else:
-                        print(arguments["code"])
-                if isinstance(arguments, str):
-                    (result, message) = function(arguments)
-                else:
-                    (result, message) = function(**arguments)
+        with span("function_call", function=function_name, type=self.__call_type()):
+            # Check if the action is specified in the manifest
+            if self.function_action:
+                # Yes, process it accordingly.
+                function_message = self.function_action.call_api(function_name, arguments, self.__manifest.base_dir, verbose)
+            else:
+                # No. Get the specified python function and execute it.
+                function_message = self.__call_python_function(history, runtime, function_name, arguments)
+
+        return self.__process_result(history, function_name, function_message)
+
+    async def process_function_call_async(self, history: ChatHistory, runtime: PythonRuntime = None, verbose: bool = False):
+        """Async version of process_function_call. REST actions use the async HTTP client,
+        and Python functions run in a worker thread."""
+        function_name = self.__name()
+        if function_name is None:
+            return (None, None, False)
+
+        arguments = self.__function_arguments(history.last_message(), verbose)
+
+        with span("function_call", function=function_name, type=self.__call_type()):
+            if self.function_action:
+                function_message = await self.function_action.call_api_async(function_name, arguments, self.__manifest.base_dir, verbose)
+            else:
+                function_message = await asyncio.to_thread(self.__call_python_function, history, runtime, function_name, arguments)
+
+        return self.__process_result(history, function_name, function_message)
 
-                if message:
-                    # Embed code for the history
-                    history.append_message({"role": "assistant", "content": message})
-                function_message = self.__format_python_result(result)
+    def __call_python_function(self, history: ChatHistory, runtime: PythonRuntime, function_name: str, arguments):
+        function = self.get_function(runtime, function_name)
+        if function:
+            # NOTE: This is a pure debug purpose code
+            if arguments.get("code"):
+                if isinstance(arguments["code"], list):
+                    print("\n".join(arguments["code"]))
+                else:
+                    print(arguments["code"])
+            if isinstance(arguments, str):
+                (result, message) = function(arguments)
             else:
-                function_message = None
-                print_error(f"No execution for function {function_name}")
+                (result, message) = function(**arguments)
+
+            if message:
+                # Embed code for the history
+                history.append_message({"role": "assistant", "content": message})
+            return self.__format_python_result(result)
+        else:
+            print_error(f"No execution for function {function_name}")
+            return None
 
+    def __process_result(self, history: ChatHistory, function_name: str, function_message: Optional[str]):
         if function_message:
             history.append_message({"role": "function", "content": function_message, "name": function_name})
 
@@ -13,6 +13,7 @@ except ImportError:
     print("no gql. pip install gql")
     isLoadedGQL = False
 
+from slashgpt.utils.http_client import async_http_client
 from slashgpt.utils.print import print_debug, print_error
 
 
@@ -53,25 +54,40 @@ def graphQLRequest(url: str, headers: dict, appkey_value: str, arguments: dict,
         return str(e)
 
 
-def http_request(url: str, method: str, headers: dict, appkey_value: str, arguments: dict, verbose: bool):
+def __http_request_params(url: str, method: str, headers: dict, appkey_value: str, arguments: dict, verbose: bool):
     appkey = {"appkey": appkey_value}
     headers = {key: value.format(**arguments, **appkey) for key, value in headers.items()}
     if method == "POST":
         headers["Content-Type"] = "application/json"
         if verbose:
             print_debug(f"Posting to {url} {headers}")
-        response = requests.post(url, headers=headers, json=arguments)
-    else:
-        if verbose:
-            print_debug(str(arguments.items()))
-        url = url.format(
-            **{key: urllib.parse.quote(value) for key, value in arguments.items()},
-            **appkey,
-        )
-        if verbose:
-            print_debug(f"Fetching from {url}")
-        response = requests.get(url, headers=headers)
-    if response.status_code == 200:
-        return response.text
+        return dict(method="POST", url=url, headers=headers, json=arguments)
+    if verbose:
+        print_debug(str(arguments.items()))
+    url = url.format(
+        **{key: urllib.parse.quote(value) for key, value in arguments.items()},
+        **appkey,
+    )
+    if verbose:
+        print_debug(f"Fetching from {url}")
+    return dict(method="GET", url=url, headers=headers)
+
+
+def __http_result(url: str, status_code: int, text: str):
+    if status_code == 200:
+        return text
     else:
-        print_error(f"Got {response.status_code}:{response.text} from {url}")
+        print_error(f"Got {status_code}:{text} from {url}")
+
+
+def http_request(url: str, method: str, headers: dict, appkey_value: str, arguments: dict, verbose: bool):
+    params = __http_request_params(url, method, headers, appkey_value, arguments, verbose)
+    response = requests.request(**params)
+    return __http_result(params["url"], response.status_code, response.text)
+
+
+async def http_request_async(url: str, method: str, headers: dict, appkey_value: str, arguments: dict, verbose: bool):
+    """Async version of http_request (using the shared async HTTP client)"""
+    params = __http_request_params(url, method, headers, appkey_value, arguments, verbose)
+    response = await async_http_client().request(**params)
+    return __http_result(params["url"], response.status_code, response.text)
@@ -1,5 +1,5 @@
 from abc import ABCMeta, abstractmethod
-from typing import List
+from typing import List, Optional
 
 
 class ChatHistoryAbstractStorage(metaclass=ABCMeta):
@@ -44,9 +44,18 @@ class ChatHistoryAbstractStorage(metaclass=ABCMeta):
         pass
 
     @abstractmethod
-    def session_list(self):
+    def session_list(self, offset: int = 0, limit: Optional[int] = None, order_by: str = "created_at", descending: bool = False):
         pass
 
     @abstractmethod
     def get_session_data(self, id: str):
         pass
+
+    def summary(self) -> Optional[dict]:
+        """Returns the summary of old messages ({"content": str, "index": int}), if any.
+        Override it (and set_summary) to persist the summary with the session."""
+        return getattr(self, "_summary", None)
+
+    def set_summary(self, summary: Optional[dict]):
+        """Set the summary of messages before summary["index"] (None to clear it)"""
+        self._summary = summary
@@ -0,0 +1,101 @@
+import time
+from typing import Callable, Iterable, List, Optional
+
+from slashgpt.history.storage.utils import ORDER_KEYS, get_connection, session_title
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS catalog (
+    agent_name TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    file TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    message_count INTEGER NOT NULL,
+    title TEXT NOT NULL,
+    PRIMARY KEY (agent_name, session_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS catalog_created ON catalog (agent_name, created_at);
+CREATE INDEX IF NOT EXISTS catalog_updated ON catalog (agent_name, updated_at);
+CREATE TABLE IF NOT EXISTS catalog_agents (
+    agent_name TEXT PRIMARY KEY
+);
+"""
+
+SQL_UPSERT = """
+INSERT INTO catalog (agent_name, session_id, file, created_at, updated_at, message_count, title) VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (agent_name, session_id) DO UPDATE SET updated_at = excluded.updated_at, message_count = excluded.message_count,
+title = CASE WHEN catalog.title = '' THEN excluded.title ELSE catalog.title END
+"""
+SQL_SELECT = "SELECT session_id, file, created_at, updated_at, message_count, title FROM catalog WHERE agent_name = ? AND session_id = ?"
+SQL_COUNT = "SELECT COUNT(*) FROM catalog WHERE agent_name = ?"
+SQL_IS_INDEXED = "SELECT 1 FROM catalog_agents WHERE agent_name = ?"
+SQL_MARK_INDEXED = "INSERT OR IGNORE INTO catalog_agents (agent_name) VALUES (?)"
+
+
+class SessionCatalog:
+    """Index of sessions stored as files (in a SQLite database under the base folder),
+    which enables sorted and paginated listing, and O(1) lookup by session id without scanning folders."""
+
+    def __init__(self, base_dir: str):
+        """
+        Args:
+
+            base_dir (str): The folder where the sessions are stored (e.g, "filememory")
+        """
+        self.db_path = f"{base_dir}/catalog.sqlite3"
+
+    def __connection(self):
+        return get_connection(self.db_path, SCHEMA)
+
+    def update(self, agent_name: str, session_id: str, file: str, messages: List[dict]):
+        """Register a session or update its timestamp and message count"""
+        now = time.time()
+        self.__connection().execute(SQL_UPSERT, (agent_name, session_id, file, now, now, len(messages), session_title(messages)))
+
+    def ensure_indexed(self, agent_name: str, scan: Callable[[], Iterable[tuple]]):
+        """Import existing sessions (created before the catalog) once per agent.
+        scan returns (session_id, file, created_at, updated_at, messages) for each session."""
+        connection = self.__connection()
+        if connection.execute(SQL_IS_INDEXED, (agent_name,)).fetchone():
+            return
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            for session_id, file, created_at, updated_at, messages in scan():
+                connection.execute(SQL_UPSERT, (agent_name, session_id, file, created_at, updated_at, len(messages), session_title(messages)))
+            connection.execute(SQL_MARK_INDEXED, (agent_name,))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def get(self, agent_name: str, session_id: str) -> Optional[dict]:
+        """Returns the catalog entry of the specified session"""
+        row = self.__connection().execute(SQL_SELECT, (agent_name, session_id)).fetchone()
+        return self.__entry(row) if row else None
+
+    def count(self, agent_name: str) -> int:
+        return self.__connection().execute(SQL_COUNT, (agent_name,)).fetchone()[0]
+
+    def list(self, agent_name: str, offset: int = 0, limit: Optional[int] = None, order_by: str = "created_at", descending: bool = False):
+        """Returns catalog entries sorted by order_by (created_at, updated_at, message_count or title)"""
+        if order_by not in ORDER_KEYS:
+            raise ValueError(f"SessionCatalog: invalid order_by {order_by}")
+        direction = "DESC" if descending else "ASC"
+        sql = (
+            "SELECT session_id, file, created_at, updated_at, message_count, title FROM catalog WHERE agent_name = ?"
+            f" ORDER BY {order_by} {direction}, session_id LIMIT ? OFFSET ?"
+        )
+        rows = self.__connection().execute(sql, (agent_name, -1 if limit is None else limit, offset))
+        return [self.__entry(row) for row in rows]
+
+    def __entry(self, row: tuple):
+        (session_id, file, created_at, updated_at, message_count, title) = row
+        return {
+            "id": session_id,
+            "name": title or file,
+            "file": file,
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "message_count": message_count,
+            "title": title,
+        }
@@ -2,24 +2,48 @@ import glob
 import json
 import os
 import uuid
-from typing import List
+from typing import List, Optional
 
 from slashgpt.history.storage.abstract import ChatHistoryAbstractStorage
+from slashgpt.history.storage.catalog import SessionCatalog
 from slashgpt.history.storage.log import create_log_dir
 from slashgpt.utils.print import print_warning
+from slashgpt.utils.trace import traced
 
 
 class ChatHistoryFileStorage(ChatHistoryAbstractStorage):
-    def __init__(self, uid: str, agent_name: str, session_id: str = ""):
+    def __init__(self, uid: str, agent_name: str, session_id: str = "", journal: bool = False, compact_interval: int = 100, fsync: bool = False):
+        """
+        Args:
+
+            uid (str): User Id
+            agent_name (str): Name of the agent (the sub folder of "filememory")
+            session_id (str, optional): Id of the session to load (a new session is created if empty)
+            journal (bool, optional): True if each change should be appended to a JSONL journal
+                instead of rewriting the whole session file
+            compact_interval (int, optional): Number of journal records after which the journal is
+                compacted into the snapshot file (journal mode only)
+            fsync (bool, optional): True if each journal record should be fsync'ed (journal mode only)
+        """
         self.__messages: List[dict] = []
+        self.__summary: Optional[dict] = None
         self.base_dir = "filememory"
 
         self.uid = uid
         self.agent_name = agent_name
+        self.journal = journal
+        self.compact_interval = compact_interval
+        self.fsync = fsync
+        self.__seq = 0  # sequence number of the last journal record
+        self.__records = 0  # number of journal records since the last compaction
+        self.__cataloged = False  # True once the session is registered in the catalog
+        self.__catalog_dirty = False  # True if the catalog entry is behind the messages
 
         # self.time = datetime.now()
 
         create_log_dir(self.base_dir, agent_name)
+        self.catalog = SessionCatalog(self.base_dir)
+        """Index of sessions (SessionCatalog)"""
         if session_id == "":
             self.session_id = str(uuid.uuid4())
         else:
@@ -27,23 +51,153 @@ class ChatHistoryFileStorage(ChatHistoryAbstractStorage):
             self.__load_session()
 
     def _data(self):
-        return {"messages": self.__messages}
+        data: dict = {"messages": self.__messages}
+        if self.__summary:
+            data["summary"] = self.__summary
+        if self.journal:
+            data["seq"] = self.__seq
+        return data
+
+    def __path(self, ext: str):
+        return f"{self.base_dir}/{self.agent_name}/{self.session_id}.{ext}"
 
+    @traced("history.write", storage="file")
     def __save_session(self):
-        with open(f"{self.base_dir}/{self.agent_name}/{self.session_id}.json", "w") as f:
+        with open(self.__path("json"), "w") as f:
             json.dump(self._data(), f, ensure_ascii=False, indent=2)
+        self.__changed()
+
+    def __changed(self):
+        # The catalog is updated when the session is created and on flush, not on every change.
+        self.__catalog_dirty = True
+        if not self.__cataloged:
+            self.flush()
+
+    def flush(self):
+        """Update the catalog entry of the session (messages are written on every change)"""
+        if self.__catalog_dirty:
+            self.catalog.update(self.agent_name, self.session_id, self.__path("json"), self.__messages)
+            self.__catalog_dirty = False
+            self.__cataloged = True
+
+    def close(self):
+        """Flush the catalog entry"""
+        self.flush()
 
     def __load_session(self):
+        (data, self.__seq, self.__records, end) = self.__read_session(self.__path("json"))
+        self.__cataloged = True  # registered when it was created (or by the initial scan)
+        self.__messages = data["messages"]
+        self.__summary = data.get("summary")
+        if self.__records > 0 and not self.journal:
+            # The session was written in journal mode. Fold the journal into the snapshot
+            # so that the stale journal will not be replayed on top of our own snapshots.
+            self.compact()
+        elif self.journal and end is not None:
+            self.__repair_journal(end)
+
+    def __repair_journal(self, end: int):
+        """Truncates the journal after the last good record, so that new records are not appended to a broken line"""
+        with open(self.__path("jsonl"), "r+b") as f:
+            f.truncate(end)
+            if end > 0:
+                f.seek(end - 1)
+                if f.read(1) != b"\n":
+                    f.write(b"\n")
+
+    @classmethod
+    def __read_session(cls, snapshot_path: str):
+        """Returns (data, seq, records, end) by reading the snapshot and replaying the journal,
+        where end is the offset after the last good record if the journal needs a repair (None otherwise)"""
+        data: dict = {"messages": []}
+        seq = 0
         try:
-            with open(f"{self.base_dir}/{self.agent_name}/{self.session_id}.json", "r") as f:
-                data = json.load(f)
-                self.__messages = data.get("messages")
+            with open(snapshot_path, "r", encoding="utf-8") as f:
+                snapshot = json.load(f)
+                data = {"messages": snapshot.get("messages"), "summary": snapshot.get("summary")}
+                seq = snapshot.get("seq", 0)
         except FileNotFoundError:
-            self.__messages = []
+            pass
+
+        records = 0
+        end = None
+        try:
+            with open(snapshot_path + "l", "rb") as f:
+                offset = 0
+                for line in f:
+                    try:
+                        record = json.loads(line.decode("utf-8"))
+                    except (json.JSONDecodeError, UnicodeDecodeError):
+                        # A partially written record (e.g. crash in the middle of a write)
+                        print_warning(f"Ignoring a broken journal record in {snapshot_path}l")
+                        end = offset
+                        break
+                    offset += len(line)
+                    if not line.endswith(b"\n"):
+                        end = offset
+                    if record.get("seq", 0) > seq:
+                        cls.__apply(data, record)
+                        seq = record["seq"]
+                        records += 1
+        except FileNotFoundError:
+            pass
+        return (data, seq, records, end)
+
+    @classmethod
+    def __apply(cls, data: dict, record: dict):
+        op = record.get("op")
+        messages = data["messages"]
+        if op == "append":
+            messages.append(record["data"])
+        elif op == "set":
+            messages[record["index"]] = record["data"]
+        elif op == "pop":
+            messages.pop()
+        elif op == "restore":
+            data["messages"] = record["messages"]
+            data["summary"] = None
+        elif op == "summary":
+            data["summary"] = record["summary"]
+
+    @traced("history.write", storage="file")
+    def __write_record(self, record: dict):
+        self.__seq += 1
+        record["seq"] = self.__seq
+        with open(self.__path("jsonl"), "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        self.__changed()
+        self.__records += 1
+        if self.compact_interval > 0 and self.__records >= self.compact_interval:
+            self.compact()
+
+    @traced("history.write", storage="file")
+    def compact(self):
+        """Write the snapshot of the session and truncate the journal"""
+        snapshot_path = self.__path("json")
+        with open(snapshot_path + ".tmp", "w") as f:
+            json.dump(self._data(), f, ensure_ascii=False, indent=2)
+            if self.fsync:
+                f.flush()
+                os.fsync(f.fileno())
+        os.replace(snapshot_path + ".tmp", snapshot_path)
+        # Records up to self.__seq are in the snapshot, so they will be skipped even if truncation fails.
+        if os.path.exists(self.__path("jsonl")):
+            if self.journal:
+                open(self.__path("jsonl"), "w").close()
+            else:
+                os.remove(self.__path("jsonl"))
+        self.__records = 0
+        self.flush()
 
     def append(self, data: dict):
         self.__messages.append(data)
-        self.__save_session()
+        if self.journal:
+            self.__write_record({"op": "append", "data": data})
+        else:
+            self.__save_session()
 
     def get(self, index: int):
         return self.__messages[index]
@@ -56,6 +210,8 @@ class ChatHistoryFileStorage(ChatHistoryAbstractStorage):
     def set(self, index: int, data: dict):
         if self.__messages[index]:
             self.__messages[index] = data
+            if self.journal:
+                self.__write_record({"op": "set", "index": index, "data": data})
 
     def len(self):
         return len(self.__messages)
@@ -66,7 +222,10 @@ class ChatHistoryFileStorage(ChatHistoryAbstractStorage):
 
     def pop(self):
         if self.len() > 0:
-            return self.__messages.pop()
+            message = self.__messages.pop()
+            if self.journal:
+                self.__write_record({"op": "pop"})
+            return message
 
     def messages(self):
         return self.__messages
@@ -79,19 +238,61 @@ class ChatHistoryFileStorage(ChatHistoryAbstractStorage):
 
     def restore(self, data: List[dict]):
         self.__messages = data
+        self.__summary = None
+        if self.journal:
+            self.__write_record({"op": "restore", "messages": data})
+
+    def summary(self) -> Optional[dict]:
+        return self.__summary
+
+    def set_summary(self, summary: Optional[dict]):
+        self.__summary = summary
+        if self.journal:
+            self.__write_record({"op": "summary", "summary": summary})
+        else:
+            self.__save_session()
+
+    def session_list(self, offset: int = 0, limit: Optional[int] = None, order_by: str = "created_at", descending: bool = False):
+        self.flush()
+        self.catalog.ensure_indexed(self.agent_name, self.__scan_sessions)
+        return self.catalog.list(self.agent_name, offset, limit, order_by, descending)
+
+    def __scan_sessions(self):
+        """Yields existing sessions to build the catalog (only once per agent)"""
+        history_path = f"{self.base_dir}/{self.agent_name}"
+        files = set(glob.glob(f"{history_path}/*.json"))
+        # Sessions which have not been compacted yet only have the journal
+        files.update(file[:-1] for file in glob.glob(f"{history_path}/*.jsonl"))
+        for file in sorted(files):
+            try:
+                (data, _, _, _) = self.__read_session(file)
+                mtime = os.path.getmtime(file if os.path.exists(file) else file + "l")
+            except Exception:
+                print_warning(f"Failed to read {file}")
+                continue
+            session_id = os.path.basename(file)[: -len(".json")]
+            yield (session_id, file, mtime, mtime, data["messages"])
+
+    def get_session_info(self, id: str) -> Optional[dict]:
+        """Returns the catalog entry of the specified session (or the id-th session in the list)"""
+        self.flush()
+        self.catalog.ensure_indexed(self.agent_name, self.__scan_sessions)
+        entry = self.catalog.get(self.agent_name, id)
+        if entry is None and id.isdecimal():
+            entries = self.catalog.list(self.agent_name, offset=int(id), limit=1)
+            entry = entries[0] if entries else None
+        return entry
 
-    def session_list(self):
-        history_path = f"./{self.base_dir}/{self.agent_name}"
-        files = glob.glob(f"{history_path}/*")
-        return list(map(lambda x: {"name": x[1], "id": x[0]}, enumerate(files)))
-
-    def get_session_data(self, id: str):
-        files = self.session_list()
-        if id.isdecimal() and len(files) > int(id):
-            file_name = files[int(id)]["name"]
-            if not os.path.exists(file_name):
-                print_warning(f"No log named {file_name}")
-                return
-            with open(file_name, "r", encoding="utf-8") as f:
-                log = json.load(f)
-                return log
+    def get_session_data(self, id: str) -> Optional[dict]:
+        entry = self.get_session_info(id)
+        if entry is None:
+            print_warning(f"No session {id}")
+            return None
+        file_name = entry["file"]
+        if not os.path.exists(file_name) and not os.path.exists(file_name + "l"):
+            print_warning(f"No log named {file_name}")
+            return None
+        (data, _, _, _) = self.__read_session(file_name)
+        if not data.get("summary"):
+            data.pop("summary", None)
+        return data
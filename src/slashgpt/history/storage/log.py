@@ -1,5 +1,10 @@
+import atexit
 import json
 import os
+import threading
+import time
+
+from slashgpt.utils.print import print_error
 
 
 def create_log_dir(base_dir: str, agent_name: str):
@@ -9,7 +14,75 @@ def create_log_dir(base_dir: str, agent_name: str):
         os.makedirs(f"{base_dir}/{agent_name}")
 
 
+LOG_TIME_FORMAT = "%Y-%m-%d %H-%M-%S.%f"
+
+
+def log_file_name(base_dir: str, agent_name: str, time):
+    timeStr = time.strftime(LOG_TIME_FORMAT)
+    return f"{base_dir}/{agent_name}/{timeStr}.json"
+
+
 def save_log(base_dir: str, agent_name: str, context: dict, time):
-    timeStr = time.strftime("%Y-%m-%d %H-%M-%S.%f")
-    with open(f"{base_dir}/{agent_name}/{timeStr}.json", "w") as f:
+    with open(log_file_name(base_dir, agent_name, time), "w") as f:
         json.dump(context, f, ensure_ascii=False, indent=2)
+
+
+class LogFlusher:
+    """A background thread (singleton), which writes the pending changes of write-behind storages.
+    Storages with pending changes are held until they are flushed, and all of them are flushed when
+    the interpreter exits."""
+
+    TICK = 0.1
+    """Polling interval of the flusher thread in seconds"""
+
+    __instance = None
+    __instance_lock = threading.Lock()
+
+    def __init__(self):
+        self.__pending: set = set()
+        self.__lock = threading.Lock()
+        self.__thread = threading.Thread(target=self.__run, name="slashgpt-log-flusher", daemon=True)
+        self.__thread.start()
+        atexit.register(self.flush_all)
+
+    @classmethod
+    def instance(cls):
+        """Returns the flusher, which is started on the first call"""
+        with cls.__instance_lock:
+            if cls.__instance is None:
+                cls.__instance = LogFlusher()
+            return cls.__instance
+
+    def schedule(self, storage):
+        """Schedule a storage which has pending changes.
+        The storage must implement flush(), flush_if_due(now) and pending()."""
+        with self.__lock:
+            self.__pending.add(storage)
+
+    def __snapshot(self):
+        with self.__lock:
+            return list(self.__pending)
+
+    def __run(self):
+        while True:
+            time.sleep(self.TICK)
+            now = time.monotonic()
+            for storage in self.__snapshot():
+                try:
+                    storage.flush_if_due(now)
+                    with self.__lock:
+                        # A storage which became dirty again re-schedules itself after this check
+                        if storage.pending() == 0:
+                            self.__pending.discard(storage)
+                except Exception as e:
+                    print_error(f"LogFlusher: failed to flush the log: {e}")
+
+    def flush_all(self):
+        """Flush all pending storages"""
+        for storage in self.__snapshot():
+            try:
+                storage.flush()
+            except Exception as e:
+                print_error(f"LogFlusher: failed to flush the log: {e}")
+            with self.__lock:
+                self.__pending.discard(storage)
@@ -1,31 +1,130 @@
 import glob
 import json
 import os
+import threading
+import time
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from slashgpt.history.storage.abstract import ChatHistoryAbstractStorage
-from slashgpt.history.storage.log import create_log_dir, save_log
+from slashgpt.history.storage.catalog import SessionCatalog
+from slashgpt.history.storage.log import LOG_TIME_FORMAT, LogFlusher, create_log_dir, log_file_name, save_log
 from slashgpt.utils.print import print_warning
+from slashgpt.utils.trace import traced
+
+SESSION_ID_FORMAT = "%Y%m%d-%H%M%S-%f"
 
 
 class ChatHistoryMemoryStorage(ChatHistoryAbstractStorage):
-    def __init__(self, uid: str, agent_name: str):
+    def __init__(self, uid: str, agent_name: str, write_behind: bool = False, flush_interval: float = 1.0, flush_count: int = 0):
+        """
+        Args:
+
+            uid (str): User Id
+            agent_name (str): Name of the agent (the sub folder of "output")
+            write_behind (bool, optional): True if the log should be written by the background flusher
+                instead of on every append
+            flush_interval (float, optional): Maximum delay in seconds before changes are written (write-behind mode only)
+            flush_count (int, optional): If positive, the log is written synchronously once this number of
+                changes are pending (write-behind mode only)
+        """
         self.__messages: List[dict] = []
+        self.__summary: Optional[dict] = None
         self.uid = uid
         self.agent_name = agent_name
-        self.base_dir = "output"
+        # Resolved now, so that the log is written to the same folder even if the working directory changes before a flush
+        self.base_dir = os.path.abspath("output")
 
         self.time = datetime.now()
+        self.session_id = self.time.strftime(SESSION_ID_FORMAT)
         # init log dir
         create_log_dir(self.base_dir, agent_name)
+        self.catalog = SessionCatalog(self.base_dir)
+        """Index of sessions (SessionCatalog)"""
+
+        self.write_behind = write_behind
+        self.flush_interval = flush_interval
+        self.flush_count = flush_count
+        self.__lock = threading.RLock()
+        self.__write_lock = threading.Lock()
+        self.__dirty = 0  # number of changes which are not written yet
+        self.__dirty_since = 0.0
+        self.__uncataloged: Optional[List[dict]] = None  # messages of the last write, if the catalog entry is behind it
+        self.__cataloged = False  # True once the session is registered in the catalog
 
     def _data(self):
+        if self.__summary:
+            return {"messages": self.__messages, "summary": self.__summary}
         return {"messages": self.__messages}
 
+    def __changed(self) -> bool:
+        """Counts a change (called with the lock held), and returns True if the pending changes should be written now.
+        The caller must flush after releasing the lock, since flush() takes the write lock first."""
+        if not self.write_behind:
+            return False
+        self.__dirty += 1
+        if self.__dirty == 1:
+            self.__dirty_since = time.monotonic()
+            LogFlusher.instance().schedule(self)
+        return self.flush_count > 0 and self.__dirty >= self.flush_count
+
+    def flush(self):
+        """Write pending changes to the log (write-behind mode), and update the catalog entry"""
+        # The write lock keeps snapshots in order, while appends only wait for the copy.
+        with self.__write_lock:
+            with self.__lock:
+                if self.__dirty == 0:
+                    data = None
+                else:
+                    self.__dirty = 0
+                    data = self._data()
+                    data["messages"] = list(self.__messages)
+            if data is not None:
+                self.__save_log(data)
+            self.__update_catalog()
+
+    @traced("history.write", storage="memory")
+    def __save_log(self, data: dict):
+        save_log(self.base_dir, self.agent_name, data, self.time)
+        # The catalog is updated when the session is created and on flush, not on every write.
+        self.__uncataloged = data["messages"]
+        if not self.__cataloged:
+            self.__update_catalog()
+
+    def __update_catalog(self):
+        messages = self.__uncataloged
+        if messages is not None:
+            self.__uncataloged = None
+            self.catalog.update(self.agent_name, self.session_id, log_file_name(self.base_dir, self.agent_name, self.time), messages)
+            self.__cataloged = True
+
+    def flush_if_due(self, now: float):
+        """Called by the LogFlusher periodically"""
+        if self.__dirty > 0 and now - self.__dirty_since >= self.flush_interval:
+            self.flush()
+
+    def pending(self):
+        """Returns the number of changes which are not written yet"""
+        return self.__dirty
+
+    def close(self):
+        """Flush pending changes"""
+        self.flush()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
     def append(self, data: dict):
-        self.__messages.append(data)
-        save_log(self.base_dir, self.agent_name, self._data(), self.time)
+        with self.__lock:
+            self.__messages.append(data)
+            if not self.write_behind:
+                self.__save_log(self._data())
+            due = self.__changed()
+        if due:
+            self.flush()
 
     def get(self, index: int):
         return self.__messages[index]
@@ -36,8 +135,13 @@ class ChatHistoryMemoryStorage(ChatHistoryAbstractStorage):
             return m.get(name)
 
     def set(self, index: int, data: dict):
-        if self.__messages[index]:
-            self.__messages[index] = data
+        due = False
+        with self.__lock:
+            if self.__messages[index]:
+                self.__messages[index] = data
+                due = self.__changed()
+        if due:
+            self.flush()
 
     def len(self):
         return len(self.__messages)
@@ -47,8 +151,14 @@ class ChatHistoryMemoryStorage(ChatHistoryAbstractStorage):
             return self.__messages[self.len() - 1]
 
     def pop(self):
-        if self.len() > 0:
-            return self.__messages.pop()
+        with self.__lock:
+            if self.len() == 0:
+                return None
+            message = self.__messages.pop()
+            due = self.__changed()
+        if due:
+            self.flush()
+        return message
 
     def messages(self):
         return self.__messages
@@ -60,20 +170,66 @@ class ChatHistoryMemoryStorage(ChatHistoryAbstractStorage):
         return filter(lambda x: not x.get("preset"), self.__messages)
 
     def restore(self, data: List[dict]):
-        self.__messages = data
-
-    def session_list(self):
-        history_path = f"./{self.base_dir}/{self.agent_name}"
-        files = glob.glob(f"{history_path}/*")
-        return list(map(lambda x: {"name": x[1], "id": x[0]}, enumerate(files)))
+        with self.__lock:
+            self.__messages = data
+            self.__summary = None
+            due = self.__changed()
+        if due:
+            self.flush()
+
+    def summary(self) -> Optional[dict]:
+        return self.__summary
+
+    def set_summary(self, summary: Optional[dict]):
+        with self.__lock:
+            self.__summary = summary
+            if not self.write_behind:
+                self.__save_log(self._data())
+            due = self.__changed()
+        if due:
+            self.flush()
+
+    def session_list(self, offset: int = 0, limit: Optional[int] = None, order_by: str = "created_at", descending: bool = False):
+        self.flush()
+        self.catalog.ensure_indexed(self.agent_name, self.__scan_sessions)
+        return self.catalog.list(self.agent_name, offset, limit, order_by, descending)
+
+    def __scan_sessions(self):
+        """Yields existing logs to build the catalog (only once per agent)"""
+        for file in sorted(glob.glob(f"{self.base_dir}/{self.agent_name}/*.json")):
+            try:
+                with open(file, "r", encoding="utf-8") as f:
+                    messages = json.load(f).get("messages") or []
+                mtime = os.path.getmtime(file)
+            except Exception:
+                print_warning(f"Failed to read {file}")
+                continue
+            name = os.path.basename(file)[: -len(".json")]
+            try:
+                created = datetime.strptime(name, LOG_TIME_FORMAT)
+                yield (created.strftime(SESSION_ID_FORMAT), file, created.timestamp(), mtime, messages)
+            except ValueError:
+                yield (name.replace(" ", "_"), file, mtime, mtime, messages)
+
+    def get_session_info(self, id: str) -> Optional[dict]:
+        """Returns the catalog entry of the specified session (or the id-th session in the list)"""
+        self.flush()
+        self.catalog.ensure_indexed(self.agent_name, self.__scan_sessions)
+        entry = self.catalog.get(self.agent_name, id)
+        if entry is None and id.isdecimal():
+            entries = self.catalog.list(self.agent_name, offset=int(id), limit=1)
+            entry = entries[0] if entries else None
+        return entry
 
     def get_session_data(self, id: str):
-        files = self.session_list()
-        if id.isdecimal() and len(files) > int(id):
-            file_name = files[int(id)]["name"]
-            if not os.path.exists(file_name):
-                print_warning(f"No log named {file_name}")
-                return
-            with open(file_name, "r", encoding="utf-8") as f:
-                log = json.load(f)
-                return log
+        entry = self.get_session_info(id)
+        if entry is None:
+            print_warning(f"No session {id}")
+            return None
+        file_name = entry["file"]
+        if not os.path.exists(file_name):
+            print_warning(f"No log named {file_name}")
+            return None
+        with open(file_name, "r", encoding="utf-8") as f:
+            log = json.load(f)
+            return log
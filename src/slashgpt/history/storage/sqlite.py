@@ -0,0 +1,226 @@
+import json
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import List, Optional
+
+from slashgpt.history.storage.abstract import ChatHistoryAbstractStorage
+from slashgpt.history.storage.utils import ORDER_KEYS, get_connection, session_title
+from slashgpt.utils.trace import traced
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    session_id TEXT PRIMARY KEY,
+    uid TEXT NOT NULL,
+    agent_name TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    updated_at REAL NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0,
+    title TEXT NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS sessions_uid_agent ON sessions (uid, agent_name, created_at);
+CREATE INDEX IF NOT EXISTS sessions_uid_agent_updated ON sessions (uid, agent_name, updated_at);
+CREATE TABLE IF NOT EXISTS messages (
+    uid TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    seq INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (uid, session_id, seq)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS summaries (
+    uid TEXT NOT NULL,
+    session_id TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (uid, session_id)
+) WITHOUT ROWID;
+"""
+
+SQL_INSERT_SESSION = "INSERT OR IGNORE INTO sessions (session_id, uid, agent_name, created_at, updated_at) VALUES (?, ?, ?, ?, ?)"
+SQL_TOUCH_SESSION = (
+    "UPDATE sessions SET updated_at = ?, message_count = ?, title = CASE WHEN title = '' THEN ? ELSE title END WHERE uid = ? AND session_id = ?"
+)
+SQL_INSERT_MESSAGE = "INSERT OR REPLACE INTO messages (uid, session_id, seq, data) VALUES (?, ?, ?, ?)"
+SQL_UPDATE_MESSAGE = "UPDATE messages SET data = ? WHERE uid = ? AND session_id = ? AND seq = ?"
+SQL_DELETE_MESSAGE = "DELETE FROM messages WHERE uid = ? AND session_id = ? AND seq = ?"
+SQL_DELETE_MESSAGES = "DELETE FROM messages WHERE uid = ? AND session_id = ?"
+SQL_SELECT_MESSAGES = "SELECT data FROM messages WHERE uid = ? AND session_id = ? ORDER BY seq"
+SQL_UPSERT_SUMMARY = "INSERT OR REPLACE INTO summaries (uid, session_id, data) VALUES (?, ?, ?)"
+SQL_DELETE_SUMMARY = "DELETE FROM summaries WHERE uid = ? AND session_id = ?"
+SQL_SELECT_SUMMARY = "SELECT data FROM summaries WHERE uid = ? AND session_id = ?"
+SQL_SELECT_SESSION = "SELECT session_id, created_at, updated_at, message_count, title FROM sessions WHERE uid = ? AND session_id = ?"
+
+
+class ChatHistorySQLiteStorage(ChatHistoryAbstractStorage):
+    """Chat history stored in an embedded SQLite database (one database for all sessions).
+    Messages are cached in memory, and every change is written through to the database."""
+
+    def __init__(self, uid: str, agent_name: str, session_id: str = "", db_path: str = "filememory/history.sqlite3"):
+        """
+        Args:
+
+            uid (str): User Id
+            agent_name (str): Name of the agent
+            session_id (str, optional): Id of the session to load (a new session is created if empty)
+            db_path (str, optional): Location of the database file
+        """
+        self.__messages: List[dict] = []
+        self.__summary: Optional[dict] = None
+        self.uid = uid
+        self.agent_name = agent_name
+        self.db_path = db_path
+        self.__pending: List[tuple] = []  # (sql, rows) to be executed when the transaction ends
+        self.__depth = 0
+        self.__has_session = False
+
+        if session_id == "":
+            self.session_id = str(uuid.uuid4())
+        else:
+            self.session_id = session_id
+            rows = self.__connection().execute(SQL_SELECT_MESSAGES, (self.uid, self.session_id))
+            self.__messages = [json.loads(row[0]) for row in rows]
+            self.__has_session = len(self.__messages) > 0
+            self.__summary = self.__read_summary(self.session_id)
+
+    def __connection(self):
+        return get_connection(self.db_path, SCHEMA)
+
+    @contextmanager
+    def transaction(self):
+        """Buffer all the changes in this block, and write them in a single transaction.
+        Typically used to write a turn (the question, the answer and function results) at once."""
+        self.__depth += 1
+        try:
+            yield self
+        finally:
+            self.__depth -= 1
+            if self.__depth == 0:
+                self.__commit()
+
+    def __execute(self, sql: str, row: tuple):
+        if self.__pending and self.__pending[-1][0] == sql:
+            # Consecutive statements of the same kind are batched with executemany
+            self.__pending[-1][1].append(row)
+        else:
+            self.__pending.append((sql, [row]))
+        if self.__depth == 0:
+            self.__commit()
+
+    @traced("history.write", storage="sqlite")
+    def __commit(self):
+        if not self.__pending:
+            return
+        now = time.time()
+        pending = self.__pending
+        self.__pending = []
+        connection = self.__connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            if not self.__has_session:
+                connection.execute(SQL_INSERT_SESSION, (self.session_id, self.uid, self.agent_name, now, now))
+                self.__has_session = True
+            for sql, rows in pending:
+                connection.executemany(sql, rows)
+            connection.execute(SQL_TOUCH_SESSION, (now, len(self.__messages), session_title(self.__messages), self.uid, self.session_id))
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def append(self, data: dict):
+        self.__messages.append(data)
+        self.__execute(SQL_INSERT_MESSAGE, (self.uid, self.session_id, len(self.__messages) - 1, json.dumps(data, ensure_ascii=False)))
+
+    def get(self, index: int):
+        return self.__messages[index]
+
+    def get_data(self, index: int, name: str):
+        m = self.__messages[index]
+        if m:
+            return m.get(name)
+
+    def set(self, index: int, data: dict):
+        if self.__messages[index]:
+            self.__messages[index] = data
+            seq = index if index >= 0 else len(self.__messages) + index
+            self.__execute(SQL_UPDATE_MESSAGE, (json.dumps(data, ensure_ascii=False), self.uid, self.session_id, seq))
+
+    def len(self):
+        return len(self.__messages)
+
+    def last(self):
+        if self.len() > 0:
+            return self.__messages[self.len() - 1]
+
+    def pop(self):
+        if self.len() > 0:
+            message = self.__messages.pop()
+            self.__execute(SQL_DELETE_MESSAGE, (self.uid, self.session_id, len(self.__messages)))
+            return message
+
+    def messages(self):
+        return self.__messages
+
+    def preset_messages(self):
+        return filter(lambda x: x.get("preset"), self.__messages)
+
+    def nonpreset_messages(self):
+        return filter(lambda x: not x.get("preset"), self.__messages)
+
+    def restore(self, data: List[dict]):
+        self.__messages = data
+        self.__summary = None
+        with self.transaction():
+            self.__execute(SQL_DELETE_SUMMARY, (self.uid, self.session_id))
+            self.__execute(SQL_DELETE_MESSAGES, (self.uid, self.session_id))
+            for index, message in enumerate(data):
+                self.__execute(SQL_INSERT_MESSAGE, (self.uid, self.session_id, index, json.dumps(message, ensure_ascii=False)))
+
+    def summary(self) -> Optional[dict]:
+        return self.__summary
+
+    def set_summary(self, summary: Optional[dict]):
+        self.__summary = summary
+        if summary:
+            self.__execute(SQL_UPSERT_SUMMARY, (self.uid, self.session_id, json.dumps(summary, ensure_ascii=False)))
+        else:
+            self.__execute(SQL_DELETE_SUMMARY, (self.uid, self.session_id))
+
+    def __read_summary(self, session_id: str):
+        row = self.__connection().execute(SQL_SELECT_SUMMARY, (self.uid, session_id)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def session_list(self, offset: int = 0, limit: Optional[int] = None, order_by: str = "created_at", descending: bool = False):
+        if order_by not in ORDER_KEYS:
+            raise ValueError(f"ChatHistorySQLiteStorage: invalid order_by {order_by}")
+        direction = "DESC" if descending else "ASC"
+        sql = (
+            "SELECT session_id, created_at, updated_at, message_count, title FROM sessions WHERE uid = ? AND agent_name = ?"
+            f" ORDER BY {order_by} {direction}, session_id LIMIT ? OFFSET ?"
+        )
+        rows = self.__connection().execute(sql, (self.uid, self.agent_name, -1 if limit is None else limit, offset))
+        return [self.__entry(row) for row in rows]
+
+    def __entry(self, row: tuple):
+        (session_id, created_at, updated_at, message_count, title) = row
+        return {
+            "id": session_id,
+            "name": title or datetime.fromtimestamp(created_at).strftime("%Y-%m-%d %H-%M-%S"),
+            "created_at": created_at,
+            "updated_at": updated_at,
+            "message_count": message_count,
+            "title": title,
+        }
+
+    def get_session_info(self, id: str) -> Optional[dict]:
+        """Returns the listing entry of the specified session"""
+        row = self.__connection().execute(SQL_SELECT_SESSION, (self.uid, id)).fetchone()
+        return self.__entry(row) if row else None
+
+    def get_session_data(self, id: str) -> Optional[dict]:
+        rows = self.__connection().execute(SQL_SELECT_MESSAGES, (self.uid, id))
+        messages = [json.loads(row[0]) for row in rows]
+        if messages:
+            summary = self.__read_summary(id)
+            return {"messages": messages, "summary": summary} if summary else {"messages": messages}
+        return None
@@ -0,0 +1,41 @@
+import os
+import sqlite3
+import threading
+from typing import Iterable
+
+ORDER_KEYS = ["created_at", "updated_at", "message_count", "title"]
+
+TITLE_LENGTH = 60
+
+
+def session_title(messages: Iterable[dict]) -> str:
+    """Returns the title of a session (the beginning of the first question from the user)"""
+    for message in messages:
+        if message and message.get("role") == "user":
+            content = message.get("content") or ""
+            return content.strip().split("\n")[0][:TITLE_LENGTH]
+    return ""
+
+
+_local = threading.local()
+
+
+def get_connection(db_path: str, schema: str) -> sqlite3.Connection:
+    """Returns the connection to the specified database, which is shared within the current thread.
+    The schema is applied when the connection is created."""
+    connections = getattr(_local, "connections", None)
+    if connections is None:
+        connections = _local.connections = {}
+    db_path = os.path.abspath(db_path)
+    connection = connections.get(db_path)
+    if connection is None:
+        directory = os.path.dirname(db_path)
+        if directory and not os.path.isdir(directory):
+            os.makedirs(directory)
+        # isolation_level=None: we explicitly begin and commit transactions
+        connection = sqlite3.connect(db_path, isolation_level=None, timeout=30)
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        connection.executescript(schema)
+        connections[db_path] = connection
+    return connection
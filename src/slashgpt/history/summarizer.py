@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import TYPE_CHECKING, List, Optional
+
+from slashgpt.llms.model import LlmModel
+from slashgpt.manifest import Manifest
+from slashgpt.utils.print import print_debug, print_warning
+
+if TYPE_CHECKING:
+    from slashgpt.chat_config import ChatConfig
+    from slashgpt.chat_history import ChatHistory
+
+SUMMARY_PROMPT = (
+    "You summarize conversations between a user and an AI assistant. "
+    "Write a concise summary of the conversation below, keeping the facts, decisions, names and open questions, "
+    "which are necessary to continue the conversation. Merge the previous summary into it if it is given."
+)
+SUMMARY_HEADER = "Summary of the earlier conversation:"
+
+__executor: Optional[ThreadPoolExecutor] = None
+__executor_lock = threading.Lock()
+
+
+def _executor():
+    global __executor
+    with __executor_lock:
+        if __executor is None:
+            __executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="slashgpt-summarizer")
+        return __executor
+
+
+def summary_range(messages: List[dict], summary: dict):
+    """Returns (head, start). The summary replaces messages[head:start] (head is 1 if there is the system prompt)."""
+    head = 1 if messages and messages[0].get("role") == "system" else 0
+    start = max(head, min(summary.get("index", head), len(messages)))
+    return (head, start)
+
+
+def summary_message(summary: dict):
+    """Returns the system message which holds the summary"""
+    return {"role": "system", "content": f"{SUMMARY_HEADER}\n{summary['content']}"}
+
+
+def apply_summary(messages: List[dict], summary: Optional[dict]):
+    """Returns messages whose old messages are replaced by the summary"""
+    if not summary:
+        return messages
+    (head, start) = summary_range(messages, summary)
+    return messages[:head] + [summary_message(summary)] + messages[start:]
+
+
+class HistorySummarizer:
+    """It compacts old messages into a running summary generated by a (cheaper) LLM model.
+    The summary is generated in the background after a turn, and applied to the history
+    (and persisted by its storage) before the next call, so that it never adds latency."""
+
+    def __init__(self, llm_model: LlmModel, keep_last: int = 6, min_messages: int = 6, verbose: bool = False):
+        """
+        Args:
+
+            llm_model (LlmModel): The LLM model which generates the summary
+            keep_last (int, optional): Number of the newest messages, which are never summarized
+            min_messages (int, optional): Minimum number of new messages to update the summary
+            verbose (bool, optional): True if it's in verbose mode.
+        """
+        self.llm_model = llm_model
+        self.keep_last = keep_last
+        self.min_messages = min_messages
+        self.verbose = verbose
+        self.__future: Optional[Future] = None
+        self.__last: Optional[dict] = None  # the last summarized message (to detect restored histories)
+
+    @classmethod
+    def from_manifest(cls, manifest: Manifest, config: ChatConfig, llm_model: LlmModel) -> Optional[HistorySummarizer]:
+        """Returns the summarizer specified by the "summary" property of the manifest (optional)
+
+        Args:
+
+            manifest (Manifest): The manifest of the session
+            config (ChatConfig): Chat configuration (LLM models and engines)
+            llm_model (LlmModel): The default LLM model (the model of the session)
+        """
+        value = manifest.summary()
+        if not value:
+            return None
+        if not isinstance(value, dict):
+            value = {}
+        model = value.get("model")
+        if isinstance(model, dict):
+            llm_model = LlmModel(model, config.llm_engine_configs)
+        elif model:
+            llm_model = config.get_llm_model_from_key(model)
+        return cls(llm_model, value.get("keep_last", 6), value.get("min_messages", 6), config.verbose)
+
+    def pending(self):
+        """Returns True if the summary is being generated"""
+        return self.__future is not None
+
+    def schedule(self, history: ChatHistory):
+        """Start generating the summary in the background if there are enough old messages"""
+        if self.__future is not None:
+            return
+        messages = history.messages()
+        summary = history.summary() or {}
+        (_, start) = summary_range(messages, summary)
+        end = len(messages) - self.keep_last
+        if end - start < self.min_messages:
+            return
+        self.__last = messages[end - 1]
+        self.__future = _executor().submit(self.__summarize, summary.get("content"), messages[start:end], end)
+
+    def apply(self, history: ChatHistory, wait: bool = False):
+        """Set the generated summary to the history (call it from the thread which owns the history).
+        Returns True if the summary is updated.
+
+        Args:
+
+            history (ChatHistory): The history which scheduled the summary
+            wait (bool, optional): True if it should wait for the summary being generated
+        """
+        future = self.__future
+        if future is None or not (wait or future.done()):
+            return False
+        self.__future = None
+        try:
+            summary = future.result()
+        except Exception as e:
+            print_warning(f"HistorySummarizer: failed to summarize the history: {e}")
+            return False
+        index = summary["index"]
+        if history.len_messages() < index or history.messages()[index - 1] is not self.__last:
+            # The history was restored or modified while summarizing
+            return False
+        history.set_summary(summary)
+        if self.verbose:
+            print_debug(f"summary (index={index}): {summary['content']}")
+        return True
+
+    def __summarize(self, previous: Optional[str], messages: List[dict], index: int):
+        lines = []
+        if previous:
+            lines += ["Previous summary:", previous, "", "Conversation:"]
+        for message in messages:
+            if message.get("role") == "function":
+                lines.append(f"function({message.get('name')}): {message.get('content')}")
+            else:
+                lines.append(f"{message.get('role')}: {message.get('content')}")
+        prompt = [{"role": "system", "content": SUMMARY_PROMPT}, {"role": "user", "content": "\n".join(lines)}]
+        (_, res, _, _) = self.llm_model.generate_response(prompt, Manifest({"temperature": 0}), False)
+        if not res:
+            raise ValueError("empty summary")
+        return {"content": res, "index": index}
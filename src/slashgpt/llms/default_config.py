@@ -1,4 +1,5 @@
 from slashgpt.llms.engine.hosted import LLMEngineHosted
+from slashgpt.llms.engine.mock import LLMEngineMock
 from slashgpt.llms.engine.openai_gpt import LLMEngineOpenAIGPT
 from slashgpt.llms.engine.openai_legacy import LLMEngineOpenAILegacy
 from slashgpt.llms.engine.replicate import LLMEngineReplicate
@@ -9,6 +10,7 @@ default_llm_engine_configs = {
     "replicate": LLMEngineReplicate,
     # "palm": LLMEnginePaLM,
     "hosted": LLMEngineHosted,
+    "mock": LLMEngineMock,
 }
 
 default_llm_models = {
@@ -1,11 +1,11 @@
 from __future__ import annotations
 
+import asyncio
 from abc import ABCMeta, abstractmethod
-from typing import TYPE_CHECKING, List, Optional
-
-import tiktoken  # for counting tokens
+from typing import TYPE_CHECKING, Callable, List, Optional
 
 from slashgpt.function.function_call import FunctionCall
+from slashgpt.llms import tokenizer
 from slashgpt.utils.print import print_warning
 
 if TYPE_CHECKING:
@@ -20,6 +20,19 @@ class LLMEngineBase(metaclass=ABCMeta):
     def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
         pass
 
+    async def chat_completion_async(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        """Async version of chat_completion. Engines which do not have async clients run chat_completion
+        in a worker thread, so that the event loop is not blocked."""
+        return await asyncio.to_thread(self.chat_completion, messages, manifest, verbose)
+
+    def chat_completion_stream(self, messages: List[dict], manifest: Manifest, verbose: bool, callback: Callable[[str], None]):
+        """Same as chat_completion, but calls the callback with each delta of the content as it arrives.
+        Engines which do not support streaming report the whole content as a single delta."""
+        (role, res, function_call, token_usage) = self.chat_completion(messages, manifest, verbose)
+        if res:
+            callback(res)
+        return (role, res, function_call, token_usage)
+
     """
     Extract the Python code from the string if the agent is a code interpreter.
     Returns it in the "function call" format.
@@ -85,10 +98,14 @@ class LLMEngineBase(metaclass=ABCMeta):
 
     def is_within_budget(self, text: str, verbose: bool = False):
         token_budget = self.llm_model.max_token() - 500
-        return self.__num_tokens(text) <= token_budget
+        return self.num_tokens(text) <= token_budget
 
-    def __num_tokens(self, text: str):
+    def num_tokens(self, text: str):
         """Calculate the llm token of the text. Because this is for openai, override it if you use another language model."""
-        model_name = self.llm_model.name() if self.llm_model.name().startswith("gpt-") else "gpt-3.5-turbo-0613"
-        encoding = tiktoken.encoding_for_model(model_name)
-        return len(encoding.encode(text))
+        return tokenizer.num_tokens(self.llm_model.name(), text)
+
+    def num_tokens_many(self, texts: List[str]):
+        """Calculate the llm token of each text (in a batch). Engines which override num_tokens count them one by one."""
+        if type(self).num_tokens is not LLMEngineBase.num_tokens:
+            return [self.num_tokens(text) for text in texts]
+        return tokenizer.num_tokens_many(self.llm_model.name(), texts)
@@ -6,6 +6,7 @@ from typing import TYPE_CHECKING, List
 import requests
 
 from slashgpt.llms.engine.base import LLMEngineBase
+from slashgpt.utils.http_client import async_http_client
 from slashgpt.utils.print import print_debug, print_error
 
 if TYPE_CHECKING:
@@ -29,17 +30,34 @@ class LLMEngineHosted(LLMEngineBase):
             print_debug("calling *** local")
 
         # print("calling *** local", self.url)
+        (headers, arguments) = self.__request(prompt)
+        response = requests.post(self.url, headers=headers, json=arguments)
+        return self.__result(response.status_code, response.text, messages, manifest, verbose)
+
+    async def chat_completion_async(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        prompt = self.prompt_from_messages(messages, manifest)
+
+        if verbose:
+            print_debug("calling *** local (async)")
+
+        (headers, arguments) = self.__request(prompt)
+        response = await async_http_client().post(self.url, headers=headers, json=arguments)
+        return self.__result(response.status_code, response.text, messages, manifest, verbose)
+
+    def __request(self, prompt: str):
         arguments = {"inputs": [{"name": "input-0", "data": [prompt], "datatype": "BYTES", "shape": [-1]}]}
         headers = {"Content-Type": "application/json", self.header_key: self.api_key}
-        response = requests.post(self.url, headers=headers, json=arguments)
+        return (headers, arguments)
+
+    def __result(self, status_code: int, text: str, messages: List[dict], manifest: Manifest, verbose: bool):
         if verbose:
-            print("***response.status_code", response.status_code)
-            print("***response.text", response.text)
+            print("***response.status_code", status_code)
+            print("***response.text", text)
 
         output = []
-        if response.status_code < 300:
+        if status_code < 300:
             # print("*** success")
-            json_data = json.loads(response.text)
+            json_data = json.loads(text)
             # print(json.dumps(json_data, indent=2))
             outputs = json_data.get("outputs")
             if outputs and isinstance(outputs, list):
@@ -58,7 +76,7 @@ class LLMEngineHosted(LLMEngineBase):
                     print(datatype, data[0])
                     output = [str(data)]
         else:
-            print_error(f"Error:{response.status_code}\n{response.text}")
+            print_error(f"Error:{status_code}\n{text}")
 
         if isinstance(output, list):
             if isinstance(output[0], list):
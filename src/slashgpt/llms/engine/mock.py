@@ -0,0 +1,107 @@
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+import time
+from typing import TYPE_CHECKING, Callable, List
+
+from slashgpt.function.function_call import FunctionCall
+from slashgpt.llms.engine.base import LLMEngineBase
+from slashgpt.utils.trace import current_span
+
+if TYPE_CHECKING:
+    from slashgpt.llms.model import LlmModel
+    from slashgpt.manifest import Manifest
+
+
+class LLMEngineMock(LLMEngineBase):
+    """
+    Deterministic engine, which does not call any API (for tests and benchmarks).
+    The model data may have following properties.
+
+        replies (list, optional): scripted replies, which are returned in order (and repeated).
+            Each reply is either a str (content) or a dict with "content" or "function_call" ({"name", "arguments"}).
+            Without replies, it echoes the last message.
+        latency (float, optional): seconds before the first token (0 by default)
+        tokens_per_second (float, optional): speed of the generation (0 means no delay)
+        tokenizer (str, optional): "words" (counts words, by default) or "tiktoken"
+    """
+
+    def __init__(self, llm_model: LlmModel):
+        super().__init__(llm_model)
+        self.replies: List = llm_model.get("replies") or []
+        self.latency: float = llm_model.get("latency") or 0
+        self.tokens_per_second: float = llm_model.get("tokens_per_second") or 0
+        self.tokenizer: str = llm_model.get("tokenizer") or "words"
+        self.calls = 0
+        """The number of completions"""
+
+    def __reply(self, messages: List[dict]):
+        if self.replies:
+            reply = self.replies[self.calls % len(self.replies)]
+        else:
+            reply = messages[-1].get("content") or ""
+        self.calls += 1
+        if isinstance(reply, str):
+            return {"content": reply}
+        return reply
+
+    def __result(self, reply: dict, messages: List[dict], manifest: Manifest):
+        function_call = None
+        if reply.get("function_call"):
+            data = reply["function_call"]
+            arguments = data.get("arguments") or {}
+            function_call = FunctionCall(
+                {"name": data["name"], "arguments": json.dumps(arguments) if isinstance(arguments, dict) else arguments}, manifest
+            )
+        content = reply.get("content")
+        prompt_tokens = sum(self.num_tokens(message.get("content") or "") for message in messages)
+        completion_tokens = self.num_tokens(content or "")
+        token_usage = prompt_tokens + completion_tokens
+        span = current_span()
+        if span:
+            span.set_attribute("prompt_tokens", prompt_tokens)
+            span.set_attribute("completion_tokens", completion_tokens)
+            span.set_attribute("total_tokens", token_usage)
+        return ("assistant", content, function_call, token_usage)
+
+    def __tokens(self, content: str):
+        return re.findall(r"\S+\s*", content) or [content]
+
+    def __delay(self, content: str):
+        """Returns the seconds to generate the rest of the content (after the first token)"""
+        if self.tokens_per_second and content:
+            return (len(self.__tokens(content)) - 1) / self.tokens_per_second
+        return 0
+
+    def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        reply = self.__reply(messages)
+        delay = self.latency + self.__delay(reply.get("content"))
+        if delay > 0:
+            time.sleep(delay)
+        return self.__result(reply, messages, manifest)
+
+    async def chat_completion_async(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        reply = self.__reply(messages)
+        delay = self.latency + self.__delay(reply.get("content"))
+        if delay > 0:
+            await asyncio.sleep(delay)
+        return self.__result(reply, messages, manifest)
+
+    def chat_completion_stream(self, messages: List[dict], manifest: Manifest, verbose: bool, callback: Callable[[str], None]):
+        reply = self.__reply(messages)
+        if self.latency > 0:
+            time.sleep(self.latency)
+        content = reply.get("content")
+        if content:
+            for i, token in enumerate(self.__tokens(content)):
+                if i > 0 and self.tokens_per_second:
+                    time.sleep(1 / self.tokens_per_second)
+                callback(token)
+        return self.__result(reply, messages, manifest)
+
+    def num_tokens(self, text: str):
+        if self.tokenizer == "tiktoken":
+            return super().num_tokens(text)
+        return len(text.split())
@@ -1,14 +1,16 @@
 from __future__ import annotations
 
 import sys
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, Callable, List, Optional
 
-import tiktoken  # for counting tokens
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, OpenAI
 
 from slashgpt.function.function_call import FunctionCall
 from slashgpt.llms.engine.base import LLMEngineBase
+from slashgpt.utils.http_client import async_http_client, http_client
 from slashgpt.utils.print import print_debug, print_error
+from slashgpt.utils.trace import current_span
 
 if TYPE_CHECKING:
     from slashgpt.llms.model import LlmModel
@@ -22,20 +24,29 @@ class LLMEngineOpenAIGPT(LLMEngineBase):
         if key == "":
             print_error("OPENAI_API_KEY environment variable is missing from .env")
             sys.exit()
-        self.client = OpenAI(api_key=key)
-
         # Override default openai endpoint for custom-hosted models
+        # (it is passed to the constructor, because the setter modifies the shared HTTP client)
         api_base = llm_model.get_api_base()
-        if api_base:
-            self.client.base_url = api_base
+        self.client = OpenAI(api_key=key, base_url=api_base or None, http_client=http_client())
+        self.__async_client: Optional[AsyncOpenAI] = None
+        self.__async_http_client: Optional[httpx.AsyncClient] = None
 
         return
 
-    def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
+    def async_client(self) -> AsyncOpenAI:
+        """Returns the client for chat_completion_async (created on the first call, and per event loop)"""
+        http = async_http_client()
+        client = self.__async_client
+        if client is None or self.__async_http_client is not http:
+            client = AsyncOpenAI(api_key=self.client.api_key, base_url=self.client.base_url, http_client=http)
+            self.__async_http_client = http
+            self.__async_client = client
+        return client
+
+    def __params(self, messages: List[dict], manifest: Manifest, stream: bool):
         model_name = self.llm_model.name()
         temperature = manifest.temperature()
         functions = manifest.functions()
-        stream = manifest.stream()
         num_completions = manifest.num_completions()
         # LATER: logprobs is invalid with ChatCompletion API
         # logprobs = manifest.logprobs()
@@ -44,8 +55,24 @@ class LLMEngineOpenAIGPT(LLMEngineBase):
             params["functions"] = functions
             if manifest.get("function_call"):
                 params["function_call"] = dict(name=manifest.get("function_call"))
-        response = self.client.chat.completions.create(**params)
+        return params
+
+    def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        response = self.client.chat.completions.create(**self.__params(messages, manifest, False))
+        return self.__result(response, messages, manifest, verbose)
+
+    async def chat_completion_async(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        response = await self.async_client().chat.completions.create(**self.__params(messages, manifest, False))
+        return self.__result(response, messages, manifest, verbose)
+
+    def __result(self, response, messages: List[dict], manifest: Manifest, verbose: bool):
+        functions = manifest.functions()
         token_usage = response.usage.total_tokens
+        span = current_span()
+        if span:
+            span.set_attribute("prompt_tokens", response.usage.prompt_tokens)
+            span.set_attribute("completion_tokens", response.usage.completion_tokens)
+            span.set_attribute("total_tokens", token_usage)
 
         if verbose:
             print_debug(f"model={dict(response)['model']}")
@@ -63,11 +90,36 @@ class LLMEngineOpenAIGPT(LLMEngineBase):
 
         return (role, res, function_call, token_usage)
 
-    def __num_tokens(self, text: str):
-        model_name = self.llm_model.name()
-        encoding = tiktoken.encoding_for_model(model_name)
-        return len(encoding.encode(text))
+    def chat_completion_stream(self, messages: List[dict], manifest: Manifest, verbose: bool, callback: Callable[[str], None]):
+        functions = manifest.functions()
+        response = self.client.chat.completions.create(**self.__params(messages, manifest, True))
+
+        role = "assistant"
+        contents: List[str] = []
+        function_name = ""
+        arguments: List[str] = []
+        for chunk in response:
+            for choice in chunk.choices:
+                if choice.index != 0:
+                    continue  # other completions (num_completions > 1) are ignored as well as chat_completion
+                delta = choice.delta
+                if delta.role:
+                    role = delta.role
+                if delta.content:
+                    contents.append(delta.content)
+                    callback(delta.content)
+                if delta.function_call:
+                    # The name and the arguments of the function call arrive in pieces
+                    function_name += delta.function_call.name or ""
+                    arguments.append(delta.function_call.arguments or "")
+
+        if verbose:
+            print_debug(f"model={self.llm_model.name()} (stream)")
+        res = "".join(contents) or None
+
+        function_call = None
+        if functions is not None and function_name:
+            function_call = FunctionCall({"name": function_name, "arguments": "".join(arguments)}, manifest)
 
-    def is_within_budget(self, text: str, verbose: bool = False):
-        token_budget = self.llm_model.max_token() - 500
-        return self.__num_tokens(text) <= token_budget
+        # The usage is not available while streaming
+        return (role, res, function_call, None)
@@ -2,12 +2,13 @@ from __future__ import annotations
 
 import json
 import sys
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, Callable, List, Optional
 
-import tiktoken  # for counting tokens
-from openai import OpenAI
+import httpx
+from openai import AsyncOpenAI, OpenAI
 
 from slashgpt.llms.engine.base import LLMEngineBase
+from slashgpt.utils.http_client import async_http_client, http_client
 from slashgpt.utils.print import print_debug, print_error
 
 if TYPE_CHECKING:
@@ -22,31 +23,54 @@ class LLMEngineOpenAILegacy(LLMEngineBase):
         if key == "":
             print_error("OPENAI_API_KEY environment variable is missing from .env")
             sys.exit()
-        self.client = OpenAI(api_key=key)
-
         # Override default openai endpoint for custom-hosted models
+        # (it is passed to the constructor, because the setter modifies the shared HTTP client)
         api_base = llm_model.get_api_base()
-        if api_base:
-            self.client.base_url = api_base
+        self.client = OpenAI(api_key=key, base_url=api_base or None, http_client=http_client())
+        self.__async_client: Optional[AsyncOpenAI] = None
+        self.__async_http_client: Optional[httpx.AsyncClient] = None
 
         return
 
-    def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
+    def async_client(self) -> AsyncOpenAI:
+        """Returns the client for chat_completion_async (created on the first call, and per event loop)"""
+        http = async_http_client()
+        client = self.__async_client
+        if client is None or self.__async_http_client is not http:
+            client = AsyncOpenAI(api_key=self.client.api_key, base_url=self.client.base_url, http_client=http)
+            self.__async_http_client = http
+            self.__async_client = client
+        return client
+
+    def __params(self, messages: List[dict], manifest: Manifest, stream: bool):
         prompt = self.prompt_from_messages(messages, manifest)
-        params = dict(
+        return dict(
             model=self.llm_model.name(),
             prompt=prompt,
             temperature=manifest.temperature(),
-            stream=manifest.stream(),
+            stream=stream,
             n=manifest.num_completions(),
             logprobs=manifest.logprobs(),
-            max_tokens=self.llm_model.max_token() - self.__num_tokens(prompt),
+            max_tokens=self.llm_model.max_token() - self.num_tokens(prompt),
         )
 
+    def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        params = self.__params(messages, manifest, False)
+
         if verbose:
             print_debug(f"params={json.dumps(params, indent=2)}")
         response = self.client.completions.create(**params)
+        return self.__result(response, messages, manifest, verbose)
+
+    async def chat_completion_async(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        params = self.__params(messages, manifest, False)
 
+        if verbose:
+            print_debug(f"params={json.dumps(params, indent=2)}")
+        response = await self.async_client().completions.create(**params)
+        return self.__result(response, messages, manifest, verbose)
+
+    def __result(self, response, messages: List[dict], manifest: Manifest, verbose: bool):
         if verbose:
             print_debug(f"response={response}")
 
@@ -57,11 +81,23 @@ class LLMEngineOpenAILegacy(LLMEngineBase):
 
         return (role, res, function_call, None)
 
-    def __num_tokens(self, text: str):
-        model_name = self.llm_model.name()
-        encoding = tiktoken.encoding_for_model(model_name)
-        return len(encoding.encode(text))
+    def chat_completion_stream(self, messages: List[dict], manifest: Manifest, verbose: bool, callback: Callable[[str], None]):
+        params = self.__params(messages, manifest, True)
+
+        if verbose:
+            print_debug(f"params={json.dumps(params, indent=2)}")
+        response = self.client.completions.create(**params)
 
-    def is_within_budget(self, text: str, verbose: bool = False):
-        token_budget = self.llm_model.max_token() - 500
-        return self.__num_tokens(text) <= token_budget
+        texts: List[str] = []
+        for chunk in response:
+            for choice in chunk.choices:
+                if choice.index == 0 and choice.text:
+                    texts.append(choice.text)
+                    callback(choice.text)
+
+        res = "".join(texts)
+        function_call = self._extract_function_call(messages[-1], manifest, res) if manifest.functions() is not None else None
+
+        role = "assistant"
+
+        return (role, res, function_call, None)
@@ -3,13 +3,16 @@ from __future__ import annotations
 import importlib
 import inspect
 import os
-from typing import TYPE_CHECKING, List
+from typing import TYPE_CHECKING, Callable, List, Optional
 
 from slashgpt.utils.print import print_error
 
 if TYPE_CHECKING:
     from slashgpt.manifest import Manifest
 
+TOKENS_PER_MESSAGE = 4
+"""Tokens added to each message by the chat format (role and separators)"""
+
 
 class LlmModel:
     """It represents a LLM model such as Llama2 and GPT3.5"""
@@ -83,19 +86,46 @@ class LlmModel:
             print_error("No engine name: " + self.engine_name())
             return None
 
-    def generate_response(self, messages: List[dict], manifest: Manifest, verbose: bool):
+    def generate_response(self, messages: List[dict], manifest: Manifest, verbose: bool, callback: Optional[Callable[[str], None]] = None):
         """It calls the engine's chat_completion method
+        (or chat_completion_stream method if the manifest enables streaming and the callback is specified)
 
         Args:
 
             messages (list of dict): chat messages
             manifest (Manifest): it specifies the behavior of the LLM agent
             verbose (bool): True if it's in verbose mode.
+            callback (function, optional): called with each delta of the content while streaming
         """
+        if callback and manifest.stream():
+            return self.engine.chat_completion_stream(messages, manifest, verbose, callback)
         return self.engine.chat_completion(messages, manifest, verbose)
 
+    async def generate_response_async(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        """Async version of generate_response (it calls the engine's chat_completion_async method)
+
+        Args:
+
+            messages (list of dict): chat messages
+            manifest (Manifest): it specifies the behavior of the LLM agent
+            verbose (bool): True if it's in verbose mode.
+        """
+        return await self.engine.chat_completion_async(messages, manifest, verbose)
+
     def num_tokens(self, text: str):
         return self.engine.num_tokens(text)
 
+    def num_tokens_many(self, texts: List[str]):
+        """Returns the number of tokens of each text (list of int)"""
+        return self.engine.num_tokens_many(texts)
+
+    def num_message_tokens(self, message: dict):
+        """Returns the number of tokens of a chat message (role, content and name),
+        including the per-message overhead of the chat format (int)"""
+        tokens = TOKENS_PER_MESSAGE + self.num_tokens(message.get("content") or "")
+        if message.get("name"):
+            tokens += self.num_tokens(message["name"])
+        return tokens
+
     def is_within_budget(self, text: str, verbose: bool):
         return self.engine.is_within_budget(text, verbose)
@@ -0,0 +1,267 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+import time
+from abc import ABCMeta, abstractmethod
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Callable, Dict, List, Optional
+
+from slashgpt.function.function_call import FunctionCall
+from slashgpt.history.storage.utils import get_connection
+from slashgpt.utils.print import print_debug
+from slashgpt.utils.trace import current_span
+
+if TYPE_CHECKING:
+    from slashgpt.llms.model import LlmModel
+    from slashgpt.manifest import Manifest
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    data TEXT NOT NULL,
+    expires_at REAL,
+    accessed_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+SQL_SELECT = "SELECT data, expires_at FROM responses WHERE key = ?"
+SQL_TOUCH = "UPDATE responses SET accessed_at = ? WHERE key = ?"
+SQL_UPSERT = "INSERT OR REPLACE INTO responses (key, data, expires_at, accessed_at) VALUES (?, ?, ?, ?)"
+SQL_DELETE = "DELETE FROM responses WHERE key = ?"
+SQL_COUNT = "SELECT COUNT(*) FROM responses"
+SQL_EVICT = "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY accessed_at LIMIT ?)"
+SQL_CLEAR = "DELETE FROM responses"
+
+_caches: Dict[tuple, "ResponseCache"] = {}  # settings -> cache shared by sessions
+_lock = threading.Lock()
+
+
+class ResponseCacheBackend(metaclass=ABCMeta):
+    """Storage of cached responses (JSON serializable dict) with expiration and LRU eviction"""
+
+    def __init__(self, max_entries: int = 1024):
+        self.max_entries = max_entries
+        self.evictions = 0
+        """The number of entries evicted because the cache was full"""
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[dict]:
+        """Returns the entry (None if it does not exist or it is expired)"""
+        pass
+
+    @abstractmethod
+    def set(self, key: str, value: dict, expires_at: Optional[float]):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+    @abstractmethod
+    def __len__(self):
+        pass
+
+
+class MemoryCacheBackend(ResponseCacheBackend):
+    """In-memory LRU cache (in this process)"""
+
+    def __init__(self, max_entries: int = 1024):
+        super().__init__(max_entries)
+        self.__entries: OrderedDict = OrderedDict()  # key -> (value, expires_at), least recently used first
+        self.__lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[dict]:
+        with self.__lock:
+            entry = self.__entries.get(key)
+            if entry is None:
+                return None
+            if entry[1] is not None and entry[1] <= time.time():
+                del self.__entries[key]
+                return None
+            self.__entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key: str, value: dict, expires_at: Optional[float]):
+        with self.__lock:
+            self.__entries[key] = (value, expires_at)
+            self.__entries.move_to_end(key)
+            while len(self.__entries) > self.max_entries:
+                self.__entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self.__lock:
+            self.__entries.clear()
+
+    def __len__(self):
+        return len(self.__entries)
+
+
+class SQLiteCacheBackend(ResponseCacheBackend):
+    """LRU cache in a SQLite database, which is shared by processes and survives restarts"""
+
+    def __init__(self, db_path: str = "filememory/response_cache.sqlite3", max_entries: int = 10000):
+        """
+        Args:
+
+            db_path (str, optional): Location of the database file
+            max_entries (int, optional): Maximum number of entries
+        """
+        super().__init__(max_entries)
+        self.db_path = db_path
+
+    def __connection(self):
+        return get_connection(self.db_path, SCHEMA)
+
+    def get(self, key: str) -> Optional[dict]:
+        connection = self.__connection()
+        row = connection.execute(SQL_SELECT, (key,)).fetchone()
+        if row is None:
+            return None
+        if row[1] is not None and row[1] <= time.time():
+            connection.execute(SQL_DELETE, (key,))
+            return None
+        connection.execute(SQL_TOUCH, (time.time(), key))
+        return json.loads(row[0])
+
+    def set(self, key: str, value: dict, expires_at: Optional[float]):
+        connection = self.__connection()
+        connection.execute("BEGIN IMMEDIATE")
+        try:
+            connection.execute(SQL_UPSERT, (key, json.dumps(value, ensure_ascii=False), expires_at, time.time()))
+            excess = connection.execute(SQL_COUNT).fetchone()[0] - self.max_entries
+            if excess > 0:
+                connection.execute(SQL_EVICT, (excess,))
+                self.evictions += excess
+            connection.execute("COMMIT")
+        except Exception:
+            connection.execute("ROLLBACK")
+            raise
+
+    def clear(self):
+        self.__connection().execute(SQL_CLEAR)
+
+    def __len__(self):
+        return self.__connection().execute(SQL_COUNT).fetchone()[0]
+
+
+class ResponseCache:
+    """
+    Exact-match cache of LLM responses (including function calls), keyed on the model, the messages,
+    the functions, the temperature and the function_call of the manifest.
+    It is enabled by the "cache" property of the manifest (true or a dict):
+
+        backend (str, optional): "memory" (by default) or "sqlite"
+        path (str, optional): Location of the database file (sqlite)
+        ttl (float, optional): Seconds until entries expire (never by default)
+        max_entries (int, optional): Maximum number of entries (least recently used ones are evicted)
+
+    Sessions with the same settings share the cache in the process.
+    """
+
+    def __init__(self, backend: Optional[ResponseCacheBackend] = None, ttl: Optional[float] = None):
+        """
+        Args:
+
+            backend (ResponseCacheBackend, optional): Storage of entries (MemoryCacheBackend by default)
+            ttl (float, optional): Seconds until entries expire (never by default)
+        """
+        self.backend = backend if backend is not None else MemoryCacheBackend()
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0}
+        """Statistics (hits and misses, see also backend.evictions)"""
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def from_manifest(cls, manifest: Manifest) -> Optional[ResponseCache]:
+        """Returns the (shared) cache specified by the "cache" property of the manifest (optional)"""
+        value = manifest.cache()
+        if not value:
+            return None
+        if not isinstance(value, dict):
+            value = {}
+        settings = (value.get("backend") or "memory", value.get("path"), value.get("ttl"), value.get("max_entries"))
+        with _lock:
+            cache = _caches.get(settings)
+            if cache is None:
+                (backend, path, ttl, max_entries) = settings
+                if backend == "sqlite":
+                    cache = cls(SQLiteCacheBackend(path or "filememory/response_cache.sqlite3", max_entries or 10000), ttl)
+                else:
+                    cache = cls(MemoryCacheBackend(max_entries or 1024), ttl)
+                _caches[settings] = cache
+        return cache
+
+    def key(self, llm_model: LlmModel, messages: List[dict], manifest: Manifest) -> str:
+        """Returns the key of the request (sha256 of the canonical JSON)"""
+        request = {
+            "engine": llm_model.engine_name(),
+            "model": llm_model.name(),
+            "messages": [{key: message[key] for key in ("role", "content", "name") if message.get(key) is not None} for message in messages],
+            "functions": manifest.functions(),
+            "function_call": manifest.get("function_call"),
+            "temperature": manifest.temperature(),
+            "num_completions": manifest.num_completions(),
+        }
+        data = json.dumps(request, sort_keys=True, ensure_ascii=False, separators=(",", ":"), default=str)
+        return hashlib.sha256(data.encode("utf-8")).hexdigest()
+
+    def get(self, key: str, manifest: Manifest):
+        """Returns the cached response (role, res, function_call, token_usage), or None.
+        The token usage of a cached response is 0."""
+        value = self.backend.get(key)
+        with self.__lock:
+            self.stats["hits" if value else "misses"] += 1
+        if value is None:
+            return None
+        function_call = None
+        if value.get("function_call"):
+            data = value["function_call"]
+            function_call = FunctionCall({"name": data["name"], "arguments": json.dumps(data["arguments"], ensure_ascii=False)}, manifest)
+        return (value["role"], value["content"], function_call, 0)
+
+    def set(self, key: str, response: tuple):
+        """Stores the response (role, res, function_call, token_usage). Empty responses are not stored."""
+        (role, res, function_call, _) = response
+        if res is None and function_call is None:
+            return
+        value = {"role": role, "content": res, "function_call": function_call.to_dict() if function_call else None}
+        self.backend.set(key, value, time.time() + self.ttl if self.ttl else None)
+
+    def generate_response(
+        self, llm_model: LlmModel, messages: List[dict], manifest: Manifest, verbose: bool, callback: Optional[Callable[[str], None]] = None
+    ):
+        """Same as LlmModel.generate_response, but returns the cached response if it exists.
+        A cached content is sent to the callback (streaming) as a single delta."""
+        key = self.key(llm_model, messages, manifest)
+        response = self.__lookup(key, manifest, verbose)
+        if response is None:
+            response = llm_model.generate_response(messages, manifest, verbose, callback)
+            self.set(key, response)
+        elif callback and manifest.stream() and response[1]:
+            callback(response[1])
+        return response
+
+    async def generate_response_async(self, llm_model: LlmModel, messages: List[dict], manifest: Manifest, verbose: bool):
+        """Async version of generate_response"""
+        key = self.key(llm_model, messages, manifest)
+        response = self.__lookup(key, manifest, verbose)
+        if response is None:
+            response = await llm_model.generate_response_async(messages, manifest, verbose)
+            self.set(key, response)
+        return response
+
+    def __lookup(self, key: str, manifest: Manifest, verbose: bool):
+        response = self.get(key, manifest)
+        span = current_span()
+        if span:
+            span.set_attribute("cache", "hit" if response else "miss")
+        if verbose and response:
+            print_debug(f"response cache: hit ({self.stats})")
+        return response
+
+    def clear(self):
+        self.backend.clear()
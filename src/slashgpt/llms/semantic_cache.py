@@ -0,0 +1,294 @@
+from __future__ import annotations
+
+import asyncio
+import math
+import threading
+import time
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+from slashgpt.dbs.vector_engine import VectorEngine
+from slashgpt.dbs.vector_engine_openai import VectorEngineOpenAI
+from slashgpt.utils.print import print_debug, print_warning
+from slashgpt.utils.trace import current_span, span
+
+try:
+    import numpy as np
+
+    isLoadedNumpy = True
+except ImportError:
+    print("no numpy. pip install numpy (the semantic cache will be slow)")
+    isLoadedNumpy = False
+
+if TYPE_CHECKING:
+    from slashgpt.manifest import Manifest
+
+vector_engines = {"openai": VectorEngineOpenAI}
+"""Vector engines by engine_type (of the semantic cache and the embedding router)"""
+
+_caches: Dict[tuple, "SemanticCache"] = {}  # settings -> cache shared by sessions
+_lock = threading.Lock()
+
+
+def normalize(vector: List[float]):
+    """Returns the unit vector (numpy array, or list without numpy)"""
+    if isLoadedNumpy:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        return array / norm if norm else array
+    norm = math.sqrt(sum(x * x for x in vector))
+    return [x / norm for x in vector] if norm else list(vector)
+
+
+class SemanticIndex:
+    """Normalized vectors of questions and their answers (of a namespace), searched by the cosine similarity.
+    The least recently used entry is evicted when the index is full."""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.entries: List[Tuple[str, str, Optional[float]]] = []  # (question, answer, expires_at)
+        self.evictions = 0
+        self.__accessed: List[float] = []
+        self.__vectors: Any = None  # numpy matrix (capacity x dimensions), or list of vectors without numpy
+        self.version = 0
+        """Incremented on every change of the entries"""
+
+    def __len__(self):
+        return len(self.entries)
+
+    def snapshot(self) -> tuple:
+        """Returns the vectors (without copying the numpy matrix) and the version to be searched without the lock"""
+        count = len(self.entries)
+        if self.__vectors is None:
+            return (None, self.version)
+        vectors = self.__vectors[:count] if isLoadedNumpy else list(self.__vectors)
+        return (vectors, self.version)
+
+    def search(self, vector, snapshot: Optional[tuple] = None) -> Tuple[int, float]:
+        """Returns the index and the similarity of the nearest entry (-1 if empty)
+
+        Args:
+
+            vector: The normalized vector of the question
+            snapshot (tuple, optional): The snapshot to be searched (the current entries by default)
+        """
+        (vectors, _) = snapshot or self.snapshot()
+        if vectors is None or len(vectors) == 0:
+            return (-1, 0.0)
+        if isLoadedNumpy:
+            scores = vectors @ vector
+            index = int(np.argmax(scores))
+            return (index, float(scores[index]))
+        scores = [sum(x * y for x, y in zip(row, vector)) for row in vectors]
+        index = max(range(len(scores)), key=scores.__getitem__)
+        return (index, scores[index])
+
+    def touch(self, index: int):
+        self.__accessed[index] = time.monotonic()
+
+    def add(self, vector, question: str, answer: str, expires_at: Optional[float]):
+        count = len(self.entries)
+        if count >= self.max_entries:
+            index = min(range(count), key=self.__accessed.__getitem__)
+            self.evictions += 1
+            self.__set(index, vector, (question, answer, expires_at))
+            return
+        if isLoadedNumpy:
+            if self.__vectors is None or count == len(self.__vectors):
+                capacity = min(max(16, count * 2), self.max_entries)
+                vectors = np.zeros((capacity, len(vector)), dtype=np.float32)
+                if self.__vectors is not None:
+                    vectors[:count] = self.__vectors[:count]
+                self.__vectors = vectors
+        else:
+            if self.__vectors is None:
+                self.__vectors = []
+            self.__vectors.append(None)
+        self.entries.append((question, answer, expires_at))
+        self.__accessed.append(0.0)
+        self.__set(count, vector, (question, answer, expires_at))
+
+    def remove(self, index: int):
+        """Removes the entry (the last entry is moved to its place)"""
+        last = len(self.entries) - 1
+        if index != last:
+            self.__vectors[index] = self.__vectors[last]
+            self.entries[index] = self.entries[last]
+            self.__accessed[index] = self.__accessed[last]
+        if not isLoadedNumpy:
+            self.__vectors.pop()
+        self.entries.pop()
+        self.__accessed.pop()
+        self.version += 1
+
+    def __set(self, index: int, vector, entry: tuple):
+        self.version += 1
+        self.__vectors[index] = vector
+        self.entries[index] = entry
+        self.__accessed[index] = time.monotonic()
+
+
+class SemanticCache:
+    """
+    Cache of answers to similar questions, for FAQ-style agents whose answers do not depend on the earlier turns.
+    The last question from the user is embedded by the vector engine, and the answer to the most similar
+    cached question (per namespace, typically the agent) is returned if the similarity is above the threshold.
+    Only answers (not function calls) are cached. It is enabled by the "semantic_cache" property of the manifest (true or a dict):
+
+        engine_type (str, optional): Vector engine, which embeds questions ("openai" by default)
+        threshold (float, optional): Minimum cosine similarity of the cached question (0.95 by default)
+        max_entries (int, optional): Maximum number of entries per namespace (least recently used ones are evicted)
+        ttl (float, optional): Seconds until entries expire (never by default)
+        namespace (str, optional): Agents with the same namespace share answers (the agent name by default)
+    """
+
+    def __init__(self, vector_engine: VectorEngine, threshold: float = 0.95, max_entries: int = 10000, ttl: Optional[float] = None):
+        """
+        Args:
+
+            vector_engine (VectorEngine): It embeds questions (query_to_vector)
+            threshold (float, optional): Minimum cosine similarity of the cached question
+            max_entries (int, optional): Maximum number of entries per namespace
+            ttl (float, optional): Seconds until entries expire (never by default)
+        """
+        self.vector_engine = vector_engine
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.stats = {"hits": 0, "misses": 0}
+        """Statistics (hits and misses)"""
+        self.__indexes: Dict[str, SemanticIndex] = {}
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def from_manifest(cls, manifest: Manifest, verbose: bool = False) -> Optional[SemanticCache]:
+        """Returns the (shared) cache specified by the "semantic_cache" property of the manifest (optional)"""
+        value = manifest.semantic_cache()
+        if not value:
+            return None
+        if not isinstance(value, dict):
+            value = {}
+        settings = (value.get("engine_type") or "openai", value.get("threshold") or 0.95, value.get("max_entries") or 10000, value.get("ttl"))
+        with _lock:
+            cache = _caches.get(settings)
+            if cache is None:
+                engine = vector_engines.get(settings[0])
+                if engine is None:
+                    print_warning(f"semantic_cache: unknown engine_type {settings[0]}")
+                    return None
+                cache = cls(engine(verbose), *settings[1:])
+                _caches[settings] = cache
+        return cache
+
+    def index(self, namespace: str) -> SemanticIndex:
+        with self.__lock:
+            index = self.__indexes.get(namespace)
+            if index is None:
+                index = self.__indexes[namespace] = SemanticIndex(self.max_entries)
+            return index
+
+    def embed(self, question: str):
+        """Returns the normalized vector of the question"""
+        with span("embedding"):
+            return normalize(self.vector_engine.query_to_vector(question))
+
+    def lookup(self, namespace: str, vector) -> Optional[Tuple[str, float]]:
+        """Returns the cached answer and the similarity of its question (None if there is no similar question)"""
+        index = self.index(namespace)
+        with self.__lock:
+            snapshot = index.snapshot()
+        # The vectors are scored without the lock, and scored again under it only if the index was changed meanwhile
+        (i, similarity) = index.search(vector, snapshot)
+        with self.__lock:
+            if index.version != snapshot[1]:
+                (i, similarity) = index.search(vector)
+            answer = None
+            if i >= 0 and similarity >= self.threshold:
+                (_, answer, expires_at) = index.entries[i]
+                if expires_at is not None and expires_at <= time.time():
+                    index.remove(i)
+                    answer = None
+                else:
+                    index.touch(i)
+            self.stats["hits" if answer is not None else "misses"] += 1
+        return (answer, similarity) if answer is not None else None
+
+    def store(self, namespace: str, vector, question: str, answer: str):
+        index = self.index(namespace)
+        with self.__lock:
+            index.add(vector, question, answer, time.time() + self.ttl if self.ttl else None)
+
+    def generate_response(
+        self,
+        namespace: str,
+        messages: List[dict],
+        manifest: Manifest,
+        verbose: bool,
+        callback: Optional[Callable[[str], None]],
+        generate: Callable[[], tuple],
+    ):
+        """Returns the cached answer (with the token usage 0) to the last question, or the response from generate (and caches it)
+
+        Args:
+
+            namespace (str): The namespace (e.g, the agent name)
+            messages (list of dict): Chat messages (the last one is the question from the user)
+            manifest (Manifest): The manifest of the agent
+            verbose (bool): True if it's in verbose mode.
+            callback (function, optional): A cached answer is sent as a single delta while streaming
+            generate (function): It returns the response (role, res, function_call, token_usage) from the LLM
+        """
+        question = self.__question(messages)
+        if question is None:
+            return generate()
+        namespace = _namespace(manifest, namespace)
+        vector = self.embed(question)
+        response = self.__lookup(namespace, vector, verbose)
+        if response is not None:
+            if callback and manifest.stream():
+                callback(response[1])
+            return response
+        response = generate()
+        self.__store(namespace, vector, question, response)
+        return response
+
+    async def generate_response_async(
+        self, namespace: str, messages: List[dict], manifest: Manifest, verbose: bool, generate: Callable[[], Awaitable[tuple]]
+    ):
+        """Async version of generate_response (the question is embedded in a worker thread)"""
+        question = self.__question(messages)
+        if question is None:
+            return await generate()
+        namespace = _namespace(manifest, namespace)
+        vector = await asyncio.to_thread(self.embed, question)
+        response = self.__lookup(namespace, vector, verbose)
+        if response is not None:
+            return response
+        response = await generate()
+        self.__store(namespace, vector, question, response)
+        return response
+
+    def __question(self, messages: List[dict]):
+        if messages and messages[-1].get("role") == "user" and messages[-1].get("content"):
+            return messages[-1]["content"]
+        return None
+
+    def __lookup(self, namespace: str, vector, verbose: bool):
+        result = self.lookup(namespace, vector)
+        current = current_span()
+        if current:
+            current.set_attribute("cache", "semantic_hit" if result else "miss")
+        if result is None:
+            return None
+        if verbose:
+            print_debug(f"semantic cache: hit (similarity={result[1]:.3f}, {self.stats})")
+        return ("assistant", result[0], None, 0)
+
+    def __store(self, namespace: str, vector, question: str, response: tuple):
+        (_, res, function_call, _) = response
+        if res and function_call is None:
+            self.store(namespace, vector, question, res)
+
+
+def _namespace(manifest: Manifest, agent_name: str) -> str:
+    value = manifest.semantic_cache()
+    return (isinstance(value, dict) and value.get("namespace")) or agent_name
@@ -0,0 +1,89 @@
+import threading
+from collections import OrderedDict
+from typing import List
+
+import tiktoken  # for counting tokens
+
+DEFAULT_ENCODING = "cl100k_base"
+"""The encoding used for models unknown to tiktoken (e.g, Llama2 and PaLM)"""
+
+CACHE_SIZE = 4096
+"""Maximum number of cached token counts"""
+
+__encodings: dict = {}
+__encoding_names: dict = {}
+__lock = threading.Lock()
+
+__counts: OrderedDict = OrderedDict()
+__counts_lock = threading.Lock()
+
+
+def encoding_name(model_name: str) -> str:
+    """Returns the name of the encoding of the model (the default encoding if tiktoken does not know it)"""
+    name = __encoding_names.get(model_name)
+    if name is None:
+        try:
+            name = tiktoken.encoding_name_for_model(model_name or "")
+        except KeyError:
+            name = DEFAULT_ENCODING
+        __encoding_names[model_name] = name
+    return name
+
+
+def get_encoding(model_name: str) -> tiktoken.Encoding:
+    """Returns the encoding of the model, which is loaded only once per process"""
+    name = encoding_name(model_name)
+    encoding = __encodings.get(name)
+    if encoding is None:
+        with __lock:
+            encoding = __encodings.get(name)
+            if encoding is None:
+                encoding = tiktoken.get_encoding(name)
+                __encodings[name] = encoding
+    return encoding
+
+
+def __cached(key: tuple):
+    with __counts_lock:
+        count = __counts.get(key)
+        if count is not None:
+            __counts.move_to_end(key)
+        return count
+
+
+def __store(key: tuple, count: int):
+    with __counts_lock:
+        __counts[key] = count
+        if len(__counts) > CACHE_SIZE:
+            __counts.popitem(last=False)
+
+
+def num_tokens(model_name: str, text: str) -> int:
+    """Returns the number of tokens of the text (cached for repeated strings such as prompts and function definitions)"""
+    key = (encoding_name(model_name), text)
+    count = __cached(key)
+    if count is None:
+        count = len(get_encoding(model_name).encode_ordinary(text))
+        __store(key, count)
+    return count
+
+
+def num_tokens_many(model_name: str, texts: List[str]) -> List[int]:
+    """Returns the number of tokens of each text. Texts which are not cached are encoded in a batch."""
+    name = encoding_name(model_name)
+    counts = [__cached((name, text)) for text in texts]
+    missing = [i for i, count in enumerate(counts) if count is None]
+    if missing:
+        encoded = get_encoding(model_name).encode_ordinary_batch([texts[i] for i in missing])
+        for i, tokens in zip(missing, encoded):
+            counts[i] = len(tokens)
+            __store((name, texts[i]), len(tokens))
+    return counts
+
+
+def clear_cache():
+    """Clear the cached encodings and token counts"""
+    with __lock:
+        __encodings.clear()
+    with __counts_lock:
+        __counts.clear()
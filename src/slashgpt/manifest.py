@@ -1,8 +1,11 @@
+import hashlib
 import json
+import os
 import random
-import re
+import threading
+from collections import OrderedDict
 from datetime import datetime
-from typing import List, Optional
+from typing import Any, Dict, List, Optional, Set, Tuple
 
 from slashgpt.chat_config import ChatConfig
 from slashgpt.dbs.db_chroma import DBChroma
@@ -10,6 +13,7 @@ from slashgpt.dbs.db_pgvector import DBPgVector
 from slashgpt.dbs.db_pinecone import DBPinecone
 from slashgpt.dbs.vector_engine_openai import VectorEngineOpenAI
 from slashgpt.utils.print import print_debug, print_info, print_warning
+from slashgpt.utils.prompt_template import PromptTemplate
 
 __vector_dbs = {
     "pinecone": DBPinecone,
@@ -19,6 +23,207 @@ __vector_dbs = {
 
 __vector_engines = {"openai": VectorEngineOpenAI}
 
+_compiled: "OrderedDict[tuple, CompiledManifest]" = OrderedDict()  # (id of the manifest, base_dir) -> compiled manifest
+_lock = threading.Lock()
+MAX_COMPILED = 256
+"""Maximum number of compiled manifests (the least recently used ones are discarded)"""
+_preloaded: Dict[str, Tuple[int, int, str, str]] = {}  # absolute path -> (mtime, size, sha256, contents) of files from snapshots
+
+
+def file_digest(path: str) -> str:
+    """Returns the SHA-256 of the contents of the file (hex)"""
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class CompiledManifest:
+    """
+    Parts of a manifest definition which are expensive to prepare (the function definitions read from the file,
+    the joined prompt, the resource file and the module), shared by Manifest objects of the same definition.
+    The module is executed on the first call of get_module. It is recompiled when the functions, module or resource
+    file is modified. Manifest definitions (dict) are compiled by identity, so they should not be modified in place.
+    """
+
+    def __init__(self, manifest: dict, base_dir: str, file_signature: tuple):
+        """
+        Args:
+            manifest (dict): Manifest definition
+            base_dir (str): The base folder location
+            file_signature (tuple): Paths, mtimes and sizes of the files referred by the manifest (see signature)
+        """
+        self.manifest = manifest
+        self.base_dir = base_dir
+        self.file_signature = file_signature
+        """Paths, mtimes and sizes of the files referred by the manifest when it was compiled"""
+        self.stale = False
+        """True if it is discarded (Manifest objects compile the definition again)"""
+        self.functions: Optional[List[dict]] = self.__read_functions()
+        """Function definitions (list, optional)"""
+        self.prompt: Optional[str] = self.__join_prompt()
+        """Joined prompt, whose variables are not replaced yet (str, optional)"""
+        self.template: Optional[PromptTemplate] = PromptTemplate(self.prompt) if self.prompt else None
+        """Parsed prompt (PromptTemplate, optional)"""
+        self.__module: Optional[dict] = None
+        self.__resource: Optional[str] = None
+        self.__agents: Optional[Tuple[List[dict], str]] = None  # (manifests of agents, descriptions of agents)
+        self.__loaded: Set[str] = set()  # "module" and "resource" if they are loaded
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def get(cls, manifest: dict, base_dir: str) -> "CompiledManifest":
+        """Returns the compiled manifest, which is compiled only if it is new or its files are modified"""
+        signature = cls.signature(manifest, base_dir)
+        if not manifest:
+            # Nothing to prepare. Sessions without manifests pass new empty definitions, which should not fill the cache.
+            return cls(manifest, base_dir, signature)
+        key = (id(manifest), base_dir)
+        with _lock:
+            compiled = _compiled.get(key)
+            if compiled and compiled.manifest is manifest and compiled.file_signature == signature:
+                _compiled.move_to_end(key)
+                return compiled
+        compiled = cls(manifest, base_dir, signature)
+        with _lock:
+            _compiled[key] = compiled
+            _compiled.move_to_end(key)
+            while len(_compiled) > MAX_COMPILED:
+                _compiled.popitem(last=False)
+        return compiled
+
+    @classmethod
+    def signature(cls, manifest: dict, base_dir: str) -> tuple:
+        """Returns the signature of the files referred by the manifest (paths, mtimes and sizes)"""
+        signature: List[Tuple[str, Optional[int], Optional[int]]] = []
+        for key in ("functions", "module", "resource"):
+            value = manifest.get(key)
+            if value and isinstance(value, str):
+                path = os.path.abspath(f"{base_dir}/{value}")
+                try:
+                    stat = os.stat(path)
+                    signature.append((path, stat.st_mtime_ns, stat.st_size))
+                except OSError:
+                    signature.append((path, None, None))
+        return tuple(signature)
+
+    @classmethod
+    def invalidate(cls, manifest: Optional[dict] = None):
+        """Discard the compiled manifest of the definition (all compiled manifests if not specified)"""
+        cls.__discard(lambda compiled: manifest is None or compiled.manifest is manifest)
+
+    @classmethod
+    def invalidate_files(cls, paths: List[str]):
+        """Discard the compiled manifests which refer to any of the files (e.g, modified function definitions or modules)"""
+        absolute_paths = set(os.path.abspath(path) for path in paths)
+        cls.__discard(lambda compiled: any(signature[0] in absolute_paths for signature in compiled.file_signature))
+
+    @classmethod
+    def preload(cls, files: Dict[str, Tuple[int, int, str, str]]):
+        """Registers the contents of files (e.g, from a snapshot), which are used instead of reading the files
+        while they are not modified (the same mtime and size, or the same size and SHA-256 if the mtime is changed
+        by a checkout or an installation)
+
+        Args:
+            files (dict): absolute path -> (mtime in ns, size, sha256, contents)
+        """
+        with _lock:
+            _preloaded.update(files)
+
+    @classmethod
+    def __discard(cls, condition):
+        with _lock:
+            for key in [key for key, compiled in _compiled.items() if condition(compiled)]:
+                _compiled.pop(key).stale = True
+
+    def module(self) -> Optional[dict]:
+        """Returns the namespace of the module, which is executed on the first call (dict, optional)"""
+        with self.__lock:
+            if "module" not in self.__loaded:
+                self.__module = self.__read_module()
+                self.__loaded.add("module")
+            return self.__module
+
+    def resource(self) -> Optional[str]:
+        """Returns the contents of the resource file, which is read on the first call (str, optional)"""
+        with self.__lock:
+            if "resource" not in self.__loaded:
+                value = self.manifest.get("resource")
+                self.__resource = self.__read_file(value) if value else None
+                self.__loaded.add("resource")
+            return self.__resource
+
+    def agents(self, manifests: dict) -> str:
+        """Returns the descriptions of the agents, which are cached until any of their manifests is replaced (str)"""
+        names = self.manifest.get("agents") or []
+        definitions = [manifests[agent] for agent in names]
+        with self.__lock:
+            # Manifests are compared by identity, because the mapping is updated in place when the files are reloaded
+            if self.__agents is None or len(self.__agents[0]) != len(definitions) or any(a is not b for a, b in zip(self.__agents[0], definitions)):
+                descriptions = [f"{agent}: {definition.get('description')}" for agent, definition in zip(names, definitions)]
+                self.__agents = (definitions, "\n".join(descriptions))
+            return self.__agents[1]
+
+    def __read_functions(self):
+        value = self.manifest.get("functions")
+        if value:
+            # load a file if the location is specified
+            if isinstance(value, str):
+                value = json.loads(self.__read_file(value))
+            # validation
+            if value and isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict):
+                agents = self.manifest.get("agents")
+                # If agents are specified, inject their keys into the definition of categorize function.
+                if agents:
+                    # WARNING: It assumes that categorize(category, ...) function
+                    for function in value:
+                        if function.get("name") == "categorize":
+                            function["parameters"]["properties"]["category"]["enum"] = agents
+                return value
+            else:
+                print_debug("Invalid functions", value)
+
+        return None
+
+    """
+    Read Module
+    Read Python file if module is in manifest.
+    """
+
+    def __read_module(self):
+        module = self.manifest.get("module")
+        if module:
+            code = self.__read_file(module)
+            try:
+                namespace = {}
+                exec(code, namespace)
+                print(f" {module}")
+                return namespace
+            except ImportError:
+                print(f"Failed to import module: {module}")
+
+        return None
+
+    def __read_file(self, value: str) -> str:
+        path = os.path.abspath(f"{self.base_dir}/{value}")
+        preloaded = _preloaded.get(path)
+        if preloaded:
+            (mtime_ns, size, digest, contents) = preloaded
+            if (path, mtime_ns, size) in self.file_signature:
+                return contents
+            current = next((signature for signature in self.file_signature if signature[0] == path), None)
+            if current and current[2] == size and file_digest(path) == digest:
+                # Only the mtime is changed. It is checked by the mtime next time.
+                with _lock:
+                    _preloaded[path] = (current[1], size, digest, contents)
+                return contents
+        with open(f"{self.base_dir}/{value}", "r") as f:
+            return f.read()
+
+    def __join_prompt(self):
+        prompt = self.manifest.get("prompt")
+        if isinstance(prompt, list):
+            prompt = "\n".join(prompt)
+        return prompt
+
 
 class Manifest:
     """Manifest specifies the behavior of an LLM agent"""
@@ -34,8 +239,7 @@ class Manifest:
         """The base folder location"""
         self.__manifest = manifest
         self.__agent_name = agent_name
-        self.__module = self.__read_module()
-        self.__functions = self.__read_functions()
+        self.__compiled = CompiledManifest.get(manifest, base_dir)
 
     def get(self, key: str):
         """Returns the specified property of the manifest definition (str, dict or list)"""
@@ -79,6 +283,26 @@ class Manifest:
         """Returns the specified LLM model (str or dict)"""
         return self.get("model")
 
+    def context_window(self):
+        """Returns the context window settings (str, dict or bool, optional)"""
+        return self.get("context_window")
+
+    def summary(self):
+        """Returns the settings of the rolling summary of old messages (dict or bool, optional)"""
+        return self.get("summary")
+
+    def cache(self):
+        """Returns the settings of the response cache (dict or bool, optional)"""
+        return self.get("cache")
+
+    def semantic_cache(self):
+        """Returns the settings of the semantic cache of answers (dict or bool, optional)"""
+        return self.get("semantic_cache")
+
+    def router(self):
+        """Returns the settings of the embedding router of the dispatcher (dict or bool, optional)"""
+        return self.get("router")
+
     # NOTE: Let's keep it hidden until we implement it.
     def __history_type(self):
         """Returns the history type, which controls the behavior of history"""
@@ -88,114 +312,39 @@ class Manifest:
         """Returns the manifest definition (dict)"""
         return self.__manifest
 
+    def __current(self) -> CompiledManifest:
+        if self.__compiled.stale:
+            self.__compiled = CompiledManifest.get(self.__manifest, self.base_dir)
+        return self.__compiled
+
     def functions(self):
         """Returns function definitions (list)"""
-        return self.__functions
-
-    def __read_functions(self):
-        value = self.get("functions")
-        if value:
-            # load a file if the location is specified
-            if isinstance(value, str):
-                with open(self.base_dir + "/" + value, "r") as f:
-                    value = json.load(f)
-            # validation
-            if value and isinstance(value, list) and len(value) > 0 and isinstance(value[0], dict):
-                agents = self.get("agents")
-                # If agents are specified, inject their keys into the definition of categorize function.
-                if agents:
-                    # WARNING: It assumes that categorize(category, ...) function
-                    for function in value:
-                        if function.get("name") == "categorize":
-                            function["parameters"]["properties"]["category"]["enum"] = agents
-                return value
-            else:
-                print_debug("Invalid functions", value)
-
-        return None
-
-    """
-    Read Module
-    Read Python file if module is in manifest.
-    """
-
-    def __read_module(self):
-        module = self.get("module")
-        if module:
-            with open(f"{self.base_dir}/{module}", "r") as f:
-                try:
-                    code = f.read()
-                    namespace = {}
-                    exec(code, namespace)
-                    print(f" {module}")
-                    return namespace
-                except ImportError:
-                    print(f"Failed to import module: {module}")
-
-        return None
+        return self.__current().functions
 
     def get_module(self, function_name: str):
         """Returns the specified function of the dynamically loaded module (function)"""
-        return self.__module and self.__module.get(function_name) or None
-
-    def __read_prompt(self):
-        prompt = self.get("prompt")
-        if isinstance(prompt, list):
-            prompt = "\n".join(prompt)
-        if prompt:
-            if re.search("\\{now\\}", prompt):
-                time = datetime.now()
-                prompt = re.sub("\\{now\\}", time.strftime("%Y%m%dT%H%M%SZ"), prompt, 1)
-        return prompt
-
-    """
-    Read manifest data and shuffle data
-    """
-
-    def __get_random_manifest_data(self):
-        list_data = self.get("list")
-        if list_data:
-            # Shuffle
-            for i in range(len(list_data)):
-                j = random.randrange(0, len(list_data))
-                temp = list_data[i]
-                list_data[i] = list_data[j]
-                list_data[j] = temp
-            return list_data
-
-    def __replace_random(self, prompt, data):
-        j = 0
-        # TODO: fix array bounds bug
-        while re.search("\\{random\\}", prompt):
-            prompt = re.sub("\\{random\\}", data[j], prompt, 1)
-            j += 1
-        return prompt
-
-    def __replace_from_resource_file(self, prompt, resource_file_name):
-        with open(f"{self.base_dir}/{resource_file_name}", "r") as f:
-            contents = f.read()
-            return re.sub("\\{resource\\}", contents, prompt, 1)
+        module = self.__current().module()
+        return module and module.get(function_name) or None
 
     def prompt_data(self, manifests: dict = {}, memory: Optional[dict] = None):
         """Generate an appropriate prompt for a ChatSession (str)"""
-        prompt = self.__read_prompt()
-        agents = self.get("agents")
-        if prompt:
-            data = self.__get_random_manifest_data()
-            if data:
-                prompt = self.__replace_random(prompt, data)
-            resource = self.get("resource")
-            if resource:
-                prompt = self.__replace_from_resource_file(prompt, resource)
-            if agents:
-                prompt = self.__apply_agent(prompt, agents, manifests)
-            if memory is not None:
-                prompt = re.sub("\\{memory\\}", json.dumps(memory, ensure_ascii=False), prompt, 1)
-            return prompt
-
-    def __apply_agent(self, prompt: str, agents: List[str], manifests: dict = {}):
-        descriptions = [f"{agent}: {manifests[agent].get('description')}" for agent in agents]
-        return re.sub("\\{agents\\}", "\n".join(descriptions), prompt, 1)
+        template = self.__current().template
+        if template is None:
+            return None
+        values: Dict[str, Any] = {}
+        if "now" in template.placeholders:
+            values["now"] = datetime.now().strftime("%Y%m%dT%H%M%SZ")
+        data = self.get("list")
+        if data and "random" in template.placeholders:
+            data = random.sample(data, len(data))
+            values["random"] = [data[i % len(data)] for i in range(template.placeholders["random"])]
+        if self.get("resource") and "resource" in template.placeholders:
+            values["resource"] = self.__compiled.resource()
+        if self.get("agents") and "agents" in template.placeholders:
+            values["agents"] = self.__compiled.agents(manifests)
+        if memory is not None:
+            values["memory"] = json.dumps(memory, ensure_ascii=False)
+        return template.render(values)
 
     def format_question(self, question: str):
         """Format the question if the "form" property is specified in the manifest (str)"""
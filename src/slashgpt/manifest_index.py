@@ -0,0 +1,184 @@
+import json
+import os
+import threading
+from collections.abc import Mapping
+from typing import Dict, List, Optional
+
+import yaml
+
+from slashgpt.utils.print import print_error
+
+BROKEN: dict = {}  # placeholder of manifest files which failed to parse
+
+INDEX_FILE = "manifests.index"
+"""Name of the file in the manifests folder, which persists the title and description of each manifest file"""
+
+INDEX_VERSION = 1
+
+
+class ManifestEntry:
+    """A manifest file in the index, whose manifest definition is parsed on the first access"""
+
+    def __init__(self, name: str, path: str, mtime_ns: int, size: int):
+        self.name = name
+        self.path = path
+        self.mtime_ns = mtime_ns
+        self.size = size
+        self.manifest: Optional[dict] = None
+        """Manifest definition (None until parsed, BROKEN if failed)"""
+        self.title: Optional[str] = None
+        self.description: Optional[str] = None
+        self.described = False
+        """True if the title and the description are known (parsed, or read from the index file)"""
+
+    def signature(self):
+        return (self.path, self.mtime_ns, self.size)
+
+    def describe(self, manifest: dict):
+        self.title = manifest.get("title")
+        self.description = manifest.get("description")
+        self.described = True
+
+    def to_dict(self) -> dict:
+        """Returns the record of the index file"""
+        return {
+            "file": os.path.basename(self.path),
+            "mtime_ns": self.mtime_ns,
+            "size": self.size,
+            "title": self.title,
+            "description": self.description,
+        }
+
+
+class ManifestIndex(Mapping):
+    """
+    Read-only mapping of the manifests in a folder (name -> manifest definition), which lists the .json/.yml files
+    with their mtimes and sizes, and parses a manifest only on its first access. Creating an index costs a directory
+    scan, independent of the size of the manifests. An index created with the previous index of the same folder
+    reuses the manifests whose files are not modified (the same dict objects).
+    The titles and descriptions (see summary) are persisted in the index file of the folder (INDEX_FILE),
+    so that listing agents does not parse the manifests whose files are not modified.
+    Broken manifests are not in the mapping, so iterating it (keys, values, items or len) parses all the manifests,
+    while the file names are available in entries without parsing.
+    """
+
+    def __init__(self, path: str, previous: Optional["ManifestIndex"] = None):
+        """
+        Args:
+
+            path (str): path to the manifests folder (json or yaml)
+            previous (ManifestIndex, optional): The previous index of the folder, whose parsed manifests are reused
+        """
+        self.path = path
+        """Location of the folder"""
+        self.entries: Dict[str, ManifestEntry] = self.__scan(path, previous)
+        """Manifest files by name"""
+        self.__lock = threading.Lock()
+
+    @classmethod
+    def __scan(cls, path: str, previous: Optional["ManifestIndex"]) -> Dict[str, ManifestEntry]:
+        entries = {}
+        records = cls.__read_index(path)
+        with os.scandir(path) as files:
+            for file in files:
+                if file.name.endswith(".json") or file.name.endswith(".yml"):
+                    stat = file.stat()
+                    entry = ManifestEntry(file.name.split(".")[0], f"{path}/{file.name}", stat.st_mtime_ns, stat.st_size)
+                    old = previous.entries.get(entry.name) if previous else None
+                    record = records.get(file.name)
+                    if old and old.signature() == entry.signature():
+                        entry.manifest = old.manifest
+                        (entry.title, entry.description, entry.described) = (old.title, old.description, old.described)
+                    elif record and (record.get("mtime_ns"), record.get("size")) == (entry.mtime_ns, entry.size):
+                        (entry.title, entry.description, entry.described) = (record.get("title"), record.get("description"), True)
+                    entries[entry.name] = entry
+        return entries
+
+    @classmethod
+    def __read_index(cls, path: str) -> Dict[str, dict]:
+        """Returns the records of the index file by file name (empty if it does not exist, or it is invalid)"""
+        try:
+            with open(f"{path}/{INDEX_FILE}", "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == INDEX_VERSION:
+                return {record["file"]: record for record in data["entries"]}
+        except (OSError, ValueError, KeyError, TypeError, AttributeError):
+            pass
+        return {}
+
+    def save(self):
+        """Writes the titles and descriptions of the manifests to the index file (ignored if the folder is read-only)"""
+        records = [entry.to_dict() for entry in self.entries.values() if entry.described]
+        try:
+            with open(f"{self.path}/{INDEX_FILE}.tmp", "w", encoding="utf-8") as f:
+                json.dump({"version": INDEX_VERSION, "entries": records}, f, ensure_ascii=False)
+            os.replace(f"{self.path}/{INDEX_FILE}.tmp", f"{self.path}/{INDEX_FILE}")
+        except OSError:
+            pass
+
+    def __getitem__(self, name: str) -> dict:
+        entry = self.entries[name]
+        if entry.manifest is None:
+            with self.__lock:
+                if entry.manifest is None:
+                    manifest = self.__parse(entry)
+                    if manifest is not BROKEN:
+                        entry.describe(manifest)
+                    entry.manifest = manifest
+        if entry.manifest is BROKEN:
+            raise KeyError(name)
+        return entry.manifest
+
+    def __iter__(self):
+        # Broken manifests are skipped (consistent with __getitem__), so the manifests are parsed
+        return (name for name in list(self.entries) if self.get(name) is not None)
+
+    def __len__(self):
+        return sum(1 for _ in self)
+
+    def __contains__(self, name) -> bool:
+        # Broken manifests are not contained (consistent with __getitem__), so the manifest is parsed
+        return self.get(name) is not None
+
+    @classmethod
+    def __parse(cls, entry: ManifestEntry) -> dict:
+        with open(entry.path, "r", encoding="utf-8") as f:  # encoding add for Win
+            try:
+                manifest = json.load(f) if entry.path.endswith(".json") else yaml.safe_load(f)
+                if not isinstance(manifest, dict):
+                    raise ValueError("not a dict")
+                return manifest
+            except Exception:
+                print_error(os.path.basename(entry.path) + " is broken")
+                return BROKEN
+
+    def items(self):
+        """Returns (name, manifest) of the manifests except broken ones (parsing all of them)"""
+        return [(name, manifest) for name, manifest in ((name, self.get(name)) for name in list(self.entries)) if manifest is not None]
+
+    def values(self):
+        return [manifest for (_, manifest) in self.items()]
+
+    def parsed(self) -> List[str]:
+        """Returns the names of the manifests which are already parsed"""
+        return [name for name, entry in self.entries.items() if entry.manifest is not None]
+
+    def load_all(self) -> dict:
+        """Parses all the manifests, and returns them except broken ones (dict)"""
+        return dict(self.items())
+
+    def summary(self) -> List[dict]:
+        """Returns the name, title, description and mtime of each manifest except broken ones (list of dict).
+        Only the manifests which are not in the index file (new or modified ones) are parsed, and the index file is updated."""
+        summary = []
+        described = True
+        for name, entry in list(self.entries.items()):
+            if not entry.described:
+                # Broken manifests are never described, and they are not in the index file
+                if self.get(name) is None:
+                    continue
+                described = False
+            summary.append({"name": name, "title": entry.title, "description": entry.description, "mtime": entry.mtime_ns / 1e9})
+        if not described:
+            self.save()
+        return summary
@@ -0,0 +1,126 @@
+import hashlib
+import os
+import pickle
+from typing import Dict, Optional
+
+from slashgpt.manifest import CompiledManifest, file_digest
+from slashgpt.manifest_index import ManifestIndex
+from slashgpt.utils.print import print_warning
+
+SNAPSHOT_FILE = "manifests.snapshot"
+"""Name of the snapshot file in the manifests folder"""
+
+SNAPSHOT_VERSION = 2
+"""Version of the snapshot format (snapshots of other versions are ignored)"""
+
+MAGIC = b"SLASHGPT-SNAPSHOT\n"
+
+REFERENCES = ["functions", "module", "resource"]
+"""Properties of manifests which refer to files (relative to the base path)"""
+
+
+def snapshot_path(path_manifests: str) -> str:
+    return f"{path_manifests}/{SNAPSHOT_FILE}"
+
+
+def build_snapshot(base_path: str, path_manifests: str) -> dict:
+    """Compiles the manifests in the folder and the files referred by them into the snapshot file, and returns its contents.
+    Broken manifests are not included (they are parsed from the source).
+
+    Args:
+
+        base_path (str): path to the "base" folder (manifests refer to files relative to it)
+        path_manifests (str): path to the manifests folder (json or yaml)
+    """
+    index = ManifestIndex(path_manifests)
+    manifests = {}
+    files = {}
+    for name, manifest in index.items():
+        entry = index.entries[name]
+        manifests[name] = {
+            "file": os.path.basename(entry.path),
+            "mtime_ns": entry.mtime_ns,
+            "size": entry.size,
+            "sha256": file_digest(entry.path),
+            "manifest": manifest,
+        }
+        for key in REFERENCES:
+            value = manifest.get(key)
+            if value and isinstance(value, str) and value not in files and os.path.isfile(f"{base_path}/{value}"):
+                stat = os.stat(f"{base_path}/{value}")
+                with open(f"{base_path}/{value}", "r") as f:
+                    contents = f.read()
+                files[value] = {
+                    "mtime_ns": stat.st_mtime_ns,
+                    "size": stat.st_size,
+                    "sha256": file_digest(f"{base_path}/{value}"),
+                    "contents": contents,
+                }
+    snapshot = {"version": SNAPSHOT_VERSION, "manifests": manifests, "files": files}
+    payload = pickle.dumps(snapshot, protocol=pickle.HIGHEST_PROTOCOL)
+    with open(snapshot_path(path_manifests), "wb") as f:
+        f.write(MAGIC + hashlib.sha256(payload).hexdigest().encode() + b"\n" + payload)
+    return snapshot
+
+
+def load_snapshot(path_manifests: str) -> Optional[dict]:
+    """Returns the contents of the snapshot file of the folder (None if it does not exist, or it is invalid)
+
+    Snapshots are pickled, so load only snapshots built by yourself.
+    """
+    path = snapshot_path(path_manifests)
+    if not os.path.isfile(path):
+        return None
+    with open(path, "rb") as f:
+        data = f.read()
+    header = len(MAGIC) + 65  # magic, sha256 (hex) and newline
+    payload = data[header:]
+    if not data.startswith(MAGIC) or data[len(MAGIC) : header - 1] != hashlib.sha256(payload).hexdigest().encode():
+        print_warning(f"{path} is broken")
+        return None
+    snapshot = pickle.loads(payload)
+    if not isinstance(snapshot, dict) or snapshot.get("version") != SNAPSHOT_VERSION:
+        print_warning(f"{path} is not compatible (rebuild it)")
+        return None
+    return snapshot
+
+
+def apply_snapshot(index: ManifestIndex, snapshot: dict, base_path: str) -> int:
+    """Fills the index with the manifests of the snapshot whose files are not modified (the rest are parsed from the source),
+    registers the files referred by them, and returns the number of manifests from the snapshot.
+    A file is not modified if its mtime and size are the same, or (if the mtime is changed by a git checkout or
+    an installation) its size and SHA-256 are the same.
+
+    Args:
+
+        index (ManifestIndex): The index of the manifests folder (not parsed yet)
+        snapshot (dict): The contents of the snapshot
+        base_path (str): path to the "base" folder
+    """
+    count = 0
+    for name, compiled in snapshot["manifests"].items():
+        entry = index.entries.get(name)
+        if (
+            entry
+            and entry.manifest is None
+            and os.path.basename(entry.path) == compiled["file"]
+            and is_fresh(entry.path, entry.mtime_ns, entry.size, compiled)
+        ):
+            entry.manifest = compiled["manifest"]
+            entry.describe(compiled["manifest"])
+            count += 1
+    files: Dict[str, tuple] = {}
+    for value, file in snapshot["files"].items():
+        files[os.path.abspath(f"{base_path}/{value}")] = (file["mtime_ns"], file["size"], file["sha256"], file["contents"])
+    CompiledManifest.preload(files)
+    return count
+
+
+def is_fresh(path: str, mtime_ns: int, size: int, compiled: dict) -> bool:
+    """Returns True if the file is the same as the one in the snapshot (compared by the mtime first, then by the contents)"""
+    if (mtime_ns, size) == (compiled["mtime_ns"], compiled["size"]):
+        return True
+    try:
+        return size == compiled["size"] and file_digest(path) == compiled["sha256"]
+    except OSError:
+        return False
@@ -0,0 +1,156 @@
+import os
+import threading
+from typing import List, Optional
+
+from slashgpt.chat_config_with_manifests import ChatConfigWithManifests
+from slashgpt.manifest import CompiledManifest
+from slashgpt.utils.print import print_debug, print_warning
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+
+    isLoadedWatchdog = True
+except ImportError:
+    print("no watchdog. pip install watchdog if you need (the watcher polls the folders)")
+    isLoadedWatchdog = False
+
+RESOURCE_FOLDERS = ["resources/functions", "resources/module"]
+"""Folders (relative to the base path) of the files referred by manifests, which are watched by default"""
+
+
+def folder_signature(path: str) -> dict:
+    """Returns the mtime and size of each file in the folder (path -> (mtime, size), empty if the folder does not exist)"""
+    signature = {}
+    try:
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    signature[os.path.abspath(entry.path)] = (stat.st_mtime_ns, stat.st_size)
+    except FileNotFoundError:
+        pass
+    return signature
+
+
+def manifest_files(signature: dict) -> dict:
+    """Returns the signature of the manifest files (e.g, without the index file and the snapshot)"""
+    return {path: value for path, value in signature.items() if path.endswith(".json") or path.endswith(".yml")}
+
+
+def changed_files(old: dict, new: dict) -> List[str]:
+    """Returns the files which are added, removed or modified"""
+    return sorted(path for path in old.keys() | new.keys() if old.get(path) != new.get(path))
+
+
+class ManifestWatcher:
+    """
+    Watcher of the manifests folder of a config and the resource folders (function definitions and modules),
+    which updates the manifests of the config incrementally (only added or modified files are parsed again), and
+    discards the compiled manifests which refer to modified resource files (sessions compile them again on their next use).
+    The folders are polled by a background thread, which is woken up by file system events (inotify, FSEvents, etc.)
+    if watchdog is installed. Call check() to apply the changes synchronously.
+    """
+
+    def __init__(self, config: ChatConfigWithManifests, interval: float = 1.0, resource_folders: Optional[List[str]] = None):
+        """
+        Args:
+
+            config (ChatConfigWithManifests): The config to be updated
+            interval (float, optional): Interval in seconds between polls
+            resource_folders (list of str, optional): Folders (relative to the base path) of the files referred by manifests
+        """
+        self.config = config
+        self.interval = interval
+        self.resource_folders = [f"{config.base_path}/{folder}" for folder in (RESOURCE_FOLDERS if resource_folders is None else resource_folders)]
+        self.stats = {"reloads": 0, "invalidated": 0}
+        """Statistics (reloads of the manifests and modified resource files)"""
+        self.__path_manifests = config.path_manifests
+        self.__manifests = manifest_files(folder_signature(config.path_manifests))
+        self.__resources = {folder: folder_signature(folder) for folder in self.resource_folders}
+        self.__lock = threading.Lock()
+        self.__wakeup = threading.Event()
+        self.__stopped = threading.Event()
+        self.__thread: Optional[threading.Thread] = None
+        self.__observer = None
+
+    def check(self) -> bool:
+        """Applies the changes since the last check, and returns True if anything is changed"""
+        with self.__lock:
+            changed = False
+            path_manifests = self.config.path_manifests
+            signature = manifest_files(folder_signature(path_manifests))
+            if path_manifests != self.__path_manifests:
+                # The config switched the manifests folder (and loaded it)
+                self.__path_manifests = path_manifests
+                self.__rewatch()
+            elif changed_files(self.__manifests, signature):
+                self.config.reload()
+                self.stats["reloads"] += 1
+                changed = True
+            self.__manifests = signature
+            for folder in self.resource_folders:
+                signature = folder_signature(folder)
+                files = changed_files(self.__resources[folder], signature)
+                if files:
+                    CompiledManifest.invalidate_files(files)
+                    self.stats["invalidated"] += len(files)
+                    changed = True
+                self.__resources[folder] = signature
+            if changed and self.config.verbose:
+                print_debug(f"watcher: {self.stats}")
+            return changed
+
+    def start(self) -> "ManifestWatcher":
+        """Starts watching in the background"""
+        if self.__thread is None:
+            self.__stopped.clear()
+            self.__observe()
+            self.__thread = threading.Thread(target=self.__run, name="ManifestWatcher", daemon=True)
+            self.__thread.start()
+        return self
+
+    def stop(self):
+        """Stops watching"""
+        self.__stopped.set()
+        self.__wakeup.set()
+        if self.__observer is not None:
+            self.__observer.stop()
+            self.__observer = None
+        if self.__thread is not None:
+            self.__thread.join()
+            self.__thread = None
+
+    def __run(self):
+        while not self.__stopped.is_set():
+            self.__wakeup.wait(self.interval)
+            self.__wakeup.clear()
+            if self.__stopped.is_set():
+                break
+            try:
+                self.check()
+            except Exception as e:
+                print_warning(f"watcher: {e}")
+
+    def __observe(self):
+        if not isLoadedWatchdog:
+            return
+        wakeup = self.__wakeup
+
+        class Handler(FileSystemEventHandler):
+            def on_any_event(self, event):
+                wakeup.set()
+
+        observer = Observer()
+        for folder in [self.__path_manifests] + self.resource_folders:
+            if os.path.isdir(folder):
+                observer.schedule(Handler(), folder)
+        observer.daemon = True
+        observer.start()
+        self.__observer = observer
+
+    def __rewatch(self):
+        if self.__observer is not None:
+            self.__observer.stop()
+            self.__observer = None
+            self.__observe()
@@ -0,0 +1,115 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional
+
+from slashgpt.chat_session import ChatSession
+
+
+class SessionPool:
+    """
+    Bounded LRU pool of live ChatSession objects (e.g, for servers), which saves restoring sessions from the storage
+    (and rendering the prompt and loading manifest modules) on each turn.
+    Changes are written through to the history storage as usual, so that an evicted session is simply restored next time.
+
+    A session is checked out while it handles a request, and checked in after it, so that it is never shared by
+    concurrent requests. Sessions are evicted when the pool is full (least recently used first) or idle for idle_ttl seconds.
+    """
+
+    def __init__(self, max_sessions: int = 256, idle_ttl: float = 1800.0):
+        """
+        Args:
+
+            max_sessions (int, optional): Maximum number of pooled sessions
+            idle_ttl (float, optional): Sessions idle for longer than this (in seconds) are evicted
+        """
+        self.max_sessions = max_sessions
+        self.idle_ttl = idle_ttl
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0}
+        """Statistics (hits, misses and evictions)"""
+        self.__entries: OrderedDict = OrderedDict()  # key -> (session, tag, checked_in_at), least recently used first
+        self.__lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    @classmethod
+    def tag(cls, config: Any, agent_name: str, manifest: dict, llm: Any = None) -> tuple:
+        """Returns the tag of a session created with the config, the manifest definition of the agent and the LLM.
+        The manifest definition is compared by identity, so sessions created before the manifest file was reloaded
+        (e.g, by the watcher, which replaces the definition in the same config) are discarded."""
+        return (config, agent_name, llm, id(manifest))
+
+    def checkout(self, key: Hashable, tag: Any = None) -> Optional[ChatSession]:
+        """Removes the session from the pool and returns it (None if it is not pooled)
+
+        Args:
+
+            key (Hashable): Key of the session (e.g, the session id)
+            tag (Any, optional): It describes how the session was created (e.g, the config and the LLM).
+                A session checked in with another tag is discarded.
+        """
+        evicted = []
+        with self.__lock:
+            evicted += self.__evict_idle(time.monotonic())
+            entry = self.__entries.pop(key, None)
+            if entry and entry[1] != tag:
+                evicted.append(entry[0])
+                entry = None
+            self.stats["hits" if entry else "misses"] += 1
+        self.__close(evicted)
+        return entry[0] if entry else None
+
+    def checkin(self, key: Hashable, session: ChatSession, tag: Any = None):
+        """Puts the session (back) into the pool
+
+        Args:
+
+            key (Hashable): Key of the session (e.g, the session id)
+            session (ChatSession): The session
+            tag (Any, optional): It describes how the session was created (see checkout)
+        """
+        evicted = []
+        with self.__lock:
+            now = time.monotonic()
+            evicted += self.__evict_idle(now)
+            entry = self.__entries.pop(key, None)
+            if entry:
+                # The session was restored and used by concurrent requests. Neither of them may have all the changes.
+                evicted += [entry[0], session]
+            else:
+                self.__entries[key] = (session, tag, now)
+                while len(self.__entries) > self.max_sessions:
+                    evicted.append(self.__entries.popitem(last=False)[1][0])
+        self.__close(evicted)
+
+    def discard(self, key: Optional[Hashable] = None):
+        """Evict the session (all sessions if not specified)"""
+        with self.__lock:
+            if key is None:
+                evicted = [entry[0] for entry in self.__entries.values()]
+                self.__entries.clear()
+            else:
+                entry = self.__entries.pop(key, None)
+                evicted = [entry[0]] if entry else []
+        self.__close(evicted)
+
+    def __evict_idle(self, now: float):
+        evicted = []
+        while self.__entries:
+            (key, (session, _, checked_in_at)) = next(iter(self.__entries.items()))
+            if now - checked_in_at < self.idle_ttl:
+                break
+            del self.__entries[key]
+            evicted.append(session)
+        return evicted
+
+    def __close(self, sessions: list):
+        if sessions:
+            with self.__lock:
+                self.stats["evictions"] += len(sessions)
+        for session in sessions:
+            # Write pending changes of write-behind storages
+            close = getattr(session.history.repository, "close", None)
+            if close:
+                close()
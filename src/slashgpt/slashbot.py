@@ -3,12 +3,9 @@
 #  git show -U9999 {commits} | python -m samples.CodeReview
 
 import argparse
-import json
 import os
 import sys
 
-import yaml
-
 from slashgpt import ChatConfigWithManifests, ChatSession  # noqa: E402
 
 
@@ -28,28 +25,20 @@ def run_bot(base_dir: str = ""):
     current_dir = directory if directory else base_dir if base_dir != "" else os.path.dirname(__file__)
     manifests_dir = current_dir + "/manifests/" + manifests
 
-    config = ChatConfigWithManifests(current_dir, manifests_dir)
+    # Only the manifest of the agent is parsed (or loaded from the snapshot built by build_snapshot.py)
+    config = ChatConfigWithManifests(current_dir, manifests_dir, lazy=True)
     if args.list:
         print("Manifest list")
-        for manifest_key in config.manifests.keys():
-            manifest = config.manifests[manifest_key]
-            print(manifest_key + ": " + manifest.get("title", "") + " - " + manifest.get("description", ""))
+        for entry in config.index.summary():
+            print(entry["name"] + ": " + (entry["title"] or "") + " - " + (entry["description"] or ""))
         return
 
     agent = args.agentname
-    agent_file = manifests_dir + "/" + agent
-
-    if os.path.isfile(agent_file + ".yml"):
-        agent_file = agent_file + ".yml"
-        with open(agent_file, "r") as f:
-            session = ChatSession(config, manifest=yaml.safe_load(f), agent_name=agent)
-    elif os.path.isfile(agent_file + ".json"):
-        agent_file = agent_file + ".json"
-        with open(agent_file, "r") as f:
-            session = ChatSession(config, manifest=json.load(f), agent_name=agent)
-    else:
-        print(agent_file + " (json or yml) file not exists")
+    manifest = config.manifests.get(agent)
+    if manifest is None:
+        print(manifests_dir + "/" + agent + " (json or yml) file not exists")
         return
+    session = ChatSession(config, manifest=manifest, agent_name=agent)
 
     question = ""
     for line in iter(sys.stdin.readline, ""):
@@ -11,7 +11,8 @@ LONG_HELP = """
 /functions: Display the functions
 /samples:   Show available samples
 /sample*:   Make a sample request (sample {agent} for a sub-agent sample)
-/reload:    Reload manifest set
+/reload:    Reload manifest set (only added or modified manifests)
+/watch:     Toggle watching manifests, functions and modules (applied as they are modified)
 /llm gpt3:      Switch the model to gpt-3.5-turbo-0613
 /llm gpt31:     Switch the model to gpt-3.5-turbo-16k-0613
 /llm gpt4:      Switch the model to gpt-4-0613
@@ -19,7 +20,7 @@ LONG_HELP = """
 /llm llama2:    Switch the model to LlaMA2 7b
 /llm llama270:  Switch the model to LlaMA2 70b
 /llm vicuna:    Switch the model to Vicuna 16b
-/verbose:   Toggle verbose switch
+/verbose:   Toggle verbose switch (it also prints the timing waterfall of each turn)
 """
 
 ONELINE_HELP = "System Slashes: /switch, /bye, /new, /prompt, /sample, /help, ..."
@@ -0,0 +1,34 @@
+import asyncio
+import threading
+import weakref
+
+import httpx
+
+HTTP_TIMEOUT = httpx.Timeout(600.0, connect=10.0)
+"""Timeout of HTTP requests (LLMs may take minutes to respond)"""
+
+HTTP_LIMITS = httpx.Limits(max_connections=1000, max_keepalive_connections=100)
+"""Connection pool limits, which allow hundreds of concurrent conversations"""
+
+__client = None
+__lock = threading.Lock()
+__async_clients: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def http_client() -> httpx.Client:
+    """Returns the HTTP client shared by the process (connections are pooled across sessions)"""
+    global __client
+    with __lock:
+        if __client is None:
+            __client = httpx.Client(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS, follow_redirects=True)
+        return __client
+
+
+def async_http_client() -> httpx.AsyncClient:
+    """Returns the async HTTP client shared by the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = __async_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS, follow_redirects=True)
+        __async_clients[loop] = client
+    return client
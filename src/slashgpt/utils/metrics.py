@@ -0,0 +1,219 @@
+import bisect
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from slashgpt.utils.trace import Span, SpanExporter
+
+# Metrics in the Prometheus text format (no dependency on prometheus_client).
+# MetricsExporter turns the spans of slashgpt.utils.trace into the metrics of LLM calls, tokens,
+# function calls, history writes and errors:
+#
+#   metrics = MetricsRegistry()
+#   add_exporter(MetricsExporter(metrics))
+#   ...
+#   metrics.render()
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+"""Buckets of latency histograms in seconds"""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple, extra: str = "") -> str:
+    labels = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        labels.append(extra)
+    return "{" + ",".join(labels) + "}" if labels else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric:
+    type = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> Tuple:
+        return tuple(labels.get(name, "") for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.type}"]
+        with self._lock:
+            items = sorted(self._values.items())
+        for key, value in items:
+            lines += self._samples(key, value)
+        return lines
+
+    def _samples(self, key: Tuple, value) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"]
+
+
+class Counter(_Metric):
+    """A value which only increases (e.g, the number of tokens)"""
+
+    type = "counter"
+
+    def inc(self, value: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+
+class Gauge(_Metric):
+    """A value which goes up and down (e.g, the number of pooled sessions)"""
+
+    type = "gauge"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()):
+        super().__init__(name, documentation, labelnames)
+        self.__function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, value: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + value
+
+    def dec(self, value: float = 1, **labels):
+        self.inc(-value, **labels)
+
+    def get(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def set_function(self, function: Callable[[], float]):
+        """The value is read by calling the function when the metrics are rendered"""
+        self.__function = function
+
+    def render(self) -> List[str]:
+        if self.__function:
+            self.set(self.__function())
+        return super().render()
+
+
+class Histogram(_Metric):
+    """Distribution of observed values (e.g, latency)"""
+
+    type = "histogram"
+
+    def __init__(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            data = self._values.get(key)
+            if data is None:
+                # [count of each bucket (not cumulative), sum, count]
+                data = [[0] * (len(self.buckets) + 1), 0.0, 0]
+                self._values[key] = data
+            data[0][bisect.bisect_left(self.buckets, value)] += 1
+            data[1] += value
+            data[2] += 1
+
+    def get(self, **labels) -> Optional[Tuple[float, int]]:
+        """Returns (sum, count) of the observed values"""
+        data = self._values.get(self._key(labels))
+        return (data[1], data[2]) if data else None
+
+    def _samples(self, key: Tuple, value) -> List[str]:
+        (counts, total, count) = value
+        lines = []
+        cumulative = 0
+        for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+            cumulative += bucket_count
+            le = f'le="{_format_value(bound)}"'
+            lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+        lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(total)}")
+        lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {count}")
+        return lines
+
+
+class MetricsRegistry:
+    """Collection of metrics, which are rendered in the Prometheus text format"""
+
+    CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+    def __init__(self):
+        self.__metrics: Dict[str, _Metric] = {}
+        self.__lock = threading.Lock()
+        self.llm_latency = self.histogram("slashgpt_llm_request_duration_seconds", "Latency of LLM calls", ("agent", "model", "engine"))
+        self.llm_tokens = self.counter(
+            "slashgpt_llm_tokens_total", "Tokens used by LLM calls (type is prompt, completion or total)", ("agent", "model", "type")
+        )
+        self.function_latency = self.histogram("slashgpt_function_call_duration_seconds", "Latency of function calls", ("type", "function"))
+        self.history_write_latency = self.histogram("slashgpt_history_write_duration_seconds", "Latency of history storage writes", ("storage",))
+        self.llm_cache = self.counter(
+            "slashgpt_llm_cache_total", "Lookups of the response caches (result is hit, semantic_hit or miss)", ("agent", "model", "result")
+        )
+        self.errors = self.counter("slashgpt_errors_total", "Errors raised in traced operations", ("operation",))
+        self.pooled_sessions = self.gauge("slashgpt_pooled_sessions", "Idle chat sessions kept in the session pool")
+        self.active_sessions = self.gauge("slashgpt_active_sessions", "Chat sessions which are handling a request (not in the session pool)")
+
+    def __register(self, metric):
+        with self.__lock:
+            if metric.name in self.__metrics:
+                raise ValueError(f"MetricsRegistry: duplicated metric {metric.name}")
+            self.__metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Counter:
+        return self.__register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Tuple[str, ...] = ()) -> Gauge:
+        return self.__register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Tuple[str, ...] = (), buckets: Tuple[float, ...] = LATENCY_BUCKETS) -> Histogram:
+        return self.__register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        """Returns the metrics in the Prometheus text format"""
+        lines = []
+        for metric in list(self.__metrics.values()):
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+class MetricsExporter(SpanExporter):
+    """Records the metrics of finished spans (llm, function_call and history.write spans, and errors).
+    Responses from the cache are counted, but they are not included in the latency and tokens of LLM calls."""
+
+    def __init__(self, registry: MetricsRegistry):
+        self.registry = registry
+
+    def on_end(self, span: Span):
+        attributes = span.attributes
+        if span.name == "llm":
+            labels = {"agent": attributes.get("agent") or "", "model": attributes.get("model") or ""}
+            if "cache" in attributes:
+                self.registry.llm_cache.inc(result=attributes["cache"], **labels)
+                if attributes["cache"] != "miss":
+                    return
+            self.registry.llm_latency.observe(span.duration, engine=attributes.get("engine") or "", **labels)
+            for type in ("prompt", "completion", "total"):
+                tokens = attributes.get(f"{type}_tokens")
+                if tokens:
+                    self.registry.llm_tokens.inc(tokens, type=type, **labels)
+        elif span.name == "function_call":
+            self.registry.function_latency.observe(span.duration, type=attributes.get("type") or "", function=attributes.get("function") or "")
+        elif span.name == "history.write":
+            self.registry.history_write_latency.observe(span.duration, storage=attributes.get("storage") or "")
+        if "error" in attributes:
+            self.registry.errors.inc(operation=span.name)
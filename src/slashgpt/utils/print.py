@@ -23,5 +23,12 @@ def print_bot(botName: str, message: str):
     print(f"\033[92m\033[1m{botName}\033[95m\033[0m: {message}")
 
 
+def print_bot_delta(botName: str, delta: str, first: bool):
+    """Print a part of the bot message while streaming (with the bot name before the first part)"""
+    if first:
+        print(f"\033[92m\033[1m{botName}\033[95m\033[0m: ", end="")
+    print(delta, end="", flush=True)
+
+
 def print_function(function_name: str, message: str):
     print(f"\033[94m\033[1mfunction({function_name}): \033[95m\033[0m{message}")
@@ -0,0 +1,52 @@
+import re
+from typing import Dict, List, Tuple, Union
+
+PLACEHOLDER = re.compile(r"\{(now|random|resource|agents|memory)\}")
+
+ONCE = {"now", "resource", "agents", "memory"}
+"""Placeholders which are replaced only at the first occurrence ({random} is replaced at every occurrence)"""
+
+
+class PromptTemplate:
+    """Prompt of a manifest parsed into literal and placeholder segments once, which is rendered in a single pass"""
+
+    def __init__(self, prompt: str):
+        """
+        Args:
+            prompt (str): The joined prompt of the manifest
+        """
+        self.segments: List[Tuple[bool, str]] = []
+        """Segments of the prompt ((True, name) for placeholders, (False, text) for literals)"""
+        self.placeholders: Dict[str, int] = {}
+        """Number of occurrences of each placeholder"""
+        start = 0
+        for match in PLACEHOLDER.finditer(prompt):
+            name = match.group(1)
+            if name in ONCE and name in self.placeholders:
+                continue
+            if match.start() > start:
+                self.segments.append((False, prompt[start : match.start()]))
+            self.segments.append((True, name))
+            self.placeholders[name] = self.placeholders.get(name, 0) + 1
+            start = match.end()
+        if start < len(prompt):
+            self.segments.append((False, prompt[start:]))
+
+    def render(self, values: Dict[str, Union[str, List[str]]]) -> str:
+        """Returns the prompt with placeholders replaced by the values (placeholders without values are kept)
+
+        Args:
+            values (dict): The value of each placeholder (str), or the values of each occurrence of {random} (list of str)
+        """
+        parts: List[str] = []
+        count = 0
+        for is_placeholder, text in self.segments:
+            value = values.get(text) if is_placeholder else None
+            if value is None:
+                parts.append(f"{{{text}}}" if is_placeholder else text)
+            elif isinstance(value, list):
+                parts.append(value[count])
+                count += 1
+            else:
+                parts.append(value)
+        return "".join(parts)
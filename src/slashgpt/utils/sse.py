@@ -0,0 +1,23 @@
+import json
+
+
+def sse_event(event: str, data: dict):
+    """Returns a Server-Sent Event (str)"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def sse_data(callback_type: str, data):
+    """Returns the JSON serializable data of a call_loop event (dict)"""
+    if callback_type in ("bot", "bot_delta"):
+        return {"content": data}
+    if callback_type == "function_call":
+        return data.to_dict()
+    if callback_type == "function":
+        (function_name, function_message) = data
+        return {"name": function_name, "content": function_message}
+    if callback_type == "emit":
+        (action_method, action_data) = data
+        return {"method": action_method, "data": action_data}
+    if callback_type == "error":
+        return {"message": str(data)}
+    return {"data": data}
@@ -0,0 +1,251 @@
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from opentelemetry import trace as otel_trace
+
+    isLoadedOpenTelemetry = True
+except ImportError:
+    isLoadedOpenTelemetry = False
+
+# Lightweight tracing of chat turns. Spans are recorded only while an exporter is registered:
+#
+#   add_exporter(StdoutJSONExporter())
+#   with span("turn"):
+#       session.append_user_question(question)
+#       session.call_loop(callback)
+
+
+class Span:
+    """A timed operation (e.g, the LLM call) in a trace"""
+
+    def __init__(self, name: str, trace_id: str, parent: Optional["Span"], attributes: dict):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = os.urandom(8).hex()
+        self.parent = parent
+        self.attributes = attributes
+        self.start = time.time()
+        self.end: Optional[float] = None
+        self.__start = time.perf_counter()
+        self.duration: float = 0
+        """Duration in seconds (measured by the monotonic clock)"""
+
+    def set_attribute(self, key: str, value):
+        self.attributes[key] = value
+
+    def finish(self):
+        self.duration = time.perf_counter() - self.__start
+        self.end = self.start + self.duration
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent.span_id if self.parent else None,
+            "start": self.start,
+            "duration_ms": round(self.duration * 1000, 3),
+            "attributes": self.attributes,
+        }
+
+
+class SpanExporter:
+    """Base class of exporters, which receive spans when they start and end"""
+
+    def on_start(self, span: Span):
+        pass
+
+    def on_end(self, span: Span):
+        pass
+
+
+class InMemoryExporter(SpanExporter):
+    """Keeps finished spans in memory (e.g, for tests)"""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+
+    def on_end(self, span: Span):
+        self.spans.append(span)
+
+    def names(self) -> List[str]:
+        """Returns the names of finished spans (in the order they finished)"""
+        return [span.name for span in self.spans]
+
+    def clear(self):
+        self.spans = []
+
+
+class StdoutJSONExporter(SpanExporter):
+    """Prints each finished span as a line of JSON"""
+
+    def __init__(self, write: Callable[[str], None] = print):
+        self.write = write
+
+    def on_end(self, span: Span):
+        self.write(json.dumps(span.to_dict(), ensure_ascii=False, default=str))
+
+
+class OpenTelemetryExporter(SpanExporter):
+    """Forwards spans to OpenTelemetry (pip install opentelemetry-api opentelemetry-sdk), with the same parent/child relations"""
+
+    def __init__(self, tracer_provider=None):
+        if not isLoadedOpenTelemetry:
+            raise ImportError("no opentelemetry. pip install opentelemetry-api opentelemetry-sdk")
+        self.tracer = otel_trace.get_tracer("slashgpt", tracer_provider=tracer_provider)
+        self.__spans: Dict[str, Any] = {}  # span id -> OpenTelemetry span
+        self.__lock = threading.Lock()
+
+    def on_start(self, span: Span):
+        context = None
+        with self.__lock:
+            parent = self.__spans.get(span.parent.span_id) if span.parent else None
+        if parent is not None:
+            context = otel_trace.set_span_in_context(parent)
+        otel_span = self.tracer.start_span(span.name, context=context, start_time=int(span.start * 1e9))
+        with self.__lock:
+            self.__spans[span.span_id] = otel_span
+
+    def on_end(self, span: Span):
+        with self.__lock:
+            otel_span = self.__spans.pop(span.span_id, None)
+        if otel_span is not None:
+            for key, value in span.attributes.items():
+                otel_span.set_attribute(key, value if isinstance(value, (str, bool, int, float)) else str(value))
+            end = span.end if span.end is not None else time.time()
+            otel_span.end(end_time=int(end * 1e9))
+
+
+class WaterfallExporter(SpanExporter):
+    """Prints the timing waterfall of each trace (e.g, a chat turn) when its root span ends"""
+
+    WIDTH = 40
+    """Width of the bars"""
+
+    def __init__(self, write: Callable[[str], None] = print, enabled: Callable[[], bool] = lambda: True, root: Optional[str] = None):
+        """
+        Args:
+
+            write (function, optional): It prints a line
+            enabled (function, optional): It returns if the waterfall should be printed (e.g, the verbose mode)
+            root (str, optional): Name of the root spans to print (e.g, "turn"). All traces are printed if not specified.
+        """
+        self.write = write
+        self.enabled = enabled
+        self.root = root
+        self.__traces: Dict[str, List[Span]] = {}
+        self.__lock = threading.Lock()
+
+    def on_end(self, span: Span):
+        with self.__lock:
+            spans = self.__traces.setdefault(span.trace_id, [])
+            spans.append(span)
+            if span.parent is not None:
+                return
+            del self.__traces[span.trace_id]
+        if (self.root is None or span.name == self.root) and self.enabled():
+            for line in self.format(spans):
+                self.write(line)
+
+    @classmethod
+    def format(cls, spans: List[Span]) -> List[str]:
+        """Returns the lines of the waterfall"""
+        root = next(span for span in spans if span.parent is None)
+        total = root.duration or 1e-9
+        depths: Dict[str, int] = {}
+
+        def depth(span: Span):
+            if span.span_id not in depths:
+                depths[span.span_id] = 0 if span.parent is None else depth(span.parent) + 1
+            return depths[span.span_id]
+
+        width = max(len("  " * depth(span) + span.name) for span in spans)
+        lines = []
+        for span in sorted(spans, key=lambda span: (span.start, -span.duration)):
+            offset = int((span.start - root.start) / total * cls.WIDTH)
+            length = max(1, int(span.duration / total * cls.WIDTH))
+            bar = " " * offset + "#" * min(length, cls.WIDTH - offset)
+            label = "  " * depth(span) + span.name
+            lines.append(f"{label:<{width}} {span.duration * 1000:>9.1f}ms |{bar:<{cls.WIDTH}}|")
+        return lines
+
+
+_exporters: List[SpanExporter] = []
+_current: contextvars.ContextVar = contextvars.ContextVar("slashgpt_span", default=None)
+
+
+def add_exporter(exporter: SpanExporter):
+    """Register an exporter (tracing is enabled while any exporter is registered)"""
+    _exporters.append(exporter)
+
+
+def remove_exporter(exporter: SpanExporter):
+    if exporter in _exporters:
+        _exporters.remove(exporter)
+
+
+def current_span() -> Optional[Span]:
+    """Returns the active span (None if tracing is disabled or there is no active span)"""
+    return _current.get()
+
+
+class _NoSpan:
+    def __enter__(self):
+        return None
+
+    def __exit__(self, *args):
+        return False
+
+
+_no_span = _NoSpan()
+
+
+class _ActiveSpan:
+    def __init__(self, name: str, attributes: dict):
+        parent = _current.get()
+        self.span = Span(name, parent.trace_id if parent else os.urandom(16).hex(), parent, attributes)
+
+    def __enter__(self):
+        self.token = _current.set(self.span)
+        for exporter in list(_exporters):
+            exporter.on_start(self.span)
+        return self.span
+
+    def __exit__(self, exc_type, exc, tb):
+        self.span.finish()
+        if exc is not None:
+            self.span.set_attribute("error", str(exc))
+        _current.reset(self.token)
+        for exporter in list(_exporters):
+            exporter.on_end(self.span)
+        return False
+
+
+def span(name: str, **attributes):
+    """Returns a context manager, which records a span (a no-op if tracing is disabled).
+    The span (or None) is available as the target of the with statement to add attributes."""
+    if not _exporters:
+        return _no_span
+    return _ActiveSpan(name, attributes)
+
+
+def traced(name: str, **attributes):
+    """Decorator, which records each call of the function as a span (with the attributes)"""
+
+    def decorator(function):
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            if not _exporters:
+                return function(*args, **kwargs)
+            with _ActiveSpan(name, dict(attributes)):
+                return function(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
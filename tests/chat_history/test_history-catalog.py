@@ -0,0 +1,88 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.history.storage.file import ChatHistoryFileStorage  # noqa: E402
+from slashgpt.history.storage.memory import ChatHistoryMemoryStorage  # noqa: E402
+
+pytestmark = pytest.mark.usefixtures("chdir")
+
+
+def create_session(question: str, count: int = 1):
+    storage = ChatHistoryFileStorage("123", "key")
+    storage.append({"role": "system", "content": "prompt"})
+    for _ in range(count):
+        storage.append({"role": "user", "content": question})
+    storage.close()
+    return storage
+
+
+def test_session_list():
+    first = create_session("first question", 1)
+    second = create_session("second question", 3)
+    sessions = first.session_list()
+    assert [session["id"] for session in sessions] == [first.session_id, second.session_id]
+    assert sessions[0]["title"] == "first question"
+    assert sessions[1]["message_count"] == 4
+
+
+def test_session_list_sorted_and_paginated():
+    storages = [create_session(f"question {i}", i + 1) for i in range(5)]
+    sessions = storages[0].session_list(offset=1, limit=2, order_by="message_count", descending=True)
+    assert [session["id"] for session in sessions] == [storages[3].session_id, storages[2].session_id]
+    with pytest.raises(ValueError):
+        storages[0].session_list(order_by="session_id; DROP TABLE catalog")
+
+
+def test_get_session_data_by_id():
+    first = create_session("first question")
+    second = create_session("second question")
+    assert first.get_session_data(second.session_id) == {"messages": second.messages()}
+    # position in the list is still accepted
+    assert first.get_session_data("0") == {"messages": first.messages()}
+    assert first.get_session_data("unknown") is None
+
+
+def test_catalog_is_updated_on_flush():
+    storage = create_session("question")
+    other = ChatHistoryFileStorage("123", "key")
+    # The session is registered when it is created
+    other.append({"role": "user", "content": "other question"})
+    assert storage.get_session_info(other.session_id)["message_count"] == 1
+    # but it is not updated on every message
+    other.append({"role": "assistant", "content": "answer"})
+    assert storage.get_session_info(other.session_id)["message_count"] == 1
+    other.close()
+    assert storage.get_session_info(other.session_id)["message_count"] == 2
+    # The entry of the storage itself is flushed before listing
+    storage.append({"role": "assistant", "content": "answer"})
+    assert storage.get_session_info(storage.session_id)["message_count"] == 3
+
+
+def test_legacy_sessions_are_indexed():
+    os.makedirs("filememory/key")
+    with open("filememory/key/legacy.json", "w") as f:
+        json.dump({"messages": [{"role": "user", "content": "legacy question"}]}, f)
+
+    storage = create_session("new question")
+    ids = [session["id"] for session in storage.session_list()]
+    assert "legacy" in ids and storage.session_id in ids
+    assert storage.get_session_info("legacy")["title"] == "legacy question"
+
+
+def test_memory_storage_catalog():
+    storage = ChatHistoryMemoryStorage("123", "key")
+    storage.append({"role": "user", "content": "hello"})
+    storage.append({"role": "assistant", "content": "hi"})
+    assert storage.catalog.get("key", storage.session_id)["message_count"] == 1
+    sessions = storage.session_list()
+    assert len(sessions) == 1
+    assert sessions[0]["id"] == storage.session_id
+    assert sessions[0]["message_count"] == 2
+    assert storage.get_session_data(storage.session_id) == {
+        "messages": [{"role": "user", "content": "hello"}, {"role": "assistant", "content": "hi"}]
+    }
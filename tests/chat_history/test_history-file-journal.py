@@ -0,0 +1,101 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.chat_history import ChatHistory  # noqa: E402
+from slashgpt.history.storage.file import ChatHistoryFileStorage  # noqa: E402
+
+pytestmark = pytest.mark.usefixtures("chdir")
+
+
+def append_messages(storage, count):
+    for i in range(count):
+        storage.append({"role": "user", "content": str(i)})
+
+
+def test_journal_append_is_one_line():
+    storage = ChatHistoryFileStorage("123", "key", journal=True)
+    append_messages(storage, 3)
+    with open(f"filememory/key/{storage.session_id}.jsonl") as f:
+        lines = f.readlines()
+    assert len(lines) == 3
+    assert json.loads(lines[2])["data"] == {"role": "user", "content": "2"}
+    assert not os.path.exists(f"filememory/key/{storage.session_id}.json")
+
+
+def test_journal_replay():
+    storage = ChatHistoryFileStorage("123", "key", journal=True)
+    append_messages(storage, 5)
+    storage.set(1, {"role": "user", "content": "one"})
+    storage.pop()
+
+    restored = ChatHistoryFileStorage("123", "key", session_id=storage.session_id, journal=True)
+    history = ChatHistory(restored)
+    assert history.len_messages() == 4
+    assert history.get_message(1) == {"role": "user", "content": "one"}
+    assert history.last_message() == {"role": "user", "content": "3"}
+
+
+def test_journal_compaction():
+    storage = ChatHistoryFileStorage("123", "key", journal=True, compact_interval=4)
+    append_messages(storage, 10)
+    with open(f"filememory/key/{storage.session_id}.jsonl") as f:
+        assert len(f.readlines()) == 2
+    with open(f"filememory/key/{storage.session_id}.json") as f:
+        assert len(json.load(f)["messages"]) == 8
+
+    restored = ChatHistoryFileStorage("123", "key", session_id=storage.session_id, journal=True)
+    assert restored.messages() == storage.messages()
+
+
+def test_journal_broken_tail():
+    storage = ChatHistoryFileStorage("123", "key", journal=True)
+    append_messages(storage, 3)
+    with open(f"filememory/key/{storage.session_id}.jsonl", "a") as f:
+        f.write('{"op": "append", "da')
+
+    restored = ChatHistoryFileStorage("123", "key", session_id=storage.session_id, journal=True)
+    assert restored.len() == 3
+    # The broken record is truncated, so that a new record is not appended to it
+    restored.append({"role": "user", "content": "3"})
+    again = ChatHistoryFileStorage("123", "key", session_id=storage.session_id, journal=True)
+    assert again.messages() == restored.messages()
+    assert again.len() == 4
+
+
+def test_journal_tail_without_newline():
+    storage = ChatHistoryFileStorage("123", "key", journal=True)
+    append_messages(storage, 2)
+    path = f"filememory/key/{storage.session_id}.jsonl"
+    with open(path, "rb+") as f:
+        f.truncate(os.path.getsize(path) - 1)
+
+    restored = ChatHistoryFileStorage("123", "key", session_id=storage.session_id, journal=True)
+    restored.append({"role": "user", "content": "2"})
+    again = ChatHistoryFileStorage("123", "key", session_id=storage.session_id, journal=True)
+    assert again.len() == 3
+
+
+def test_journal_session_data():
+    storage = ChatHistoryFileStorage("123", "key", journal=True)
+    append_messages(storage, 2)
+    sessions = storage.session_list()
+    assert len(sessions) == 1
+    assert storage.get_session_data("0") == {"messages": storage.messages()}
+
+
+def test_non_journal_reader_folds_journal():
+    storage = ChatHistoryFileStorage("123", "key", journal=True)
+    append_messages(storage, 2)
+
+    restored = ChatHistoryFileStorage("123", "key", session_id=storage.session_id)
+    assert restored.len() == 2
+    assert not os.path.exists(f"filememory/key/{storage.session_id}.jsonl")
+    restored.append({"role": "user", "content": "2"})
+
+    again = ChatHistoryFileStorage("123", "key", session_id=storage.session_id)
+    assert again.len() == 3
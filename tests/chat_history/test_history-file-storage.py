@@ -8,6 +8,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
 from slashgpt.chat_history import ChatHistory  # noqa: E402
 from slashgpt.history.storage.file import ChatHistoryFileStorage  # noqa: E402
 
+pytestmark = pytest.mark.usefixtures("chdir")
+
 
 @pytest.fixture
 def history():
@@ -0,0 +1,77 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.chat_history import ChatHistory  # noqa: E402
+from slashgpt.history.storage.sqlite import SCHEMA, ChatHistorySQLiteStorage  # noqa: E402
+from slashgpt.history.storage.utils import get_connection  # noqa: E402
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / "history.sqlite3")
+
+
+@pytest.fixture
+def history(db_path):
+    storage = ChatHistorySQLiteStorage("123", "key", db_path=db_path)
+    history = ChatHistory(storage)
+    history.append_message({"name": "1", "content": "1"})
+    history.append_message({"name": "2", "content": "2"})
+    history.append_message({"name": "3", "content": "3"})
+    return history
+
+
+def reload(history, db_path):
+    return ChatHistorySQLiteStorage("123", "key", session_id=history.repository.session_id, db_path=db_path)
+
+
+def test_messages(history):
+    assert history.len_messages() == 3
+    assert history.last_message() == {"name": "3", "content": "3", "role": None}
+
+
+def test_persisted(history, db_path):
+    history.set_message(1, {"role": "user", "content": "set"})
+    history.pop_message()
+    storage = reload(history, db_path)
+    assert storage.messages() == [{"name": "1", "content": "1"}, {"role": "user", "content": "set"}]
+
+
+def test_transaction(history, db_path):
+    with history.transaction():
+        history.append_message({"name": "4", "content": "4"})
+        history.append_message({"name": "5", "content": "5"})
+        assert history.len_messages() == 5
+        assert reload(history, db_path).len() == 3
+    assert reload(history, db_path).len() == 5
+
+
+def test_restore(history, db_path):
+    history.restore([{"role": "user", "content": "restored"}])
+    assert reload(history, db_path).messages() == [{"role": "user", "content": "restored"}]
+
+
+def test_session_list(history, db_path):
+    other = ChatHistorySQLiteStorage("123", "key", db_path=db_path)
+    other.append({"role": "user", "content": "other"})
+    ChatHistorySQLiteStorage("456", "key", db_path=db_path).append({"role": "user", "content": "someone else"})
+
+    sessions = history.session_list()
+    assert [session["id"] for session in sessions] == [history.repository.session_id, other.session_id]
+    assert history.get_session_data(other.session_id) == {"messages": [{"role": "user", "content": "other"}]}
+    assert history.get_session_data("unknown") is None
+
+
+def test_session_info(history, db_path):
+    session_id = history.repository.session_id
+    assert history.repository.get_session_info(session_id)["message_count"] == 3
+    # Sessions of other users are not visible
+    assert ChatHistorySQLiteStorage("456", "key", db_path=db_path).get_session_info(session_id) is None
+
+
+def test_wal_mode(db_path):
+    assert get_connection(db_path, SCHEMA).execute("PRAGMA journal_mode").fetchone()[0] == "wal"
@@ -0,0 +1,120 @@
+import os
+import sys
+from typing import List
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.chat_config import ChatConfig  # noqa: E402
+from slashgpt.chat_session import ChatSession  # noqa: E402
+from slashgpt.history.storage.file import ChatHistoryFileStorage  # noqa: E402
+from slashgpt.history.storage.sqlite import ChatHistorySQLiteStorage  # noqa: E402
+from slashgpt.history.summarizer import SUMMARY_HEADER  # noqa: E402
+from slashgpt.llms.engine.base import LLMEngineBase  # noqa: E402
+from slashgpt.manifest import Manifest  # noqa: E402
+
+current_dir = os.path.dirname(__file__)
+
+
+class EchoEngine(LLMEngineBase):
+    """Returns the number of messages it received"""
+
+    def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        self.last_messages = messages
+        return ("assistant", f"got {len(messages)}", None, 0)
+
+    def num_tokens(self, text: str):
+        return len(text.split())
+
+
+class SummaryEngine(LLMEngineBase):
+    """Returns the last line of the conversation as the summary"""
+
+    def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        return ("assistant", "until " + messages[-1]["content"].splitlines()[-1], None, 0)
+
+
+config = ChatConfig(current_dir, llm_engine_configs={"echo": EchoEngine, "summary": SummaryEngine})
+
+manifest = {
+    "model": {"engine_name": "echo", "model_name": "echo"},
+    "prompt": "system prompt",
+    "summary": {"model": {"engine_name": "summary", "model_name": "summary"}, "keep_last": 2, "min_messages": 2},
+}
+
+
+pytestmark = pytest.mark.usefixtures("chdir")
+
+
+def talk(session: ChatSession, question: str):
+    session.append_user_question(question)
+    session.call_llm()
+    session.update_summary(wait=True)
+
+
+def sent(session: ChatSession):
+    return [message["content"] for message in session.llm_model.engine.last_messages]
+
+
+def test_summary():
+    session = ChatSession(config, manifest=manifest)
+    talk(session, "q1")
+    assert session.history.summary() is None
+    talk(session, "q2")
+    # system, q1, got 2, q2, got 4: q1 and "got 2" are summarized
+    assert session.history.summary() == {"content": "until assistant: got 2", "index": 3}
+    session.append_user_question("q3")
+    session.call_llm()
+    assert sent(session) == ["system prompt", f"{SUMMARY_HEADER}\nuntil assistant: got 2", "q2", "got 4", "q3"]
+    # The history itself is not modified
+    assert session.history.len_messages() == 7
+
+
+def test_summary_is_not_applied_to_restored_history():
+    session = ChatSession(config, manifest=manifest)
+    talk(session, "q1")
+    session.append_user_question("q2")
+    session.call_llm()
+    session.history.restore([{"role": "system", "content": "another"}] * 5)
+    session.update_summary(wait=True)
+    assert session.history.summary() is None
+
+
+def test_summary_with_context_window():
+    session = ChatSession(config, manifest={**manifest, "context_window": {"max_tokens": 1000}})
+    talk(session, "q1")
+    talk(session, "q2")
+    session.append_user_question("q3")
+    session.call_llm()
+    assert sent(session) == ["system prompt", f"{SUMMARY_HEADER}\nuntil assistant: got 2", "q2", "got 4", "q3"]
+
+
+def test_summary_is_persisted_by_file_storage():
+    engine = ChatHistoryFileStorage("sample", "agent")
+    session = ChatSession(config, manifest=manifest, history_engine=engine)
+    talk(session, "q1")
+    talk(session, "q2")
+
+    restored = ChatSession(config, manifest=manifest, history_engine=ChatHistoryFileStorage("sample", "agent", engine.session_id), restore=True)
+    assert restored.history.summary() == {"content": "until assistant: got 2", "index": 3}
+    assert engine.get_session_data(engine.session_id)["summary"] == {"content": "until assistant: got 2", "index": 3}
+
+
+def test_summary_is_persisted_by_journal():
+    engine = ChatHistoryFileStorage("sample", "agent", journal=True)
+    engine.append({"role": "user", "content": "1"})
+    engine.set_summary({"content": "summary", "index": 1})
+    assert ChatHistoryFileStorage("sample", "agent", engine.session_id, journal=True).summary() == {"content": "summary", "index": 1}
+    engine.restore([{"role": "user", "content": "2"}])
+    assert ChatHistoryFileStorage("sample", "agent", engine.session_id, journal=True).summary() is None
+
+
+def test_summary_is_persisted_by_sqlite():
+    engine = ChatHistorySQLiteStorage("sample", "agent")
+    engine.append({"role": "user", "content": "1"})
+    engine.set_summary({"content": "summary", "index": 1})
+    assert ChatHistorySQLiteStorage("sample", "agent", engine.session_id).summary() == {"content": "summary", "index": 1}
+    assert engine.get_session_data(engine.session_id)["summary"] == {"content": "summary", "index": 1}
+    engine.restore([{"role": "user", "content": "2"}])
+    assert ChatHistorySQLiteStorage("sample", "agent", engine.session_id).summary() is None
@@ -8,10 +8,12 @@ sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
 from slashgpt.chat_history import ChatHistory  # noqa: E402
 from slashgpt.history.storage.memory import ChatHistoryMemoryStorage  # noqa: E402
 
+pytestmark = pytest.mark.usefixtures("chdir")
+
 
 @pytest.fixture
 def history():
-    with open("./tests/data/saru.json", "r") as f:
+    with open(os.path.join(os.path.dirname(__file__), "../data/saru.json"), "r") as f:
         data = json.load(f)
 
     memory_history = ChatHistoryMemoryStorage("123", "key")
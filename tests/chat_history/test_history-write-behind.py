@@ -0,0 +1,120 @@
+import glob
+import json
+import os
+import sys
+import threading
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.history.storage.log import LogFlusher  # noqa: E402
+from slashgpt.history.storage.memory import ChatHistoryMemoryStorage  # noqa: E402
+
+pytestmark = pytest.mark.usefixtures("chdir")
+
+
+def read_log():
+    files = glob.glob("output/key/*.json")
+    if len(files) == 0:
+        return None
+    with open(files[0]) as f:
+        return json.load(f)
+
+
+def test_append_is_not_written_immediately():
+    storage = ChatHistoryMemoryStorage("123", "key", write_behind=True, flush_interval=60)
+    storage.append({"role": "user", "content": "1"})
+    assert storage.len() == 1
+    assert read_log() is None
+    assert storage.pending() == 1
+
+
+def test_flush():
+    storage = ChatHistoryMemoryStorage("123", "key", write_behind=True, flush_interval=60)
+    storage.append({"role": "user", "content": "1"})
+    storage.append({"role": "user", "content": "2"})
+    storage.pop()
+    storage.flush()
+    assert read_log() == {"messages": [{"role": "user", "content": "1"}]}
+    assert storage.pending() == 0
+
+
+def test_context_manager():
+    with ChatHistoryMemoryStorage("123", "key", write_behind=True, flush_interval=60) as storage:
+        storage.append({"role": "user", "content": "1"})
+    assert read_log() == {"messages": [{"role": "user", "content": "1"}]}
+
+
+def test_flush_count():
+    storage = ChatHistoryMemoryStorage("123", "key", write_behind=True, flush_interval=60, flush_count=2)
+    storage.append({"role": "user", "content": "1"})
+    assert read_log() is None
+    storage.append({"role": "user", "content": "2"})
+    assert len(read_log()["messages"]) == 2
+
+
+def test_background_flush():
+    storage = ChatHistoryMemoryStorage("123", "key", write_behind=True, flush_interval=0.05)
+    storage.append({"role": "user", "content": "1"})
+    for _ in range(50):
+        if read_log() is not None:
+            break
+        time.sleep(0.05)
+    assert read_log() == {"messages": [{"role": "user", "content": "1"}]}
+    assert storage.pending() == 0
+
+
+def test_flush_after_chdir(tmp_path, monkeypatch):
+    storage = ChatHistoryMemoryStorage("123", "key", write_behind=True, flush_interval=60)
+    storage.append({"role": "user", "content": "1"})
+    os.makedirs("other")
+    monkeypatch.chdir("other")
+    storage.flush()
+    monkeypatch.chdir(tmp_path)
+    assert read_log()["messages"] == [{"role": "user", "content": "1"}]
+
+
+class BrokenStorage:
+    def flush(self):
+        raise OSError("disk full")
+
+    def flush_if_due(self, now):
+        self.flush()
+
+    def pending(self):
+        return 1
+
+
+def test_flush_all_continues_after_failure():
+    flusher = LogFlusher.instance()
+    flusher.schedule(BrokenStorage())
+    storage = ChatHistoryMemoryStorage("123", "key", write_behind=True, flush_interval=60)
+    storage.append({"role": "user", "content": "1"})
+    flusher.flush_all()
+    assert read_log()["messages"] == [{"role": "user", "content": "1"}]
+
+
+def test_flush_count_while_flushing(monkeypatch):
+    # A flush triggered by flush_count must not deadlock with a flush by the flusher thread
+    storage = ChatHistoryMemoryStorage("123", "key", write_behind=True, flush_interval=60, flush_count=2)
+    flush = storage.flush
+
+    def flush_after_flusher():
+        flusher = threading.Thread(target=flush, daemon=True)
+        flusher.start()
+        flusher.join(timeout=0.2)
+        flush()
+
+    monkeypatch.setattr(storage, "flush", flush_after_flusher)
+
+    def append():
+        storage.append({"role": "user", "content": "1"})
+        storage.append({"role": "user", "content": "2"})
+
+    thread = threading.Thread(target=append, daemon=True)
+    thread.start()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    assert len(read_log()["messages"]) == 2
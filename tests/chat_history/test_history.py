@@ -8,6 +8,8 @@ sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
 from slashgpt.chat_history import ChatHistory  # noqa: E402
 from slashgpt.history.storage.memory import ChatHistoryMemoryStorage  # noqa: E402
 
+pytestmark = pytest.mark.usefixtures("chdir")
+
 
 @pytest.fixture
 def history():
@@ -51,3 +53,30 @@ def test_messages(history):
         {"name": "4", "content": "4", "role": None},
         {"name": "5", "content": "5", "role": None},
     ]
+
+
+def test_messages_follow_changes(history):
+    assert len(history.messages()) == 5
+    history.append_message({"name": "6", "content": "6"})
+    history.set_message(0, {"role": "user", "content": "0"})
+    history.pop_message()
+    history.pop_message()
+    assert history.messages() == [
+        {"content": "0", "role": "user"},
+        {"name": "2", "content": "2", "role": None},
+        {"name": "3", "content": "3", "role": None},
+        {"name": "4", "content": "4", "role": None},
+    ]
+
+
+def test_messages_is_a_copy(history):
+    history.messages().pop()
+    assert len(history.messages()) == 5
+
+
+def test_messages_after_direct_change(history):
+    history.messages()
+    history.repository.append({"name": "6", "content": "6"})
+    assert history.messages()[-1] == {"name": "6", "content": "6", "role": None}
+    history.restore([{"role": "user", "content": "restored"}])
+    assert history.messages() == [{"role": "user", "content": "restored"}]
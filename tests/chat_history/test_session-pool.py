@@ -0,0 +1,137 @@
+import json
+import os
+import sys
+from typing import List
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.chat_config import ChatConfig  # noqa: E402
+from slashgpt.chat_config_with_manifests import ChatConfigWithManifests  # noqa: E402
+from slashgpt.chat_session import ChatSession  # noqa: E402
+from slashgpt.history.storage.memory import ChatHistoryMemoryStorage  # noqa: E402
+from slashgpt.llms.engine.base import LLMEngineBase  # noqa: E402
+from slashgpt.manifest import Manifest  # noqa: E402
+from slashgpt.session_pool import SessionPool  # noqa: E402
+
+current_dir = os.path.dirname(__file__)
+
+
+class EchoEngine(LLMEngineBase):
+    def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        return ("assistant", messages[-1]["content"], None, 0)
+
+
+config = ChatConfig(current_dir, llm_engine_configs={"echo": EchoEngine})
+manifest = {"model": {"engine_name": "echo", "model_name": "echo"}, "prompt": "system prompt"}
+
+
+pytestmark = pytest.mark.usefixtures("chdir")
+
+
+def new_session(**kwargs):
+    return ChatSession(config, manifest=manifest, history_engine=ChatHistoryMemoryStorage("uid", "agent", **kwargs))
+
+
+def test_checkout():
+    pool = SessionPool()
+    session = new_session()
+    assert pool.checkout("id") is None
+    pool.checkin("id", session)
+    assert pool.checkout("id") is session
+    # It is not shared while it is checked out
+    assert pool.checkout("id") is None
+    assert pool.stats == {"hits": 1, "misses": 2, "evictions": 0}
+
+
+def test_tag():
+    pool = SessionPool()
+    pool.checkin("id", new_session(), ("config", "gpt4"))
+    assert pool.checkout("id", ("config", "gpt3")) is None
+    assert len(pool) == 0
+    assert pool.stats["evictions"] == 1
+
+
+def test_reloaded_manifest(tmp_path):
+    os.makedirs("manifests")
+    with open("manifests/agent.json", "w") as f:
+        json.dump(manifest, f)
+    config = ChatConfigWithManifests(str(tmp_path), "manifests")
+    pool = SessionPool()
+
+    def restore():
+        # same as restore_session of the servers
+        definition = config.manifests["agent"]
+        session = pool.checkout("id", SessionPool.tag(config, "agent", definition))
+        return session or ChatSession(config, manifest=definition, agent_name="agent")
+
+    def release(session):
+        pool.checkin("id", session, SessionPool.tag(config, "agent", session.manifest.manifest()))
+
+    session = restore()
+    release(session)
+    assert restore() is session
+    release(session)
+    # The watcher reloads the modified manifest into the same config
+    with open("manifests/agent.json", "w") as f:
+        json.dump({**manifest, "prompt": "new prompt"}, f)
+    stat = os.stat("manifests/agent.json")
+    os.utime("manifests/agent.json", ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+    config.reload()
+    restored = restore()
+    assert restored is not session
+    assert restored.manifest.get("prompt") == "new prompt"
+    assert pool.stats["evictions"] == 1
+
+
+def test_lru():
+    pool = SessionPool(max_sessions=2)
+    sessions = [new_session() for _ in range(3)]
+    pool.checkin(0, sessions[0])
+    pool.checkin(1, sessions[1])
+    pool.checkin(0, pool.checkout(0))
+    pool.checkin(2, sessions[2])
+    assert pool.checkout(1) is None
+    assert pool.checkout(0) is sessions[0]
+    assert pool.checkout(2) is sessions[2]
+
+
+def test_idle_ttl():
+    pool = SessionPool(idle_ttl=0)
+    pool.checkin("id", new_session())
+    assert pool.checkout("id") is None
+    assert pool.stats["evictions"] == 1
+
+
+def test_concurrent_checkin():
+    pool = SessionPool()
+    pool.checkin("id", new_session())
+    pool.checkin("id", new_session())
+    # Neither of the sessions is reused
+    assert pool.checkout("id") is None
+    assert pool.stats["evictions"] == 2
+
+
+def test_eviction_flushes_write_behind_storage():
+    pool = SessionPool()
+    session = new_session(write_behind=True, flush_interval=60)
+    session.append_user_question("Hi")
+    session.call_llm()
+    pool.checkin("id", session)
+    assert session.history.repository.pending() > 0
+    pool.discard()
+    assert session.history.repository.pending() == 0
+
+
+def test_pooled_session_continues_the_conversation():
+    pool = SessionPool()
+    session = new_session()
+    session.append_user_question("1")
+    session.call_llm()
+    pool.checkin("id", session)
+
+    session = pool.checkout("id")
+    session.append_user_question("2")
+    session.call_llm()
+    assert [message["content"] for message in session.history.messages()] == ["system prompt", "1", "1", "2", "2"]
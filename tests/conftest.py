@@ -0,0 +1,8 @@
+import pytest
+
+
+@pytest.fixture
+def chdir(tmp_path, monkeypatch):
+    """Runs the test in its temporary directory, so that the files it writes (e.g, output, filememory and caches)
+    are not left in the tree. Modules which write files use it with pytestmark = pytest.mark.usefixtures("chdir")."""
+    monkeypatch.chdir(tmp_path)
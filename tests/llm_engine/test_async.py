@@ -0,0 +1,122 @@
+import asyncio
+import os
+import sys
+from types import SimpleNamespace as NS
+from typing import List
+
+import httpx
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.chat_config import ChatConfig  # noqa: E402
+from slashgpt.chat_session import ChatSession  # noqa: E402
+from slashgpt.function import network  # noqa: E402
+from slashgpt.function.function_call import FunctionCall  # noqa: E402
+from slashgpt.llms.engine import openai_gpt  # noqa: E402
+from slashgpt.llms.engine.base import LLMEngineBase  # noqa: E402
+from slashgpt.llms.engine.openai_gpt import LLMEngineOpenAIGPT  # noqa: E402
+from slashgpt.llms.model import LlmModel  # noqa: E402
+from slashgpt.manifest import Manifest  # noqa: E402
+
+current_dir = os.path.dirname(__file__)
+
+
+class WeatherEngine(LLMEngineBase):
+    """Calls the weather function, and answers with its result (only chat_completion is implemented)"""
+
+    def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        if messages[-1]["role"] == "function":
+            return ("assistant", f"It is {messages[-1]['content']}", None, 0)
+        return ("assistant", None, FunctionCall({"name": "weather", "arguments": '{"city": "Tokyo"}'}, manifest), 0)
+
+
+class AsyncEngine(LLMEngineBase):
+    """Implements chat_completion_async, and counts the concurrent calls"""
+
+    running = 0
+    max_running = 0
+
+    def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        raise Exception("chat_completion should not be called")
+
+    async def chat_completion_async(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        AsyncEngine.running += 1
+        AsyncEngine.max_running = max(AsyncEngine.max_running, AsyncEngine.running)
+        await asyncio.sleep(0.05)
+        AsyncEngine.running -= 1
+        return ("assistant", f"echo: {messages[-1]['content']}", None, 0)
+
+
+config = ChatConfig(current_dir, llm_engine_configs={"weather": WeatherEngine, "async": AsyncEngine})
+
+weather_manifest = {
+    "model": {"engine_name": "weather", "model_name": "weather"},
+    "functions": [{"name": "weather", "description": "weather", "parameters": {"type": "object", "properties": {"city": {"type": "string"}}}}],
+    "actions": {"weather": {"type": "rest", "url": "http://weather.test/{city}", "method": "GET"}},
+}
+
+
+pytestmark = pytest.mark.usefixtures("chdir")
+
+
+def test_call_loop_async(monkeypatch):
+    def handler(request: httpx.Request):
+        return httpx.Response(200, text=f"sunny in {request.url.path[1:]}")
+
+    monkeypatch.setattr(network, "async_http_client", lambda: httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+
+    session = ChatSession(config, manifest=weather_manifest)
+    session.append_user_question("How is the weather?")
+    events = []
+    asyncio.run(session.call_loop_async(lambda callback_type, data: events.append((callback_type, data))))
+
+    assert [callback_type for (callback_type, _) in events] == ["function_call", "function", "bot"]
+    assert events[1] == ("function", ("weather", "sunny in Tokyo"))
+    assert events[2] == ("bot", "It is sunny in Tokyo")
+    assert session.history.last_message()["content"] == "It is sunny in Tokyo"
+
+
+def test_concurrent_sessions():
+    sessions = [ChatSession(config, manifest={"model": {"engine_name": "async", "model_name": "async"}}) for _ in range(20)]
+
+    async def talk(session: ChatSession, i: int):
+        session.append_user_question(f"hello {i}")
+        await session.call_llm_async()
+
+    async def main():
+        await asyncio.gather(*[talk(session, i) for i, session in enumerate(sessions)])
+
+    asyncio.run(main())
+    assert AsyncEngine.max_running == 20
+    assert [session.history.last_message()["content"] for session in sessions] == [f"echo: hello {i}" for i in range(20)]
+
+
+class FakeAsyncCompletions:
+    async def create(self, **params):
+        self.params = params
+        message = NS(role="assistant", content="Hello", function_call=None)
+        return NS(choices=[NS(message=message)], usage=NS(total_tokens=12))
+
+
+class FakeAsyncOpenAI:
+    instances: list = []
+
+    def __init__(self, api_key, base_url, http_client):
+        self.completions = FakeAsyncCompletions()
+        self.chat = NS(completions=self.completions)
+        FakeAsyncOpenAI.instances.append(self)
+
+
+def test_openai_async(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "test")
+    monkeypatch.setattr(openai_gpt, "AsyncOpenAI", FakeAsyncOpenAI)
+    llm_model = LlmModel(
+        {"engine_name": "openai-gpt", "model_name": "gpt-3.5-turbo", "api_key": "OPENAI_API_KEY"}, {"openai-gpt": LLMEngineOpenAIGPT}
+    )
+    engine = llm_model.engine
+    assert isinstance(engine, LLMEngineOpenAIGPT)
+
+    result = asyncio.run(llm_model.generate_response_async([{"role": "user", "content": "Hi"}], Manifest({}), False))
+    assert result == ("assistant", "Hello", None, 12)
+    assert FakeAsyncOpenAI.instances[-1].completions.params["stream"] is False
@@ -0,0 +1,116 @@
+import os
+import sys
+from typing import List
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.chat_config import ChatConfig  # noqa: E402
+from slashgpt.chat_session import ChatSession  # noqa: E402
+from slashgpt.context_window import ContextWindow  # noqa: E402
+from slashgpt.llms.engine.base import LLMEngineBase  # noqa: E402
+from slashgpt.manifest import Manifest  # noqa: E402
+
+current_dir = os.path.dirname(__file__)
+
+
+class WordCountEngine(LLMEngineBase):
+    """Counts one token per word, and returns the number of messages it received"""
+
+    counted: List[str] = []
+
+    def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        self.last_messages = messages
+        return ("assistant", f"got {len(messages)}", None, 0)
+
+    def num_tokens(self, text: str):
+        WordCountEngine.counted.append(text)
+        return len(text.split())
+
+
+config = ChatConfig(current_dir, llm_engine_configs={"word_count": WordCountEngine})
+
+# Each message costs 4 (overhead) + words
+mock_model = {"engine_name": "word_count", "model_name": "word_count", "max_token": 40}
+
+
+pytestmark = pytest.mark.usefixtures("chdir")
+
+
+def sent(session: ChatSession):
+    return [message["content"] for message in session.llm_model.engine.last_messages]
+
+
+def test_no_context_window():
+    session = ChatSession(config, manifest={"model": mock_model, "prompt": "system prompt"})
+    assert session.context_window is None
+    for i in range(10):
+        session.append_user_question(f"question {i}")
+    session.call_llm()
+    assert len(sent(session)) == 11
+
+
+def test_sliding_window():
+    manifest = {"model": mock_model, "prompt": "system prompt", "context_window": {"reserve": 10}}
+    session = ChatSession(config, manifest=manifest)
+    for i in range(10):
+        session.append_user_question(f"question {i}")
+    session.call_llm()
+    # budget = 40 - 10 = 30: system (6) + 4 questions (6 each)
+    assert sent(session) == ["system prompt", "question 6", "question 7", "question 8", "question 9"]
+
+
+def test_token_counts_are_cached():
+    manifest = {"model": mock_model, "prompt": "system prompt", "context_window": {"reserve": 10}}
+    session = ChatSession(config, manifest=manifest)
+    session.append_user_question("question 0")
+    session.call_llm()
+    WordCountEngine.counted = []
+    session.append_user_question("question 1")
+    session.call_llm()
+    # Only the new question and the new answer are counted
+    assert WordCountEngine.counted == ["question 1", "got 4"]
+
+
+def test_keep_presets():
+    manifest = {
+        "model": mock_model,
+        "prompt": "system prompt",
+        "intro": ["hello"],
+        "context_window": {"policy": "keep_presets", "reserve": 10},
+    }
+    session = ChatSession(config, manifest=manifest)
+    for i in range(10):
+        session.append_user_question(f"question {i}")
+    session.call_llm()
+    assert sent(session) == ["system prompt", "hello", "question 7", "question 8", "question 9"]
+
+
+def test_drop_function_results():
+    manifest = {"model": mock_model, "prompt": "system prompt", "context_window": {"policy": "drop_function_results", "reserve": 10}}
+    session = ChatSession(config, manifest=manifest)
+    session.append_user_question("question 0")
+    session.append_message("function", "a long result of the function", False, "func")
+    session.append_user_question("question 1")
+    session.append_user_question("question 2")
+    session.call_llm()
+    assert sent(session) == ["system prompt", "question 0", "question 1", "question 2"]
+
+
+def test_last_message_is_always_sent(capsys):
+    session = ChatSession(config, manifest={"model": mock_model, "prompt": "system prompt"}, context_window=ContextWindow(max_tokens=8, reserve=0))
+    session.append_user_question("a very long question which exceeds the budget")
+    session.call_llm()
+    assert sent(session) == ["system prompt", "a very long question which exceeds the budget"]
+    assert "exceed the budget (8)" in capsys.readouterr().out
+
+
+def test_set_message_updates_token_count():
+    session = ChatSession(config, manifest={"model": mock_model, "prompt": "system prompt"}, context_window=ContextWindow())
+    session.append_user_question("question")
+    assert session.history.message_tokens() == [6, 5]
+    session.history.set_message(0, {"role": "system", "content": "a longer system prompt"})
+    assert session.history.message_tokens() == [8, 5]
+    session.history.pop_message()
+    assert session.history.message_tokens() == [8]
@@ -0,0 +1,150 @@
+import asyncio
+import json
+import os
+import sys
+from typing import List
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt import embedding_router  # noqa: E402
+from slashgpt.chat_app import ChatApplication  # noqa: E402
+from slashgpt.chat_config_with_manifests import ChatConfigWithManifests  # noqa: E402
+from slashgpt.dbs.vector_engine import VectorEngine  # noqa: E402
+from slashgpt.embedding_router import EmbeddingRouter  # noqa: E402
+from slashgpt.llms import semantic_cache  # noqa: E402
+from slashgpt.llms.model import LlmModel  # noqa: E402
+from slashgpt.manifest import Manifest  # noqa: E402
+
+current_dir = os.path.dirname(__file__)
+
+WORDS = ["weather", "rain", "sunny", "recipe", "cook", "dinner", "tomorrow"]
+
+MOCK = {"engine_name": "mock", "model_name": "mock"}
+
+MANIFESTS = {
+    "dispatcher": {
+        "title": "Dispatcher",
+        "model": {**MOCK, "replies": [{"function_call": {"name": "categorize", "arguments": {"question": "rain tomorrow", "category": "weather"}}}]},
+        "functions": [
+            {
+                "name": "categorize",
+                "description": "Categorize the question",
+                "parameters": {"type": "object", "properties": {"question": {"type": "string"}, "category": {"type": "string"}}},
+            }
+        ],
+        "actions": {"categorize": {"type": "emit", "emit_method": "switch_session", "emit_data": {"message": "{question}", "agent": "{category}"}}},
+        "agents": ["weather", "cook"],
+        "prompt": ["Categorize the question.", "{agents}"],
+        "router": {"engine_type": "fake", "threshold": 0.5, "margin": 0.1},
+    },
+    "weather": {"title": "Weather", "description": "weather forecast", "sample": "Is it sunny?", "model": {**MOCK, "replies": ["Sunny."]}},
+    "cook": {"title": "Cook", "description": "recipe to cook", "sample": "Dinner recipe?", "model": {**MOCK, "replies": ["Curry."]}},
+}
+
+
+class FakeVectorEngine(VectorEngine):
+    """Bag of words (ignoring "?" and ".")"""
+
+    calls = 0
+
+    def __init__(self, verbose: bool = False):
+        pass
+
+    def query_to_vector(self, query: str) -> List[float]:
+        FakeVectorEngine.calls += 1
+        words = query.lower().replace("?", "").replace(".", "").split()
+        return [float(words.count(word)) for word in WORDS]
+
+    def results_to_articles(self, results, query, messages, llm_model) -> str:
+        return ""
+
+
+class FailingVectorEngine(FakeVectorEngine):
+    def query_to_vector(self, query: str) -> List[float]:
+        raise ConnectionError("network is unreachable")
+
+
+@pytest.fixture(autouse=True)
+def agents(chdir, monkeypatch):
+    monkeypatch.setitem(semantic_cache.vector_engines, "fake", FakeVectorEngine)
+    monkeypatch.setitem(semantic_cache.vector_engines, "failing", FailingVectorEngine)
+    monkeypatch.setattr(embedding_router, "_routers", {})
+    os.makedirs("manifests")
+    for name, manifest in MANIFESTS.items():
+        with open(f"manifests/{name}.json", "w") as f:
+            json.dump(manifest, f)
+
+
+def new_app():
+    config = ChatConfigWithManifests(current_dir, "manifests")
+    events = []
+    app = ChatApplication(config, lambda callback_type, data: events.append((callback_type, data)), model=LlmModel(MOCK, config.llm_engine_configs))
+    app.switch_session("dispatcher")
+    return (app, events)
+
+
+def test_route():
+    (app, events) = new_app()
+    dispatcher = app.session
+    dispatcher.append_user_question("Is it sunny weather tomorrow?")
+    app.process_llm()
+    # The question is routed to the weather agent without calling the LLM of the dispatcher
+    assert dispatcher.llm_model.engine.calls == 0
+    assert dispatcher.router.stats == {"routed": 1, "fallbacks": 0}
+    assert app.session.agent_name == "weather"
+    assert events[-1] == ("bot", "Sunny.")
+    (function_call,) = [data for (callback_type, data) in events if callback_type == "function_call"]
+    assert function_call.to_dict() == {"name": "categorize", "arguments": {"question": "Is it sunny weather tomorrow?", "category": "weather"}}
+
+
+def test_fallback():
+    (app, events) = new_app()
+    dispatcher = app.session
+    # Not confident (no words about agents), so the LLM categorizes it
+    dispatcher.append_user_question("Hello")
+    app.process_llm()
+    assert dispatcher.llm_model.engine.calls == 1
+    assert dispatcher.router.stats["fallbacks"] == 1
+    assert app.session.agent_name == "weather"
+
+
+def test_vector_engine_error():
+    with open("manifests/dispatcher.json", "w") as f:
+        json.dump({**MANIFESTS["dispatcher"], "router": {"engine_type": "failing"}}, f)
+    (app, _) = new_app()
+    dispatcher = app.session
+    dispatcher.append_user_question("Is it sunny weather tomorrow?")
+    app.process_llm()
+    # The LLM categorizes the question instead
+    assert dispatcher.llm_model.engine.calls == 1
+    assert dispatcher.router.stats == {"routed": 0, "fallbacks": 1}
+    assert app.session.agent_name == "weather"
+
+
+def test_centroids():
+    (app, _) = new_app()
+    router = app.session.router
+    assert router.agents == {"weather": ["weather forecast", "Is it sunny?"], "cook": ["recipe to cook", "Dinner recipe?"]}
+    assert router.classify("dinner recipe")[0] == "cook"
+    calls = FakeVectorEngine.calls
+    # Centroids are computed once, and shared by sessions
+    (app, _) = new_app()
+    assert app.session.router is router
+    assert router.classify("sunny weather")[0] == "weather"
+    assert FakeVectorEngine.calls == calls + 1
+
+
+def test_async():
+    (app, _) = new_app()
+    dispatcher = app.session
+    dispatcher.append_user_question("Cook a dinner recipe")
+    (res, function_call, token_usage) = asyncio.run(dispatcher.call_llm_async())
+    assert (res, token_usage) == (None, 0)
+    assert function_call.to_dict()["arguments"]["category"] == "cook"
+
+
+def test_disabled():
+    assert EmbeddingRouter.from_manifest(Manifest({"agents": ["cook"]}), MANIFESTS) is None
+    assert EmbeddingRouter.from_manifest(Manifest({"router": True}), MANIFESTS) is None
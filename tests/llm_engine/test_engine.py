@@ -3,6 +3,7 @@ import os
 import sys
 from typing import List
 
+import pytest
 from dotenv import load_dotenv
 
 sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
@@ -16,6 +17,9 @@ load_dotenv()
 current_dir = os.path.dirname(__file__)
 
 
+pytestmark = pytest.mark.usefixtures("chdir")
+
+
 class MockLlmEngine(LLMEngineBase):
     def __init__(self, llm_model):
         super().__init__(llm_model)
@@ -0,0 +1,82 @@
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.chat_config import ChatConfig  # noqa: E402
+from slashgpt.chat_session import ChatSession  # noqa: E402
+from slashgpt.history.storage.memory import ChatHistoryMemoryStorage  # noqa: E402
+from slashgpt.utils import trace  # noqa: E402
+from slashgpt.utils.metrics import Histogram, MetricsExporter, MetricsRegistry  # noqa: E402
+
+current_dir = os.path.dirname(__file__)
+
+config = ChatConfig(current_dir)
+
+manifest = {
+    "model": {"engine_name": "mock", "model_name": "mock", "replies": [{"function_call": {"name": "greet", "arguments": {"name": "Bob"}}}, "Done"]},
+    "prompt": "system prompt",
+    "functions": [{"name": "greet", "description": "greet", "parameters": {"type": "object", "properties": {"name": {"type": "string"}}}}],
+    "actions": {"greet": {"type": "message_template", "message": "Hello {name}"}},
+}
+
+
+pytestmark = pytest.mark.usefixtures("chdir")
+
+
+@pytest.fixture
+def metrics():
+    metrics = MetricsRegistry()
+    exporter = MetricsExporter(metrics)
+    trace.add_exporter(exporter)
+    yield metrics
+    trace.remove_exporter(exporter)
+
+
+def test_chat_metrics(metrics):
+    session = ChatSession(config, manifest=manifest, agent_name="greeter", history_engine=ChatHistoryMemoryStorage("sample", "greeter"))
+    session.append_user_question("Hi")
+    session.call_loop(lambda callback_type, data: None)
+
+    labels = {"agent": "greeter", "model": "mock"}
+    assert metrics.llm_latency.get(engine="mock", **labels)[1] == 2
+    # "system prompt Hi" for the function call, and "system prompt Hi Hello Bob" (with the function result) for the reply
+    assert metrics.llm_tokens.get(type="prompt", **labels) == 3 + 5
+    assert metrics.llm_tokens.get(type="completion", **labels) == 1
+    assert metrics.function_latency.get(type="message_template", function="greet")[1] == 1
+    assert metrics.history_write_latency.get(storage="memory")[1] > 0
+    assert metrics.errors.get(operation="llm") == 0
+
+
+def test_errors(metrics):
+    with pytest.raises(ValueError):
+        with trace.span("llm", model="mock"):
+            raise ValueError("failed")
+    assert metrics.errors.get(operation="llm") == 1
+
+
+def test_render():
+    metrics = MetricsRegistry()
+    metrics.pooled_sessions.set_function(lambda: 3)
+    metrics.active_sessions.inc()
+    metrics.active_sessions.inc()
+    metrics.active_sessions.dec()
+    metrics.llm_tokens.inc(10, agent='say "hi"', model="mock", type="prompt")
+    histogram = metrics.histogram("test_seconds", "Test", ("name",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, name="a")
+    histogram.observe(0.5, name="a")
+    histogram.observe(5, name="a")
+    text = metrics.render()
+    assert "# TYPE slashgpt_pooled_sessions gauge\nslashgpt_pooled_sessions 3\n" in text
+    assert "# TYPE slashgpt_active_sessions gauge\nslashgpt_active_sessions 1\n" in text
+    assert 'slashgpt_llm_tokens_total{agent="say \\"hi\\"",model="mock",type="prompt"} 10\n' in text
+    assert "# TYPE test_seconds histogram\n" in text
+    assert 'test_seconds_bucket{name="a",le="0.1"} 1\n' in text
+    assert 'test_seconds_bucket{name="a",le="1"} 2\n' in text
+    assert 'test_seconds_bucket{name="a",le="+Inf"} 3\n' in text
+    assert 'test_seconds_sum{name="a"} 5.55\ntest_seconds_count{name="a"} 3\n' in text
+    with pytest.raises(ValueError):
+        metrics.histogram("test_seconds", "Test")
+    assert isinstance(histogram, Histogram)
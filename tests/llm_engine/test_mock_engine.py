@@ -0,0 +1,83 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.chat_config import ChatConfig  # noqa: E402
+from slashgpt.chat_session import ChatSession  # noqa: E402
+from slashgpt.llms.engine.mock import LLMEngineMock  # noqa: E402
+
+current_dir = os.path.dirname(__file__)
+
+config = ChatConfig(current_dir)
+
+
+pytestmark = pytest.mark.usefixtures("chdir")
+
+
+def new_session(model: dict, **manifest):
+    return ChatSession(config, manifest={"model": {"engine_name": "mock", "model_name": "mock", **model}, **manifest})
+
+
+def talk(session: ChatSession, question: str):
+    session.append_user_question(question)
+    events = []
+    session.call_loop(lambda callback_type, data: events.append((callback_type, data)))
+    return events
+
+
+def test_echo():
+    session = new_session({})
+    assert isinstance(session.llm_model.engine, LLMEngineMock)
+    assert talk(session, "Hello World") == [("bot", "Hello World")]
+    assert session.llm_model.engine.calls == 1
+
+
+def test_scripted_replies():
+    session = new_session({"replies": ["one", {"content": "two"}]})
+    assert talk(session, "Hi") == [("bot", "one")]
+    assert talk(session, "Hi") == [("bot", "two")]
+    assert talk(session, "Hi") == [("bot", "one")]
+
+
+def test_function_call():
+    manifest = {
+        "functions": [{"name": "greet", "description": "greet", "parameters": {"type": "object", "properties": {"name": {"type": "string"}}}}],
+        "actions": {"greet": {"type": "message_template", "message": "Hello {name}"}},
+    }
+    session = new_session({"replies": [{"function_call": {"name": "greet", "arguments": {"name": "Bob"}}}, "Done"]}, **manifest)
+    events = talk(session, "Hi")
+    assert [callback_type for (callback_type, _) in events] == ["function_call", "function", "bot"]
+    assert events[0][1].to_dict() == {"name": "greet", "arguments": {"name": "Bob"}}
+    assert events[1][1] == ("greet", "Hello Bob")
+    assert events[2][1] == "Done"
+
+
+def test_stream():
+    session = new_session({"replies": ["Hello big World"]}, stream=True)
+    assert talk(session, "Hi") == [("bot_delta", "Hello "), ("bot_delta", "big "), ("bot_delta", "World"), ("bot", "Hello big World")]
+
+
+def test_token_usage():
+    engine = new_session({"replies": ["a b c"]}).llm_model.engine
+    messages = [{"role": "system", "content": "one two"}, {"role": "user", "content": "three"}]
+    assert engine.chat_completion(messages, None, False) == ("assistant", "a b c", None, 6)
+
+
+def test_latency():
+    session = new_session({"replies": ["a b c d e"], "latency": 0.05, "tokens_per_second": 100})
+    start = time.perf_counter()
+    talk(session, "Hi")
+    # 50ms before the first token, and 10ms for each of the following 4 tokens
+    assert time.perf_counter() - start >= 0.09
+
+
+def test_async():
+    session = new_session({"replies": ["async"], "latency": 0.01})
+    session.append_user_question("Hi")
+    (res, function_call, _) = asyncio.run(session.call_llm_async())
+    assert (res, function_call) == ("async", None)
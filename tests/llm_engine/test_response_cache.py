@@ -0,0 +1,118 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.chat_config import ChatConfig  # noqa: E402
+from slashgpt.chat_session import ChatSession  # noqa: E402
+from slashgpt.llms.response_cache import MemoryCacheBackend, ResponseCache, SQLiteCacheBackend  # noqa: E402
+
+current_dir = os.path.dirname(__file__)
+
+config = ChatConfig(current_dir)
+
+functions = [{"name": "categorize", "description": "categorize", "parameters": {"type": "object", "properties": {"category": {"type": "string"}}}}]
+
+
+pytestmark = pytest.mark.usefixtures("chdir")
+
+
+def new_session(cache, replies=["one", "two"], **manifest):
+    model = {"engine_name": "mock", "model_name": "mock", "replies": replies}
+    return ChatSession(config, manifest={"model": model, "prompt": "system prompt", "temperature": 0, **manifest}, response_cache=cache)
+
+
+def ask(session: ChatSession, question: str):
+    session.append_user_question(question)
+    return session.call_llm()
+
+
+def test_hit():
+    cache = ResponseCache()
+    session = new_session(cache)
+    assert ask(session, "Hi") == ("one", None, 4)
+    # A new session with the same question gets the cached response (without the token usage)
+    session = new_session(cache)
+    assert ask(session, "Hi") == ("one", None, 0)
+    assert session.llm_model.engine.calls == 0
+    assert ask(new_session(cache), "Hello") == ("one", None, 4)
+    assert cache.stats == {"hits": 1, "misses": 2}
+
+
+def test_key():
+    cache = ResponseCache()
+    ask(new_session(cache), "Hi")
+    # The temperature and functions are parts of the key
+    assert ask(new_session(cache, temperature=0.5), "Hi")[2] == 4
+    assert ask(new_session(cache, functions=functions), "Hi")[2] == 4
+    assert ask(new_session(cache, functions=functions), "Hi")[2] == 0
+    assert cache.stats == {"hits": 1, "misses": 3}
+
+
+def test_function_call():
+    cache = ResponseCache()
+    replies = [{"function_call": {"name": "categorize", "arguments": {"category": "cook"}}}]
+    (_, function_call, _) = ask(new_session(cache, replies, functions=functions), "Recipe")
+    session = new_session(cache, replies, functions=functions)
+    (res, cached, token_usage) = ask(session, "Recipe")
+    assert (res, token_usage) == (None, 0)
+    assert cached.to_dict() == function_call.to_dict() == {"name": "categorize", "arguments": {"category": "cook"}}
+
+
+def test_stream():
+    cache = ResponseCache()
+    ask(new_session(cache, stream=True), "Hi")
+    deltas = []
+    session = new_session(cache, stream=True)
+    session.append_user_question("Hi")
+    session.call_llm(deltas.append)
+    assert deltas == ["one"]
+
+
+def test_async():
+    cache = ResponseCache()
+    ask(new_session(cache), "Hi")
+    session = new_session(cache)
+    session.append_user_question("Hi")
+    assert asyncio.run(session.call_llm_async()) == ("one", None, 0)
+
+
+def test_ttl():
+    cache = ResponseCache(ttl=0.05)
+    ask(new_session(cache), "Hi")
+    time.sleep(0.06)
+    assert ask(new_session(cache), "Hi")[2] == 4
+
+
+def test_lru():
+    backend = MemoryCacheBackend(max_entries=2)
+    backend.set("a", {"content": "a"}, None)
+    backend.set("b", {"content": "b"}, None)
+    assert backend.get("a") == {"content": "a"}
+    backend.set("c", {"content": "c"}, None)
+    assert backend.get("b") is None
+    assert (len(backend), backend.evictions) == (2, 1)
+
+
+def test_sqlite():
+    backend = SQLiteCacheBackend("cache.sqlite3", max_entries=2)
+    cache = ResponseCache(backend)
+    ask(new_session(cache), "Hi")
+    # Another process (or a restart) gets the cached response from the database
+    assert ask(new_session(ResponseCache(SQLiteCacheBackend("cache.sqlite3"))), "Hi")[2] == 0
+    backend.set("a", {"content": "a"}, None)
+    backend.set("b", {"content": "b"}, time.time() - 1)
+    assert (len(backend), backend.evictions) == (2, 1)
+    assert backend.get("b") is None
+
+
+def test_manifest():
+    assert new_session(None).response_cache is None
+    session = ChatSession(config, manifest={"model": {"engine_name": "mock", "model_name": "mock"}, "cache": {"ttl": 60}})
+    assert session.response_cache.ttl == 60
+    # Sessions with the same settings share the cache
+    assert ResponseCache.from_manifest(session.manifest) is session.response_cache
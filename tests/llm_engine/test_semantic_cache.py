@@ -0,0 +1,145 @@
+import asyncio
+import os
+import sys
+import time
+from typing import List
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.chat_config import ChatConfig  # noqa: E402
+from slashgpt.chat_session import ChatSession  # noqa: E402
+from slashgpt.dbs.vector_engine import VectorEngine  # noqa: E402
+from slashgpt.history.storage.memory import ChatHistoryMemoryStorage  # noqa: E402
+from slashgpt.llms import semantic_cache  # noqa: E402
+from slashgpt.llms.semantic_cache import SemanticCache  # noqa: E402
+
+current_dir = os.path.dirname(__file__)
+
+config = ChatConfig(current_dir)
+
+WORDS = ["what", "are", "your", "opening", "hours", "when", "do", "you", "open", "where", "is", "the", "shop"]
+
+
+class FakeVectorEngine(VectorEngine):
+    """Bag of words (ignoring "?")"""
+
+    def __init__(self, verbose: bool = False):
+        self.calls = 0
+
+    def query_to_vector(self, query: str) -> List[float]:
+        self.calls += 1
+        words = query.lower().replace("?", "").split()
+        return [float(words.count(word)) for word in WORDS]
+
+    def results_to_articles(self, results, query, messages, llm_model) -> str:
+        return ""
+
+
+pytestmark = pytest.mark.usefixtures("chdir")
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "python"])
+def numpy(request, monkeypatch):
+    if request.param and not semantic_cache.isLoadedNumpy:
+        pytest.skip("no numpy")
+    monkeypatch.setattr(semantic_cache, "isLoadedNumpy", request.param)
+
+
+def new_session(cache, agent_name="faq", replies=["We open at 9am.", "The shop is in Tokyo."], **manifest):
+    model = {"engine_name": "mock", "model_name": "mock", "replies": replies}
+    history_engine = ChatHistoryMemoryStorage("sample", agent_name)
+    manifest = {"model": model, "prompt": "system prompt", **manifest}
+    return ChatSession(config, manifest=manifest, agent_name=agent_name, history_engine=history_engine, semantic_cache=cache)
+
+
+def ask(session: ChatSession, question: str):
+    session.append_user_question(question)
+    return session.call_llm()
+
+
+def test_similar_question(numpy):
+    cache = SemanticCache(FakeVectorEngine(), threshold=0.8)
+    assert ask(new_session(cache), "What are your opening hours?")[0] == "We open at 9am."
+    session = new_session(cache)
+    assert ask(session, "what are your opening hours") == ("We open at 9am.", None, 0)
+    assert session.llm_model.engine.calls == 0
+    # Not similar enough
+    session = new_session(cache)
+    assert ask(session, "Where is the shop?") == ("We open at 9am.", None, 10)
+    assert session.llm_model.engine.calls == 1
+    assert cache.stats == {"hits": 1, "misses": 2}
+    assert len(cache.index("faq")) == 2
+
+
+def test_namespaces(numpy):
+    cache = SemanticCache(FakeVectorEngine(), threshold=0.8)
+    ask(new_session(cache), "What are your opening hours?")
+    assert ask(new_session(cache, "other", ["Other"]), "What are your opening hours?")[0] == "Other"
+    # Agents with the same namespace share answers
+    shared = {"semantic_cache": {"namespace": "faq"}}
+    assert ask(new_session(cache, "other", ["Other"], **shared), "What are your opening hours?")[0] == "We open at 9am."
+
+
+def test_function_call_not_cached(numpy):
+    cache = SemanticCache(FakeVectorEngine(), threshold=0.8)
+    functions = [{"name": "hours", "description": "hours", "parameters": {"type": "object", "properties": {}}}]
+    replies = [{"function_call": {"name": "hours", "arguments": {}}}]
+    ask(new_session(cache, replies=replies, functions=functions), "What are your opening hours?")
+    assert len(cache.index("faq")) == 0
+
+
+def test_eviction(numpy):
+    cache = SemanticCache(FakeVectorEngine(), threshold=0.99, max_entries=2)
+    cache.store("faq", cache.embed("opening hours"), "opening hours", "9am")
+    cache.store("faq", cache.embed("where is the shop"), "where is the shop", "Tokyo")
+    assert cache.lookup("faq", cache.embed("opening hours"))[0] == "9am"
+    cache.store("faq", cache.embed("when do you open"), "when do you open", "9am")
+    # The least recently used entry ("where is the shop") is evicted
+    assert cache.lookup("faq", cache.embed("where is the shop")) is None
+    assert cache.lookup("faq", cache.embed("opening hours"))[0] == "9am"
+    assert cache.lookup("faq", cache.embed("when do you open"))[0] == "9am"
+    assert cache.index("faq").evictions == 1
+
+
+def test_ttl(numpy):
+    cache = SemanticCache(FakeVectorEngine(), ttl=0.05)
+    cache.store("faq", cache.embed("opening hours"), "opening hours", "9am")
+    assert cache.lookup("faq", cache.embed("opening hours"))[0] == "9am"
+    time.sleep(0.06)
+    assert cache.lookup("faq", cache.embed("opening hours")) is None
+    assert len(cache.index("faq")) == 0
+
+
+def test_store_while_scoring(numpy, monkeypatch):
+    cache = SemanticCache(FakeVectorEngine(), threshold=0.99)
+    cache.store("faq", cache.embed("where is the shop"), "where is the shop", "Tokyo")
+    index = cache.index("faq")
+    search = index.search
+
+    def racing_search(vector, snapshot=None):
+        if snapshot is not None:
+            # Scored without the lock, so another session can store an answer meanwhile
+            cache.store("faq", cache.embed("opening hours"), "opening hours", "9am")
+        return search(vector, snapshot)
+
+    monkeypatch.setattr(index, "search", racing_search)
+    assert cache.lookup("faq", cache.embed("opening hours"))[0] == "9am"
+
+
+def test_async(numpy):
+    cache = SemanticCache(FakeVectorEngine(), threshold=0.8)
+    ask(new_session(cache), "What are your opening hours?")
+    session = new_session(cache)
+    session.append_user_question("what are your opening hours")
+    assert asyncio.run(session.call_llm_async()) == ("We open at 9am.", None, 0)
+
+
+def test_manifest(monkeypatch):
+    monkeypatch.setitem(semantic_cache.vector_engines, "fake", FakeVectorEngine)
+    assert new_session(None).semantic_cache is None
+    session = new_session(None, semantic_cache={"engine_type": "fake", "threshold": 0.9})
+    assert isinstance(session.semantic_cache.vector_engine, FakeVectorEngine)
+    assert session.semantic_cache.threshold == 0.9
+    assert SemanticCache.from_manifest(session.manifest) is session.semantic_cache
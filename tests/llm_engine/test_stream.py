@@ -0,0 +1,183 @@
+import os
+import sys
+import threading
+from types import SimpleNamespace as NS
+from typing import Callable, List
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.chat_config import ChatConfig  # noqa: E402
+from slashgpt.chat_session import ChatSession  # noqa: E402
+from slashgpt.function.function_call import FunctionCall  # noqa: E402
+from slashgpt.llms.engine import openai_gpt  # noqa: E402
+from slashgpt.llms.engine.base import LLMEngineBase  # noqa: E402
+from slashgpt.llms.engine.openai_gpt import LLMEngineOpenAIGPT  # noqa: E402
+from slashgpt.llms.model import LlmModel  # noqa: E402
+from slashgpt.manifest import Manifest  # noqa: E402
+
+current_dir = os.path.dirname(__file__)
+
+
+class StreamEngine(LLMEngineBase):
+    def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        return ("assistant", "Hello World", None, 0)
+
+    def chat_completion_stream(self, messages: List[dict], manifest: Manifest, verbose: bool, callback: Callable[[str], None]):
+        for delta in ["Hel", "lo ", "World"]:
+            callback(delta)
+        return ("assistant", "Hello World", None, 0)
+
+
+class NoStreamEngine(StreamEngine):
+    chat_completion_stream = LLMEngineBase.chat_completion_stream
+
+
+config = ChatConfig(current_dir, llm_engine_configs={"stream": StreamEngine, "no_stream": NoStreamEngine})
+
+
+pytestmark = pytest.mark.usefixtures("chdir")
+
+
+def talk(manifest: dict):
+    session = ChatSession(config, manifest=manifest)
+    session.append_user_question("Hi")
+    events = []
+    session.call_loop(lambda callback_type, data: events.append((callback_type, data)))
+    return (session, events)
+
+
+def test_stream():
+    (session, events) = talk({"model": {"engine_name": "stream", "model_name": "stream"}, "stream": True})
+    assert events == [("bot_delta", "Hel"), ("bot_delta", "lo "), ("bot_delta", "World"), ("bot", "Hello World")]
+    assert session.history.last_message() == {"role": "assistant", "content": "Hello World"}
+
+
+def test_stream_disabled():
+    (_, events) = talk({"model": {"engine_name": "stream", "model_name": "stream"}})
+    assert events == [("bot", "Hello World")]
+
+
+def test_engine_without_stream():
+    (_, events) = talk({"model": {"engine_name": "no_stream", "model_name": "no_stream"}, "stream": True})
+    assert events == [("bot_delta", "Hello World"), ("bot", "Hello World")]
+
+
+def chunk(content=None, role=None, name=None, arguments=None, index=0):
+    function_call = NS(name=name, arguments=arguments) if name is not None or arguments is not None else None
+    return NS(choices=[NS(index=index, delta=NS(role=role, content=content, function_call=function_call))])
+
+
+class FakeCompletions:
+    def __init__(self, chunks):
+        self.chunks = chunks
+        self.params = None
+
+    def create(self, **params):
+        self.params = params
+        return iter(self.chunks)
+
+
+class FakeOpenAI:
+    def __init__(self, api_key, base_url, http_client):
+        self.chat = NS(completions=FakeCompletions([]))
+
+
+@pytest.fixture
+def openai_engine(monkeypatch):
+    monkeypatch.setenv("OPENAI_API_KEY", "dummy")
+    monkeypatch.setattr(openai_gpt, "OpenAI", FakeOpenAI)
+    llm_model = LlmModel(
+        {"engine_name": "openai-gpt", "model_name": "gpt-3.5-turbo", "api_key": "OPENAI_API_KEY"}, {"openai-gpt": LLMEngineOpenAIGPT}
+    )
+    return llm_model.engine
+
+
+def set_chunks(engine, chunks):
+    engine.client.chat.completions.chunks = chunks
+    return engine.client.chat.completions
+
+
+def test_openai_stream(openai_engine):
+    completions = set_chunks(openai_engine, [chunk(role="assistant"), chunk("Hel"), chunk("Hi", index=1), chunk("lo"), NS(choices=[])])
+    deltas = []
+    (role, res, function_call, _) = openai_engine.chat_completion_stream([{"role": "user", "content": "Hi"}], Manifest({}), False, deltas.append)
+    assert completions.params["stream"] is True
+    assert (role, res, function_call) == ("assistant", "Hello", None)
+    assert deltas == ["Hel", "lo"]
+
+
+def test_openai_stream_function_call(openai_engine):
+    set_chunks(
+        openai_engine,
+        [chunk(role="assistant", name="get_weather", arguments=""), chunk(arguments='{"loca'), chunk(arguments='tion": "Tokyo"}')],
+    )
+    manifest = Manifest({"functions": [{"name": "get_weather", "parameters": {}}]})
+    (_, res, function_call, _) = openai_engine.chat_completion_stream([{"role": "user", "content": "Hi"}], manifest, False, lambda delta: None)
+    assert res is None
+    assert function_call.data() == {"name": "get_weather", "arguments": '{"location": "Tokyo"}'}
+
+
+def test_call_loop_events():
+    session = ChatSession(config, manifest={"model": {"engine_name": "stream", "model_name": "stream"}, "stream": True})
+    session.append_user_question("Hi")
+    events = list(session.call_loop_events())
+    assert events == [("bot_delta", "Hel"), ("bot_delta", "lo "), ("bot_delta", "World"), ("bot", "Hello World")]
+
+
+class FailEngine(StreamEngine):
+    def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        raise RuntimeError("failed")
+
+
+def test_call_loop_events_error():
+    session = ChatSession(
+        ChatConfig(current_dir, llm_engine_configs={"fail": FailEngine}), manifest={"model": {"engine_name": "fail", "model_name": "fail"}}
+    )
+    session.append_user_question("Hi")
+    [(callback_type, data)] = list(session.call_loop_events())
+    assert callback_type == "error" and str(data) == "failed"
+
+
+class FunctionEngine(StreamEngine):
+    def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        if messages[-1]["role"] == "function":
+            return ("assistant", messages[-1]["content"], None, 0)
+        return ("assistant", None, FunctionCall({"name": "greet", "arguments": '{"name": "Alice"}'}, manifest), 0)
+
+
+def test_call_loop_events_function_call():
+    manifest = {
+        "model": {"engine_name": "function", "model_name": "function"},
+        "functions": [{"name": "greet", "parameters": {}}],
+        "actions": {"greet": {"type": "message_template", "message": "Hello {name}"}},
+    }
+    session = ChatSession(ChatConfig(current_dir, llm_engine_configs={"function": FunctionEngine}), manifest=manifest)
+    session.append_user_question("Hi")
+    events = [(callback_type, data.to_dict() if isinstance(data, FunctionCall) else data) for callback_type, data in session.call_loop_events()]
+    assert events == [
+        ("function_call", {"name": "greet", "arguments": {"name": "Alice"}}),
+        ("function", ("greet", "Hello Alice")),
+        ("bot", "Hello Alice"),
+    ]
+
+
+class EndlessEngine(StreamEngine):
+    def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        return ("assistant", None, FunctionCall({"name": "greet", "arguments": '{"name": "Alice"}'}, manifest), 0)
+
+
+def test_call_loop_events_closed():
+    manifest = {
+        "model": {"engine_name": "endless", "model_name": "endless"},
+        "functions": [{"name": "greet", "parameters": {}}],
+        "actions": {"greet": {"type": "message_template", "message": "Hello {name}"}},
+    }
+    session = ChatSession(ChatConfig(current_dir, llm_engine_configs={"endless": EndlessEngine}), manifest=manifest)
+    session.append_user_question("Hi")
+    events = session.call_loop_events()
+    assert next(events)[0] == "function_call"
+    # The client disconnected: the loop stops, and close() returns after the thread finished
+    events.close()
+    assert not [thread for thread in threading.enumerate() if thread.name == "slashgpt-call-loop"]
@@ -0,0 +1,86 @@
+import os
+import sys
+from typing import List
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.llms import tokenizer  # noqa: E402
+from slashgpt.llms.engine.base import LLMEngineBase  # noqa: E402
+from slashgpt.llms.model import LlmModel  # noqa: E402
+from slashgpt.manifest import Manifest  # noqa: E402
+
+
+class WordEncoding:
+    """One token per word (tiktoken can not download encodings in tests)"""
+
+    def __init__(self, name):
+        self.name = name
+        self.encoded = []
+
+    def encode_ordinary(self, text):
+        self.encoded.append(text)
+        return text.split()
+
+    def encode_ordinary_batch(self, texts):
+        return [self.encode_ordinary(text) for text in texts]
+
+
+@pytest.fixture
+def encodings(monkeypatch):
+    encodings = {}
+
+    def get_encoding(name):
+        encodings[name] = WordEncoding(name)
+        return encodings[name]
+
+    monkeypatch.setattr(tokenizer.tiktoken, "get_encoding", get_encoding)
+    tokenizer.clear_cache()
+    yield encodings
+    tokenizer.clear_cache()
+
+
+def test_encoding_name():
+    assert tokenizer.encoding_name("gpt-4") == "cl100k_base"
+    assert tokenizer.encoding_name("text-davinci-003") == "p50k_base"
+    # Unknown models use the default encoding
+    assert tokenizer.encoding_name("llama2") == tokenizer.DEFAULT_ENCODING
+    assert tokenizer.encoding_name(None) == tokenizer.DEFAULT_ENCODING
+
+
+def test_encoding_is_loaded_once(encodings):
+    assert tokenizer.get_encoding("gpt-4") is tokenizer.get_encoding("gpt-3.5-turbo")
+    assert list(encodings.keys()) == ["cl100k_base"]
+
+
+def test_num_tokens_is_cached(encodings):
+    assert tokenizer.num_tokens("gpt-4", "one two three") == 3
+    assert tokenizer.num_tokens("gpt-3.5-turbo", "one two three") == 3
+    assert encodings["cl100k_base"].encoded == ["one two three"]
+
+
+def test_num_tokens_many(encodings):
+    assert tokenizer.num_tokens("gpt-4", "a b") == 2
+    assert tokenizer.num_tokens_many("gpt-4", ["a b", "c", "d e f"]) == [2, 1, 3]
+    # Only the texts which are not cached are encoded
+    assert encodings["cl100k_base"].encoded == ["a b", "c", "d e f"]
+
+
+def test_cache_size(encodings, monkeypatch):
+    monkeypatch.setattr(tokenizer, "CACHE_SIZE", 2)
+    tokenizer.num_tokens_many("gpt-4", ["a", "b", "c"])
+    tokenizer.num_tokens("gpt-4", "a")
+    assert encodings["cl100k_base"].encoded == ["a", "b", "c", "a"]
+
+
+class MockEngine(LLMEngineBase):
+    def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        return ("assistant", "", None, 0)
+
+
+def test_llm_model(encodings):
+    llm_model = LlmModel({"engine_name": "mock", "model_name": "gpt-4"}, {"mock": MockEngine})
+    assert llm_model.num_tokens("a b c") == 3
+    assert llm_model.num_tokens_many(["a b c", "d"]) == [3, 1]
+    assert llm_model.num_message_tokens({"role": "function", "content": "a b", "name": "f"}) == 4 + 3
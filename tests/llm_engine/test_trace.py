@@ -0,0 +1,146 @@
+import json
+import os
+import sys
+from typing import List
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.chat_config import ChatConfig  # noqa: E402
+from slashgpt.chat_session import ChatSession  # noqa: E402
+from slashgpt.dbs.db_base import VectorDBBase  # noqa: E402
+from slashgpt.history.storage.file import ChatHistoryFileStorage  # noqa: E402
+from slashgpt.utils import trace  # noqa: E402
+
+current_dir = os.path.dirname(__file__)
+
+config = ChatConfig(current_dir)
+
+manifest = {
+    "model": {"engine_name": "mock", "model_name": "mock", "replies": [{"function_call": {"name": "greet", "arguments": {"name": "Bob"}}}, "Done"]},
+    "prompt": "system prompt",
+    "functions": [{"name": "greet", "description": "greet", "parameters": {"type": "object", "properties": {"name": {"type": "string"}}}}],
+    "actions": {"greet": {"type": "message_template", "message": "Hello {name}"}},
+}
+
+
+pytestmark = pytest.mark.usefixtures("chdir")
+
+
+@pytest.fixture
+def exporter():
+    exporter = trace.InMemoryExporter()
+    trace.add_exporter(exporter)
+    yield exporter
+    trace.remove_exporter(exporter)
+
+
+def turn(session: ChatSession, question: str):
+    with trace.span("turn"):
+        with session.history.transaction():
+            session.append_user_question(question)
+            session.call_loop(lambda callback_type, data: None)
+
+
+def tree(spans: List[trace.Span]):
+    """Returns [(depth, name)] in the order spans started"""
+
+    def depth(span):
+        return 0 if span.parent is None else depth(span.parent) + 1
+
+    return [(depth(span), span.name) for span in sorted(spans, key=lambda span: span.start)]
+
+
+def test_spans(exporter):
+    session = ChatSession(config, manifest=manifest, history_engine=ChatHistoryFileStorage("sample", "agent"))
+    exporter.clear()
+    turn(session, "Hi")
+    names = [(depth, name) for (depth, name) in tree(exporter.spans) if name != "history.write"]
+    assert names == [
+        (0, "turn"),
+        (1, "append_user_question"),
+        (2, "format_question"),
+        (1, "call_loop"),
+        (2, "call_llm"),
+        (3, "prompt"),
+        (3, "llm"),
+        (2, "function_call"),
+        (2, "call_loop"),
+        (3, "call_llm"),
+        (4, "prompt"),
+        (4, "llm"),
+    ]
+    assert len({span.trace_id for span in exporter.spans}) == 1
+    writes = [span for span in exporter.spans if span.name == "history.write"]
+    assert len(writes) > 0
+    function_call = next(span for span in exporter.spans if span.name == "function_call")
+    assert function_call.attributes == {"function": "greet", "type": "message_template"}
+    assert next(span for span in exporter.spans if span.name == "call_llm").attributes["model"] == "mock"
+
+
+class FakeVectorDB(VectorDBBase):
+    def __init__(self):
+        pass
+
+    def query_to_vector(self, query: str) -> List[float]:
+        return [1.0]
+
+    def fetch_data(self, query_embedding: List[float]) -> List[str]:
+        return ["article"]
+
+    def results_to_articles(self, results, query, messages, llm_model) -> str:
+        return "\n".join(results)
+
+
+def test_rag_spans(exporter):
+    with trace.span("rag"):
+        FakeVectorDB().fetch_related_articles([{"role": "user", "content": "Hi"}], None)
+    assert tree(exporter.spans) == [(0, "rag"), (1, "embedding"), (1, "vector_query"), (1, "article_packing")]
+
+
+def test_disabled():
+    with trace.span("turn") as span:
+        assert span is None
+        assert trace.current_span() is None
+
+
+def test_error(exporter):
+    with pytest.raises(ValueError):
+        with trace.span("turn"):
+            raise ValueError("failed")
+    assert exporter.spans[0].attributes == {"error": "failed"}
+
+
+def test_stdout_json():
+    lines = []
+    exporter = trace.StdoutJSONExporter(lines.append)
+    trace.add_exporter(exporter)
+    try:
+        with trace.span("turn", agent="test"):
+            with trace.span("llm"):
+                pass
+    finally:
+        trace.remove_exporter(exporter)
+    (llm, turn) = [json.loads(line) for line in lines]
+    assert (llm["name"], turn["name"]) == ("llm", "turn")
+    assert llm["parent_id"] == turn["span_id"] and turn["parent_id"] is None
+    assert turn["attributes"] == {"agent": "test"}
+
+
+def test_waterfall():
+    lines = []
+    verbose = [False]
+    exporter = trace.WaterfallExporter(lines.append, lambda: verbose[0], root="turn")
+    trace.add_exporter(exporter)
+    try:
+        session = ChatSession(config, manifest=manifest)
+        turn(session, "Hi")
+        assert lines == []
+        verbose[0] = True
+        turn(session, "Hi")
+    finally:
+        trace.remove_exporter(exporter)
+    assert lines[0].startswith("turn ")
+    assert lines[1].startswith("  append_user_question ")
+    assert all(line.endswith("|") and "ms |" in line for line in lines)
@@ -0,0 +1,59 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.config_registry import ConfigRegistry  # noqa: E402
+
+current_dir = os.path.dirname(__file__)
+
+
+def write_manifest(path, name, title):
+    with open(path / f"{name}.json", "w") as f:
+        json.dump({"title": title, "prompt": ["prompt"]}, f)
+
+
+def touch(file, delta):
+    stat = os.stat(file)
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + delta))
+
+
+def test_config_is_cached(tmp_path):
+    write_manifest(tmp_path, "dog", "Dog")
+    registry = ConfigRegistry(current_dir, check_interval=0)
+    config = registry.get(str(tmp_path))
+    assert config.manifests["dog"]["title"] == "Dog"
+    assert registry.get(str(tmp_path)) is config
+
+
+def test_modified_manifest(tmp_path):
+    write_manifest(tmp_path, "dog", "Dog")
+    registry = ConfigRegistry(current_dir, check_interval=0)
+    config = registry.get(str(tmp_path))
+    write_manifest(tmp_path, "dog", "Puppy")
+    touch(tmp_path / "dog.json", 1_000_000_000)
+    reloaded = registry.get(str(tmp_path))
+    assert reloaded is not config
+    assert reloaded.manifests["dog"]["title"] == "Puppy"
+
+
+def test_added_and_removed_manifests(tmp_path):
+    write_manifest(tmp_path, "dog", "Dog")
+    registry = ConfigRegistry(current_dir, check_interval=0)
+    registry.get(str(tmp_path))
+    write_manifest(tmp_path, "cat", "Cat")
+    assert set(registry.get(str(tmp_path)).manifests.keys()) == {"dog", "cat"}
+    os.remove(tmp_path / "dog.json")
+    assert set(registry.get(str(tmp_path)).manifests.keys()) == {"cat"}
+
+
+def test_check_interval(tmp_path):
+    write_manifest(tmp_path, "dog", "Dog")
+    registry = ConfigRegistry(current_dir, check_interval=60)
+    config = registry.get(str(tmp_path))
+    write_manifest(tmp_path, "cat", "Cat")
+    # Not checked until the interval passes
+    assert registry.get(str(tmp_path)) is config
+    registry.invalidate(str(tmp_path))
+    assert "cat" in registry.get(str(tmp_path)).manifests
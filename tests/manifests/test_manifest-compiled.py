@@ -0,0 +1,101 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt import manifest as manifest_module  # noqa: E402
+from slashgpt.manifest import CompiledManifest, Manifest  # noqa: E402
+
+MODULE = """
+with open("loaded.txt", "a") as f:
+    f.write("loaded\\n")
+
+def hello():
+    return "hello"
+"""
+
+FUNCTIONS = [{"name": "hello", "description": "Say hello", "parameters": {"type": "object", "properties": {}}}]
+
+
+@pytest.fixture(autouse=True)
+def files(chdir):
+    with open("module.py", "w") as f:
+        f.write(MODULE)
+    with open("functions.json", "w") as f:
+        json.dump(FUNCTIONS, f)
+    with open("resource.txt", "w") as f:
+        f.write("resource contents")
+
+
+def touch(file, delta=1_000_000_000):
+    stat = os.stat(file)
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + delta))
+
+
+def loaded_count():
+    if not os.path.exists("loaded.txt"):
+        return 0
+    with open("loaded.txt") as f:
+        return len(f.readlines())
+
+
+@pytest.fixture
+def manifest_data():
+    return {
+        "title": "Compiled",
+        "functions": "functions.json",
+        "module": "module.py",
+        "resource": "resource.txt",
+        "prompt": ["Line 1", "{resource}"],
+    }
+
+
+def test_shared(manifest_data):
+    manifest = Manifest(manifest_data, ".", "compiled")
+    assert manifest.functions() == FUNCTIONS
+    assert manifest.prompt_data() == "Line 1\nresource contents"
+    # The same definition is compiled only once
+    assert Manifest(manifest_data, ".", "compiled").functions() is manifest.functions()
+    # Definitions are compiled by identity
+    assert Manifest(dict(manifest_data), ".", "compiled").functions() is not manifest.functions()
+
+
+def test_lazy_module(manifest_data):
+    manifest = Manifest(manifest_data, ".", "compiled")
+    assert loaded_count() == 0
+    assert manifest.get_module("hello")() == "hello"
+    assert loaded_count() == 1
+    assert Manifest(manifest_data, ".", "compiled").get_module("hello")() == "hello"
+    assert loaded_count() == 1
+
+
+def test_modified_files(manifest_data):
+    manifest = Manifest(manifest_data, ".", "compiled")
+    manifest.get_module("hello")
+    with open("functions.json", "w") as f:
+        json.dump(FUNCTIONS + [{"name": "bye", "description": "Say bye"}], f)
+    touch("functions.json")
+    touch("module.py")
+    with open("resource.txt", "w") as f:
+        f.write("new contents")
+    manifest = Manifest(manifest_data, ".", "compiled")
+    assert [function["name"] for function in manifest.functions()] == ["hello", "bye"]
+    assert manifest.prompt_data() == "Line 1\nnew contents"
+    manifest.get_module("hello")
+    assert loaded_count() == 2
+
+
+def test_invalidate(manifest_data):
+    functions = Manifest(manifest_data, ".", "compiled").functions()
+    CompiledManifest.invalidate(manifest_data)
+    assert Manifest(manifest_data, ".", "compiled").functions() is not functions
+
+
+def test_empty_manifests_are_not_cached():
+    count = len(manifest_module._compiled)
+    for _ in range(10):
+        assert Manifest({}, ".").functions() is None
+    assert len(manifest_module._compiled) == count
@@ -0,0 +1,113 @@
+import json
+import os
+import sys
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.chat_config_with_manifests import ChatConfigWithManifests  # noqa: E402
+from slashgpt.manifest_index import INDEX_FILE, ManifestIndex  # noqa: E402
+
+current_dir = os.path.dirname(__file__)
+
+
+def write_manifest(path, name, title):
+    with open(path / f"{name}.json", "w") as f:
+        json.dump({"title": title, "description": f"{title} agent", "prompt": ["prompt"]}, f)
+
+
+def touch(file, delta=1_000_000_000):
+    stat = os.stat(file)
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + delta))
+
+
+def test_lazy(tmp_path):
+    write_manifest(tmp_path, "dog", "Dog")
+    write_manifest(tmp_path, "cat", "Cat")
+    with open(tmp_path / "bird.yml", "w") as f:
+        f.write("title: Bird\n")
+    config = ChatConfigWithManifests(current_dir, str(tmp_path), lazy=True)
+    assert sorted(config.index.entries) == ["bird", "cat", "dog"]
+    assert config.index.parsed() == []
+    assert config.manifests["dog"]["title"] == "Dog"
+    assert config.manifests.get("bird") == {"title": "Bird"}
+    assert sorted(config.index.parsed()) == ["bird", "dog"]
+    assert config.has_manifest("cat")
+    assert sorted(config.index.parsed()) == ["bird", "cat", "dog"]
+
+
+def test_broken(tmp_path):
+    write_manifest(tmp_path, "dog", "Dog")
+    with open(tmp_path / "broken.json", "w") as f:
+        f.write("{")
+    index = ManifestIndex(str(tmp_path))
+    assert index.get("broken") is None
+    assert "broken" not in index
+    assert "dog" in index
+    assert [name for (name, _) in index.items()] == ["dog"]
+    # The mapping is consistent with __getitem__
+    assert sorted(index.entries) == ["broken", "dog"]
+    assert list(index.keys()) == ["dog"]
+    assert len(index) == 1
+    assert dict(index) == {"dog": index["dog"]}
+    assert list(index.values()) == [index["dog"]]
+    # Broken manifests are skipped in the eager mode
+    assert list(ChatConfigWithManifests(current_dir, str(tmp_path)).manifests.keys()) == ["dog"]
+
+
+def test_reload(tmp_path):
+    for lazy in [True, False]:
+        write_manifest(tmp_path, "dog", "Dog")
+        write_manifest(tmp_path, "cat", "Cat")
+        config = ChatConfigWithManifests(current_dir, str(tmp_path), lazy=lazy)
+        (dog, cat) = (config.manifests["dog"], config.manifests["cat"])
+        write_manifest(tmp_path, "cat", "Kitten")
+        touch(tmp_path / "cat.json")
+        write_manifest(tmp_path, "bird", "Bird")
+        config.reload()
+        # Only added or modified files are parsed again
+        assert config.manifests["dog"] is dog
+        assert config.manifests["cat"] is not cat
+        assert config.manifests["cat"]["title"] == "Kitten"
+        assert config.manifests["bird"]["title"] == "Bird"
+        os.remove(tmp_path / "bird.json")
+        config.reload()
+        assert not config.has_manifest("bird")
+        os.remove(tmp_path / "cat.json")
+
+
+def test_summary(tmp_path):
+    write_manifest(tmp_path, "dog", "Dog")
+    with open(tmp_path / "broken.json", "w") as f:
+        f.write("{")
+    (summary,) = ManifestIndex(str(tmp_path)).summary()
+    assert summary["name"] == "dog"
+    assert summary["title"] == "Dog"
+    assert summary["description"] == "Dog agent"
+    assert summary["mtime"] == os.stat(tmp_path / "dog.json").st_mtime_ns / 1e9
+
+
+def test_summary_broken_does_not_save(tmp_path):
+    write_manifest(tmp_path, "dog", "Dog")
+    with open(tmp_path / "broken.json", "w") as f:
+        f.write("{")
+    ManifestIndex(str(tmp_path)).summary()
+    os.utime(tmp_path / INDEX_FILE, ns=(0, 0))
+    # The index file is written only if any manifest is described newly
+    assert [entry["name"] for entry in ManifestIndex(str(tmp_path)).summary()] == ["dog"]
+    assert os.stat(tmp_path / INDEX_FILE).st_mtime_ns == 0
+
+
+def test_summary_index_file(tmp_path):
+    write_manifest(tmp_path, "dog", "Dog")
+    write_manifest(tmp_path, "cat", "Cat")
+    ManifestIndex(str(tmp_path)).summary()
+    assert os.path.exists(tmp_path / INDEX_FILE)
+    write_manifest(tmp_path, "cat", "Kitten")
+    touch(tmp_path / "cat.json")
+    index = ManifestIndex(str(tmp_path))
+    summary = index.summary()
+    # Titles and descriptions of unmodified manifests are read from the index file
+    assert index.parsed() == ["cat"]
+    assert sorted((entry["name"], entry["title"]) for entry in summary) == [("cat", "Kitten"), ("dog", "Dog")]
+    # The index file is not a manifest
+    assert sorted(index.keys()) == ["cat", "dog"]
@@ -0,0 +1,95 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt import manifest as manifest_module  # noqa: E402
+from slashgpt.chat_config_with_manifests import ChatConfigWithManifests  # noqa: E402
+from slashgpt.manifest import Manifest  # noqa: E402
+from slashgpt.manifest_snapshot import SNAPSHOT_FILE, build_snapshot, load_snapshot  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def folders(chdir):
+    os.makedirs("manifests")
+    os.makedirs("resources")
+    with open("manifests/dog.json", "w") as f:
+        json.dump({"title": "Dog", "functions": "./resources/dog.json"}, f)
+    with open("manifests/cat.yml", "w") as f:
+        f.write("title: Cat\n")
+    write_functions("bark")
+
+
+def write_functions(name):
+    with open("resources/dog.json", "w") as f:
+        json.dump([{"name": name, "description": name}], f)
+
+
+def touch(file, delta=1_000_000_000):
+    stat = os.stat(file)
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + delta))
+
+
+def test_snapshot(tmp_path):
+    snapshot = build_snapshot(str(tmp_path), "manifests")
+    assert sorted(snapshot["manifests"].keys()) == ["cat", "dog"]
+    assert list(snapshot["files"].keys()) == ["./resources/dog.json"]
+    config = ChatConfigWithManifests(str(tmp_path), "manifests", lazy=True)
+    # Manifests are loaded from the snapshot without parsing
+    assert sorted(config.index.parsed()) == ["cat", "dog"]
+    assert config.manifests["cat"] == {"title": "Cat"}
+    # The snapshot is ignored if it is disabled
+    assert ChatConfigWithManifests(str(tmp_path), "manifests", lazy=True, snapshot=False).index.parsed() == []
+
+
+def test_stale(tmp_path):
+    build_snapshot(str(tmp_path), "manifests")
+    with open("manifests/cat.yml", "w") as f:
+        f.write("title: Kitten\n")
+    touch("manifests/cat.yml")
+    write_functions("woof")
+    touch("resources/dog.json")
+    config = ChatConfigWithManifests(str(tmp_path), "manifests", lazy=True)
+    # Modified files are parsed from the source
+    assert config.index.parsed() == ["dog"]
+    assert config.manifests["cat"] == {"title": "Kitten"}
+    assert Manifest(config.manifests["dog"], str(tmp_path)).functions()[0]["name"] == "woof"
+
+
+def test_checkout(tmp_path):
+    build_snapshot(str(tmp_path), "manifests")
+    # A checkout or an installation changes mtimes without changing the contents
+    touch("manifests/cat.yml")
+    touch("resources/dog.json")
+    config = ChatConfigWithManifests(str(tmp_path), "manifests", lazy=True)
+    assert sorted(config.index.parsed()) == ["cat", "dog"]
+    assert Manifest(config.manifests["dog"], str(tmp_path)).functions()[0]["name"] == "bark"
+    # The preloaded contents are validated by the SHA-256, and by the new mtime next time
+    path = os.path.abspath("resources/dog.json")
+    assert manifest_module._preloaded[path][0] == os.stat(path).st_mtime_ns
+
+
+def test_preloaded_files(tmp_path):
+    build_snapshot(str(tmp_path), "manifests")
+    # The contents in the snapshot are used while the mtime and the size are not changed
+    stat = os.stat("resources/dog.json")
+    write_functions("barx")
+    os.utime("resources/dog.json", ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    config = ChatConfigWithManifests(str(tmp_path), "manifests")
+    assert Manifest(config.manifests["dog"], str(tmp_path)).functions()[0]["name"] == "bark"
+
+
+def test_broken(tmp_path):
+    build_snapshot(str(tmp_path), "manifests")
+    with open(f"manifests/{SNAPSHOT_FILE}", "r+b") as f:
+        f.seek(-1, os.SEEK_END)
+        last = f.read(1)
+        f.seek(-1, os.SEEK_END)
+        f.write(bytes([last[0] ^ 1]))
+    assert load_snapshot("manifests") is None
+    config = ChatConfigWithManifests(str(tmp_path), "manifests", lazy=True)
+    assert config.index.parsed() == []
+    assert config.manifests["dog"]["title"] == "Dog"
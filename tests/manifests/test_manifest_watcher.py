@@ -0,0 +1,124 @@
+import json
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.chat_config_with_manifests import ChatConfigWithManifests  # noqa: E402
+from slashgpt.chat_session import ChatSession  # noqa: E402
+from slashgpt.config_registry import ConfigRegistry  # noqa: E402
+from slashgpt.history.storage.memory import ChatHistoryMemoryStorage  # noqa: E402
+from slashgpt.manifest_watcher import ManifestWatcher  # noqa: E402
+
+MOCK = {"engine_name": "mock", "model_name": "mock"}
+
+
+@pytest.fixture(autouse=True)
+def folders(chdir):
+    os.makedirs("manifests")
+    os.makedirs("resources/functions")
+    os.makedirs("resources/module")
+    write_manifest("dog", "Dog")
+    write_functions(["bark"])
+    write_module("Bow")
+
+
+def write_manifest(name, title):
+    manifest = {
+        "title": title,
+        "prompt": "prompt",
+        "model": MOCK,
+        "functions": "./resources/functions/dog.json",
+        "module": "./resources/module/dog.py",
+    }
+    with open(f"manifests/{name}.json", "w") as f:
+        json.dump(manifest, f)
+
+
+def write_functions(names):
+    with open("resources/functions/dog.json", "w") as f:
+        json.dump([{"name": name, "description": name, "parameters": {"type": "object", "properties": {}}} for name in names], f)
+
+
+def write_module(value):
+    with open("resources/module/dog.py", "w") as f:
+        f.write(f"def bark():\n    return '{value}'\n")
+
+
+def touch(file, delta=1_000_000_000):
+    stat = os.stat(file)
+    os.utime(file, ns=(stat.st_atime_ns, stat.st_mtime_ns + delta))
+
+
+def new_session(config):
+    return ChatSession(config, manifest=config.manifests["dog"], agent_name="dog", history_engine=ChatHistoryMemoryStorage("sample", "dog"))
+
+
+def test_manifests(tmp_path):
+    config = ChatConfigWithManifests(str(tmp_path), "manifests")
+    watcher = ManifestWatcher(config)
+    dog = config.manifests["dog"]
+    assert not watcher.check()
+    write_manifest("cat", "Cat")
+    assert watcher.check()
+    # Only the added manifest is parsed
+    assert config.manifests["cat"]["title"] == "Cat"
+    assert config.manifests["dog"] is dog
+    write_manifest("dog", "Puppy")
+    touch("manifests/dog.json")
+    assert watcher.check()
+    assert config.manifests["dog"]["title"] == "Puppy"
+    assert watcher.stats == {"reloads": 2, "invalidated": 0}
+    # Other files in the folder (e.g, the index file) are not manifests
+    config.index.summary()
+    assert not watcher.check()
+
+
+def test_resources(tmp_path):
+    config = ChatConfigWithManifests(str(tmp_path), "manifests")
+    watcher = ManifestWatcher(config)
+    session = new_session(config)
+    assert session.manifest.get_module("bark")() == "Bow"
+    write_functions(["bark", "sit"])
+    touch("resources/functions/dog.json")
+    write_module("Woof")
+    touch("resources/module/dog.py")
+    assert watcher.check()
+    # The live session compiles the manifest again
+    assert [function["name"] for function in session.manifest.functions()] == ["bark", "sit"]
+    assert session.manifest.get_module("bark")() == "Woof"
+    assert watcher.stats == {"reloads": 0, "invalidated": 2}
+
+
+def test_switch_manifests(tmp_path):
+    os.makedirs("manifests2")
+    config = ChatConfigWithManifests(str(tmp_path), "manifests")
+    watcher = ManifestWatcher(config)
+    config.switch_manifests("manifests2")
+    assert not watcher.check()
+    with open("manifests2/bird.json", "w") as f:
+        json.dump({"title": "Bird"}, f)
+    assert watcher.check()
+    assert config.manifests["bird"]["title"] == "Bird"
+
+
+def wait_for(condition):
+    deadline = time.monotonic() + 5
+    while not condition() and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return condition()
+
+
+def test_background(tmp_path):
+    registry = ConfigRegistry(str(tmp_path), check_interval=0.01, watch=True)
+    config = registry.get("manifests")
+    try:
+        write_manifest("cat", "Cat")
+        assert wait_for(lambda: config.has_manifest("cat"))
+        # The config is updated in place
+        assert registry.get("manifests") is config
+    finally:
+        registry.invalidate()
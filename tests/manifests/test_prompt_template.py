@@ -0,0 +1,57 @@
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.manifest import Manifest  # noqa: E402
+from slashgpt.utils.prompt_template import PromptTemplate  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def resource(chdir):
+    with open("resource.txt", "w") as f:
+        f.write("Resource \\d {agents}")
+
+
+def test_segments():
+    template = PromptTemplate("Time {now}, {random} or {random}. {now} {unknown}")
+    assert template.placeholders == {"now": 1, "random": 2}
+    assert template.render({"now": "NOW", "random": ["a", "b"]}) == "Time NOW, a or b. {now} {unknown}"
+    # Placeholders without values are kept
+    assert template.render({}) == "Time {now}, {random} or {random}. {now} {unknown}"
+
+
+def test_prompt_data():
+    manifests = {"cook": {"description": "Cooking"}, "weather": {"description": "Weather forecast"}}
+    manifest_data = {
+        "prompt": ["{resource}", "Agents:", "{agents}", "Memory: {memory}", "Pick {random}, {random} or {random}."],
+        "resource": "resource.txt",
+        "agents": ["cook", "weather"],
+        "list": ["a", "b"],
+    }
+    manifest = Manifest(manifest_data, ".", "agent")
+    prompt = manifest.prompt_data(manifests, {"name": "Bob\n"})
+    # Values are inserted as they are (not as templates or regular expressions)
+    assert prompt.startswith("Resource \\d {agents}\nAgents:\ncook: Cooking\nweather: Weather forecast\nMemory: " + json.dumps({"name": "Bob\n"}))
+    # The list is not shuffled in place, and reused if there are more placeholders than items
+    assert manifest_data["list"] == ["a", "b"]
+    picks = prompt.split("Pick ")[1].rstrip(".").replace(" or ", ", ").split(", ")
+    assert sorted(picks[:2]) == ["a", "b"] and picks[2] == picks[0]
+
+
+def test_agents_cache():
+    manifest = Manifest({"prompt": "{agents}", "agents": ["cook"]}, ".", "agent")
+    manifests = {"cook": {"description": "Cooking"}}
+    assert manifest.prompt_data(manifests) == "cook: Cooking"
+    assert manifest.prompt_data({"cook": {"description": "Recipes"}}) == "cook: Recipes"
+    # The mapping is updated in place when the manifests are reloaded
+    manifests["cook"] = {"description": "Dinner"}
+    assert manifest.prompt_data(manifests) == "cook: Dinner"
+
+
+def test_no_prompt():
+    assert Manifest({}, ".", "agent").prompt_data() is None
+    assert Manifest({"prompt": "Hello {memory}"}, ".", "agent").prompt_data() == "Hello {memory}"
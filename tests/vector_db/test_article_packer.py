@@ -0,0 +1,66 @@
+import os
+import sys
+from typing import List
+
+import pytest
+
+sys.path.append(os.path.join(os.path.dirname(__file__), "../../src"))
+
+from slashgpt.dbs.article_packer import ArticlePacker  # noqa: E402
+from slashgpt.dbs.vector_engine_openai import VectorEngineOpenAI  # noqa: E402
+from slashgpt.llms.engine.base import LLMEngineBase  # noqa: E402
+from slashgpt.llms.model import LlmModel  # noqa: E402
+from slashgpt.manifest import Manifest  # noqa: E402
+
+
+class WordCountEngine(LLMEngineBase):
+    """One token per word. It records the tokenized texts."""
+
+    def chat_completion(self, messages: List[dict], manifest: Manifest, verbose: bool):
+        return ("assistant", "", None, 0)
+
+    def num_tokens(self, text: str):
+        self.counted = getattr(self, "counted", []) + [text]
+        return len(text.split())
+
+
+@pytest.fixture
+def llm_model():
+    # The budget is 20 (520 - 500)
+    return LlmModel({"engine_name": "word_count", "model_name": "word_count", "max_token": 520}, {"word_count": WordCountEngine})
+
+
+# Articles are 5 tokens (words and the separator) except the second one (14 tokens)
+articles = ["a b c d", "e f g h i j k l m n o p q", "w x y z", "r s t u"]
+
+
+def test_greedy(llm_model):
+    packer = ArticlePacker()
+    (packed, stats) = packer.pack(articles, "context with three", llm_model)
+    assert packed == 'a b c d\n"""'
+    assert stats == {"considered": 2, "packed": 1, "tokens": 8, "budget": 20}
+
+
+def test_first_fit(llm_model):
+    packer = ArticlePacker("first_fit")
+    (packed, stats) = packer.pack(articles, "context with three", llm_model)
+    assert packed == 'a b c d\n"""w x y z\n"""r s t u\n"""'
+    assert stats == {"considered": 4, "packed": 3, "tokens": 18, "budget": 20}
+
+
+def test_each_text_is_tokenized_once(llm_model):
+    ArticlePacker("first_fit").pack(articles, "context", llm_model)
+    assert llm_model.engine.counted == ["context"] + [article + '\n"""' for article in articles]
+
+
+def test_invalid_policy():
+    with pytest.raises(ValueError):
+        ArticlePacker("knapsack")
+
+
+def test_vector_engine(llm_model):
+    engine = VectorEngineOpenAI(False)
+    messages = [{"role": "system", "content": "system"}, {"role": "user", "content": "question"}]
+    articles = engine.results_to_articles(["a b c d", "e f g h"], "query", messages, llm_model)
+    assert articles == 'a b c d\n"""e f g h\n"""'
+    assert engine.packer.stats["packed"] == 2